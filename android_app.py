@@ -3,13 +3,24 @@ import os
 from pathlib import Path
 import zipfile
 import io
+import time
 from android_converter import (
-    convert_js_to_txt,
+    DEX_REFERENCE_LIMIT,
+    write_js_to_txt,
     analyze_js_statistics,
     parse_dex_file,
+    analyze_dex_tables,
+    build_dex_string_index,
+    build_call_graph,
+    build_dex_xref_index,
+    build_smali_index,
+    disassemble_dex_class,
+    write_dex_smali_zip,
     parse_smali_file,
     decompile_apk,
     analyze_manifest,
+    parse_manifest_file,
+    classify_permissions,
     extract_resources,
     detect_permissions,
     analyze_dependencies,
@@ -20,6 +31,64 @@ from android_converter import (
     analyze_gradle_files,
     detect_native_libs
 )
+from android_cache import get_cache, input_digest
+from android_text import read_text
+
+# Máximo de resultados memoizados por sesión
+SESSION_MEMO_SIZE = 32
+
+# Clases que se ofrecen a la vez en el selector del desensamblador
+SMALI_CLASS_OPTIONS = 1000
+
+# Parámetros que solo cambian cómo se ejecuta un análisis, no su resultado
+SESSION_MEMO_IGNORE = ('workers',)
+
+
+def _memo_key(value):
+    """Identifica un argumento por subida (archivos), por contenido (otros streams) o por valor"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_memo_key(item) for item in value)
+    if hasattr(value, 'read'):
+        # Cada subida de Streamlit tiene un file_id propio: no hace falta releer el contenido en cada rerun
+        file_id = getattr(value, 'file_id', None)
+        if file_id is not None:
+            return (value.name, file_id, value.size)
+        return (getattr(value, 'name', ''), input_digest(value))
+    return value
+
+
+def session_memo(func, *args, **kwargs):
+    """Ejecuta un análisis una sola vez por sesión para el mismo contenido y parámetros"""
+    memo = st.session_state.setdefault('analysis_memo', {})
+    params = tuple(sorted((name, value) for name, value in kwargs.items() if name not in SESSION_MEMO_IGNORE))
+    key = (func.__module__, func.__qualname__, _memo_key(args), params)
+    if key in memo:
+        # Se reinserta al final para mantener el orden LRU
+        memo[key] = memo.pop(key)
+    else:
+        memo[key] = func(*args, **kwargs)
+        while len(memo) > SESSION_MEMO_SIZE:
+            memo.pop(next(iter(memo)))
+    return memo[key]
+
+
+def _requested(section, files, label):
+    """Botón que activa una sección costosa; queda activa en los reruns mientras no cambien los archivos"""
+    flags = st.session_state.setdefault('requested_sections', {})
+    files_key = _memo_key(files)
+    if st.button(label, key=f"request_{section}"):
+        flags[section] = files_key
+    return flags.get(section) == files_key
+
+
+def _dex_index_blob(files):
+    """Índice de strings serializado para descargar"""
+    return session_memo(build_dex_string_index, files).to_bytes()
+
+
+def _dex_xref_blob(files):
+    """Índice de referencias cruzadas serializado para descargar"""
+    return session_memo(build_dex_xref_index, files).to_bytes()
 
 # Configuración de la página
 st.set_page_config(
@@ -103,6 +172,14 @@ categoria = st.sidebar.radio(
     ]
 )
 
+# Procesos para repartir los análisis de varios archivos JavaScript
+js_workers = st.sidebar.slider(
+    "**⚙️ Procesos para análisis JS**",
+    min_value=1,
+    max_value=os.cpu_count() or 1,
+    value=1
+)
+
 st.sidebar.markdown("---")
 st.sidebar.info("**💡 Tip:** Sube archivos .js, .dex, .smali o AndroidManifest.xml")
 st.sidebar.warning("**⚠️ Nota:** Por seguridad, no se pueden subir archivos APK completos. Extrae los archivos individualmente.")
@@ -148,7 +225,11 @@ if categoria == "🏠 Conversión Básica":
         
         if st.button("**🔄 Convertir Archivos**", key="convert_basic"):
             with st.spinner("**Convirtiendo archivos...**"):
-                result = convert_js_to_txt(
+                # La conversión se escribe por bloques en un temporal: en memoria solo queda la vista previa
+                previous = st.session_state.pop('converted_txt_path', None)
+                if previous and os.path.exists(previous):
+                    os.remove(previous)
+                result = write_js_to_txt(
                     uploaded_files,
                     preserve_comments=preserve_comments,
                     add_line_numbers=add_line_numbers,
@@ -156,14 +237,24 @@ if categoria == "🏠 Conversión Básica":
                     beautify_code=beautify_code
                 )
                 
-                st.text_area("**📄 Contenido Convertido:**", result, height=400)
-                
-                st.download_button(
-                    label="**⬇️ Descargar como .txt**",
-                    data=result,
-                    file_name="android_code_converted.txt",
-                    mime="text/plain"
-                )
+                if 'error' in result:
+                    st.error(f"**Error: {result['error']}**")
+                else:
+                    st.session_state['converted_txt_path'] = result['path']
+                    st.text_area("**📄 Contenido Convertido:**", result['preview'], height=400)
+                    if result['truncated']:
+                        st.caption(
+                            f"Vista previa de los primeros {len(result['preview']):,} caracteres; "
+                            f"el archivo completo ocupa {result['bytes'] / 1024 / 1024:.2f} MB"
+                        )
+                    
+                    with open(result['path'], 'rb') as converted:
+                        st.download_button(
+                            label="**⬇️ Descargar como .txt**",
+                            data=converted,
+                            file_name="android_code_converted.txt",
+                            mime="text/plain"
+                        )
 
 # ==================== ANÁLISIS DE JAVASCRIPT ====================
 elif categoria == "📱 Análisis de JavaScript":
@@ -188,7 +279,7 @@ elif categoria == "📱 Análisis de JavaScript":
         with tab1:
             st.subheader("**Estadísticas del Código JavaScript**")
             if st.button("**Analizar Estadísticas**", key="analyze_js_stats"):
-                stats = analyze_js_statistics(uploaded_files)
+                stats = session_memo(analyze_js_statistics, uploaded_files, workers=js_workers)
                 
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
@@ -206,7 +297,7 @@ elif categoria == "📱 Análisis de JavaScript":
         with tab2:
             st.subheader("**Funciones y Componentes Detectados**")
             if st.button("**Listar Elementos**", key="list_js_elements"):
-                stats = analyze_js_statistics(uploaded_files)
+                stats = session_memo(analyze_js_statistics, uploaded_files, workers=js_workers)
                 
                 if stats.get('function_list'):
                     st.markdown("**🔹 Funciones encontradas:**")
@@ -221,7 +312,7 @@ elif categoria == "📱 Análisis de JavaScript":
         with tab3:
             st.subheader("**Análisis de Dependencias**")
             if st.button("**Analizar Imports**", key="analyze_js_deps"):
-                deps = analyze_dependencies(uploaded_files)
+                deps = session_memo(analyze_dependencies, uploaded_files, workers=js_workers)
                 
                 st.markdown("**📦 Dependencias externas:**")
                 for file, imports in deps.items():
@@ -232,7 +323,7 @@ elif categoria == "📱 Análisis de JavaScript":
         with tab4:
             st.subheader("**Problemas y Advertencias**")
             if st.button("**Escanear Código**", key="scan_js_issues"):
-                issues = detect_security_issues_android(uploaded_files, 'javascript')
+                issues = session_memo(detect_security_issues_android, uploaded_files, 'javascript', workers=js_workers)
                 
                 if issues:
                     for issue in issues:
@@ -250,7 +341,7 @@ elif categoria == "📱 Análisis de JavaScript":
             formato = st.selectbox("**Formato:**", ["Markdown", "HTML", "JSON", "TXT"])
             
             if st.button("**Generar Reporte**", key="export_js"):
-                stats = analyze_js_statistics(uploaded_files)
+                stats = session_memo(analyze_js_statistics, uploaded_files, workers=js_workers)
                 
                 if formato == "JSON":
                     import json
@@ -276,10 +367,13 @@ elif categoria == "🔧 Análisis DEX/SMALI":
         )
         
         if uploaded_files:
-            tab1, tab2, tab3 = st.tabs([
+            tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
                 "**🔍 Estructura DEX**",
                 "**📊 Estadísticas**",
-                "**💾 Extraer SMALI**"
+                "**💾 Extraer SMALI**",
+                "**🔎 Buscar Strings**",
+                "**🕸️ Grafo de Llamadas**",
+                "**🔗 Referencias**"
             ])
             
             with tab1:
@@ -287,7 +381,7 @@ elif categoria == "🔧 Análisis DEX/SMALI":
                 if st.button("**Analizar DEX**", key="analyze_dex"):
                     for dex_file in uploaded_files:
                         with st.expander(f"📦 {dex_file.name}"):
-                            dex_info = parse_dex_file(dex_file)
+                            dex_info = session_memo(parse_dex_file, dex_file)
                             
                             col1, col2, col3 = st.columns(3)
                             with col1:
@@ -297,6 +391,12 @@ elif categoria == "🔧 Análisis DEX/SMALI":
                             with col3:
                                 st.metric("**Strings**", dex_info.get('string_count', 0))
                             
+                            method_refs = dex_info.get('method_count', 0)
+                            st.progress(
+                                min(method_refs / DEX_REFERENCE_LIMIT, 1.0),
+                                text=f"Referencias a métodos: {method_refs:,} / {DEX_REFERENCE_LIMIT:,} (límite 64K)"
+                            )
+                            
                             st.json(dex_info)
             
             with tab2:
@@ -304,13 +404,209 @@ elif categoria == "🔧 Análisis DEX/SMALI":
                 st.info("**Información sobre métodos, clases y referencias**")
                 
                 if st.button("**Generar Estadísticas**", key="dex_stats"):
-                    st.write("**Análisis en progreso...**")
+                    for dex_file in uploaded_files:
+                        with st.expander(f"📊 {dex_file.name}"):
+                            table_stats = session_memo(analyze_dex_tables, dex_file)
+                            
+                            if table_stats.get('error'):
+                                st.error(f"**Error:** {table_stats['error']}")
+                                continue
+                            
+                            col1, col2, col3 = st.columns(3)
+                            with col1:
+                                st.metric("**Clases definidas**", table_stats['defined_classes'])
+                            with col2:
+                                st.metric("**Métodos propios**", table_stats['internal_method_refs'])
+                            with col3:
+                                st.metric("**Métodos externos**", table_stats['external_method_refs'])
+                            
+                            st.markdown("**🔹 Clases con más métodos:**")
+                            st.table(table_stats['top_classes_by_methods'])
+                            
+                            st.markdown("**🔹 APIs externas más referenciadas:**")
+                            st.table(table_stats['top_external_classes'])
             
             with tab3:
-                st.subheader("**Descompilar DEX a SMALI**")
-                if st.button("**Convertir a SMALI**", key="dex_to_smali"):
-                    st.warning("**Esta función requiere herramientas externas como baksmali**")
-                    st.code("baksmali disassemble classes.dex -o output/", language="bash")
+                st.subheader("**Desensamblar DEX a SMALI**")
+                
+                col1, col2 = st.columns([1, 2])
+                with col1:
+                    dex_file = st.selectbox("**DEX:**", uploaded_files, format_func=lambda f: f.name,
+                                            key="smali_dex")
+                with col2:
+                    class_filter = st.text_input("**Filtrar clases (com.app o Lcom/app/):**", key="smali_class_filter")
+                
+                # Solo se desensambla la clase (o el método) elegida
+                class_names = session_memo(parse_dex_file, dex_file).get('classes', [])
+                needle = class_filter.replace('.', '/')
+                matching = [name for name in class_names if needle in name]
+                if len(matching) > SMALI_CLASS_OPTIONS:
+                    st.caption(f"{len(matching):,} clases: se muestran las primeras {SMALI_CLASS_OPTIONS:,}, "
+                               f"usa el filtro para acotar")
+                
+                class_name = st.selectbox("**Clase:**", matching[:SMALI_CLASS_OPTIONS], key="smali_class")
+                if class_name:
+                    disassembled = session_memo(disassemble_dex_class, dex_file, class_name)
+                    method = st.selectbox("**Método:**", ["(clase completa)"] + disassembled['methods'],
+                                          key="smali_method")
+                    if method != "(clase completa)":
+                        disassembled = session_memo(disassemble_dex_class, dex_file, class_name, method)
+                    
+                    if disassembled.get('error'):
+                        st.error(f"**Error:** {disassembled['error']}")
+                    else:
+                        st.code(disassembled['smali'], language="smali")
+                
+                if st.button("**📦 Desensamblar todo (ZIP)**", key="dex_to_smali"):
+                    with st.spinner("**Desensamblando clases...**"):
+                        # El ZIP se escribe clase a clase en un temporal
+                        previous = st.session_state.pop('smali_zip_path', None)
+                        if previous and os.path.exists(previous):
+                            os.remove(previous)
+                        result = write_dex_smali_zip(uploaded_files)
+                    
+                    if 'error' in result:
+                        st.error(f"**Error: {result['error']}**")
+                    else:
+                        st.session_state['smali_zip_path'] = result['path']
+                        st.success(f"**✅ {result['classes']:,} clases en {result['seconds']:.2f} s "
+                                   f"({result['bytes'] / 1024 / 1024:.2f} MB)**")
+                        if result['error_count']:
+                            st.warning(f"**{result['error_count']} clases no se pudieron desensamblar**")
+                            st.table(result['errors'])
+                        
+                        with open(result['path'], 'rb') as smali_zip:
+                            st.download_button(
+                                label="**⬇️ Descargar SMALI (.zip)**",
+                                data=smali_zip,
+                                file_name="smali.zip",
+                                mime="application/zip"
+                            )
+            
+            with tab4:
+                st.subheader("**Buscar en los Strings de los DEX**")
+                
+                # El índice se construye al pedirlo y una vez por sesión para el mismo contenido subido
+                if _requested("dex_strings", uploaded_files, "**🔎 Indexar Strings**"):
+                    with st.spinner("**Indexando strings...**"):
+                        string_index = session_memo(build_dex_string_index, uploaded_files)
+                    
+                    st.write(f"**{len(string_index):,} strings únicos en {len(string_index.dex_names)} DEX**")
+                    
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        query = st.text_input("**String, URL o clase (Lcom/app/Main;):**", key="dex_string_query")
+                    with col2:
+                        mode = st.selectbox("**Búsqueda:**", ["Contiene", "Prefijo", "Exacta"], key="dex_string_mode")
+                    
+                    if query:
+                        start = time.perf_counter()
+                        if mode == "Exacta":
+                            found_in = string_index.find(query)
+                            results = [{'string': query, 'dex': found_in}] if found_in else []
+                        elif mode == "Prefijo":
+                            results = string_index.prefix(query)
+                        else:
+                            results = string_index.search(query)
+                        elapsed_ms = (time.perf_counter() - start) * 1000
+                        
+                        st.caption(f"{len(results)} resultado(s) en {elapsed_ms:.2f} ms")
+                        for result in results:
+                            st.write(f"- `{result['string']}` → {', '.join(result['dex'])}")
+                    
+                    # La serialización (con los trigramas) solo se hace si se pide la descarga
+                    if st.button("**📦 Preparar índice para descargar**", key="prepare_dex_strings"):
+                        st.download_button(
+                            label="**⬇️ Descargar índice**",
+                            data=session_memo(_dex_index_blob, uploaded_files),
+                            file_name="dex_strings.idx",
+                            mime="application/octet-stream"
+                        )
+            
+            with tab5:
+                st.subheader("**Grafo de Llamadas y Alcanzabilidad**")
+                st.caption("Para un APK completo (entradas del manifest y código muerto): "
+                           "`python android_cli.py app.apk`")
+                
+                if _requested("call_graph", uploaded_files, "**🕸️ Construir Grafo**"):
+                    with st.spinner("**Construyendo grafo...**"):
+                        call_graph = session_memo(build_call_graph, uploaded_files)
+                    st.write(f"**{call_graph.node_count:,} métodos y {call_graph.edge_count:,} llamadas**")
+                    
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        query = st.text_input("**Método (Lcom/app/Main;->onCreate(Landroid/os/Bundle;)V) o prefijo:**",
+                                              key="call_graph_query")
+                    with col2:
+                        mode = st.selectbox("**Consulta:**",
+                                            ["Llama a", "Llamado por", "Alcanza", "Alcanzado desde"],
+                                            key="call_graph_mode")
+                    
+                    if query:
+                        if call_graph.node(query) is None:
+                            matches = call_graph.find(query)
+                            st.caption(f"{len(matches)} método(s) con ese prefijo")
+                            for signature in matches:
+                                st.write(f"- `{signature}`")
+                        else:
+                            start = time.perf_counter()
+                            if mode == "Llama a":
+                                results = call_graph.callees(query)
+                            elif mode == "Llamado por":
+                                results = call_graph.callers(query)
+                            elif mode == "Alcanza":
+                                results = call_graph.reached_from(query)['methods']
+                            else:
+                                results = call_graph.reaching(query)['methods']
+                            elapsed_ms = (time.perf_counter() - start) * 1000
+                            
+                            st.caption(f"{len(results)} método(s) en {elapsed_ms:.2f} ms")
+                            for signature in results:
+                                st.write(f"- `{signature}`")
+            
+            with tab6:
+                st.subheader("**Referencias Cruzadas (xref)**")
+                
+                # Una pasada por el código al pedirlo; las consultas son búsquedas en el índice
+                if _requested("dex_xrefs", uploaded_files, "**🔗 Indexar Referencias**"):
+                    with st.spinner("**Indexando referencias...**"):
+                        xref_index = session_memo(build_dex_xref_index, uploaded_files)
+                    xref_stats = xref_index.stats()
+                    st.write(f"**{xref_stats['strings']:,} strings, {xref_stats['methods']:,} métodos llamados "
+                             f"y {xref_stats['fields']:,} campos leídos**")
+                    
+                    col1, col2, col3 = st.columns([3, 1, 1])
+                    with col1:
+                        query = st.text_input("**String, método (Ljavax/crypto/Cipher;->getInstance) o campo:**",
+                                              key="xref_query")
+                    with col2:
+                        kind = st.selectbox("**Usos de:**", ["String", "Método", "Campo"], key="xref_kind")
+                    with col3:
+                        mode = st.selectbox("**Búsqueda:**", ["Prefijo", "Exacta", "Contiene"], key="xref_mode")
+                    
+                    if query:
+                        start = time.perf_counter()
+                        results = xref_index.lookup(
+                            {"String": "string", "Método": "method", "Campo": "field"}[kind],
+                            query,
+                            {"Prefijo": "prefix", "Exacta": "exact", "Contiene": "contains"}[mode]
+                        )
+                        elapsed_ms = (time.perf_counter() - start) * 1000
+                        
+                        st.caption(f"{len(results)} referencia(s) en {elapsed_ms:.2f} ms")
+                        for result in results:
+                            target = result.get('string', result.get('method', result.get('field')))
+                            with st.expander(f"`{target}` → {result['count']} método(s)"):
+                                for signature in result['methods']:
+                                    st.write(f"- `{signature}`")
+                    
+                    if st.button("**📦 Preparar índice para descargar**", key="prepare_dex_xrefs"):
+                        st.download_button(
+                            label="**⬇️ Descargar índice**",
+                            data=session_memo(_dex_xref_blob, uploaded_files),
+                            file_name="dex_xrefs.idx",
+                            mime="application/octet-stream"
+                        )
     
     else:  # SMALI
         uploaded_files = st.file_uploader(
@@ -321,16 +617,17 @@ elif categoria == "🔧 Análisis DEX/SMALI":
         )
         
         if uploaded_files:
-            tab1, tab2 = st.tabs([
+            tab1, tab2, tab3 = st.tabs([
                 "**📖 Leer SMALI**",
-                "**🔄 Convertir a Java**"
+                "**🔄 Convertir a Java**",
+                "**🔎 Buscar Símbolos**"
             ])
             
             with tab1:
                 st.subheader("**Contenido de Archivos SMALI**")
                 for smali_file in uploaded_files:
                     with st.expander(f"📄 {smali_file.name}"):
-                        smali_content = parse_smali_file(smali_file)
+                        smali_content = session_memo(parse_smali_file, smali_file)
                         st.code(smali_content, language="smali")
             
             with tab2:
@@ -339,6 +636,37 @@ elif categoria == "🔧 Análisis DEX/SMALI":
                 
                 if st.button("**Intentar Conversión**", key="smali_to_java"):
                     st.warning("**Esta conversión es aproximada y puede no ser exacta**")
+            
+            with tab3:
+                st.subheader("**Buscar Clases, Métodos y Campos**")
+                st.caption("Para un árbol completo de apktool: `python android_smali.py app_apktool/ --index app.smali.idx`")
+                
+                with st.spinner("**Indexando símbolos...**"):
+                    smali_index = session_memo(build_smali_index, uploaded_files)
+                index_stats = smali_index.stats()
+                st.write(f"**{index_stats['classes']:,} clases, {index_stats['methods']:,} métodos "
+                         f"y {index_stats['fields']:,} campos**")
+                
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    query = st.text_input("**Clase (com.app.Main), método o campo (Lcom/app/Main;->onCreate):**",
+                                          key="smali_symbol_query")
+                with col2:
+                    mode = st.selectbox("**Buscar:**", ["Clase", "Método", "Campo"], key="smali_symbol_mode")
+                
+                if query:
+                    start = time.perf_counter()
+                    if mode == "Clase":
+                        results = smali_index.find_class(query)
+                    elif mode == "Método":
+                        results = smali_index.find_method(query)
+                    else:
+                        results = smali_index.find_field(query)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    
+                    st.caption(f"{len(results)} resultado(s) en {elapsed_ms:.2f} ms")
+                    if results:
+                        st.table(results)
 
 # ==================== ANÁLISIS DE MANIFIESTOS ====================
 elif categoria == "📊 Análisis de Manifiestos":
@@ -369,6 +697,9 @@ elif categoria == "📊 Análisis de Manifiestos":
     if manifest_file:
         st.success(f"**✅ Archivo cargado: {manifest_file.name}**")
         
+        # El manifest puede venir en XML binario (AXML, extraído del APK) o en texto (apktool)
+        manifest_info = session_memo(parse_manifest_file, manifest_file)
+        
         tab1, tab2, tab3 = st.tabs([
             "**📄 Contenido**",
             "**🔐 Permisos**",
@@ -377,86 +708,78 @@ elif categoria == "📊 Análisis de Manifiestos":
         
         with tab1:
             st.subheader("**Contenido del Manifest**")
-            try:
-                content = manifest_file.read().decode('utf-8')
-                st.code(content, language="xml")
-                manifest_file.seek(0)
-            except:
-                st.error("**Error al leer el archivo. Asegúrate que sea un archivo XML válido.**")
+            if manifest_info.get('error'):
+                st.error(f"**Error al leer el archivo. Asegúrate que sea un AndroidManifest.xml válido:** {manifest_info['error']}")
+            else:
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.write(f"**Package:** `{manifest_info['package'] or 'N/A'}`")
+                with col2:
+                    st.write(f"**Versión:** `{manifest_info['version_name'] or 'N/A'}` ({manifest_info['version_code'] or '?'})")
+                with col3:
+                    st.write(f"**Min SDK:** `{manifest_info['min_sdk'] or 'N/A'}`")
+                with col4:
+                    st.write(f"**Target SDK:** `{manifest_info['target_sdk'] or 'N/A'}`")
+                st.code(manifest_info['raw_xml'], language="xml")
         
         with tab2:
             st.subheader("**Análisis de Permisos**")
             if st.button("**Extraer Permisos**", key="extract_perms"):
-                try:
-                    content = manifest_file.read().decode('utf-8')
+                permissions = classify_permissions(manifest_info['permissions'])
+                
+                if permissions:
+                    st.write(f"**Total de permisos encontrados:** {len(permissions)}")
                     
-                    # Buscar permisos
-                    perm_pattern = r'<uses-permission\s+android:name="([^"]+)"'
-                    permissions = re.findall(perm_pattern, content)
+                    dangerous = [p['name'] for p in permissions if p['level'] == 'dangerous']
+                    normal = [p['name'] for p in permissions if p['level'] != 'dangerous']
                     
-                    if permissions:
-                        st.write(f"**Total de permisos encontrados:** {len(permissions)}")
-                        
-                        dangerous_keywords = ['CAMERA', 'LOCATION', 'CONTACTS', 'SMS', 'PHONE', 'STORAGE', 'MICROPHONE']
-                        
-                        dangerous = [p for p in permissions if any(kw in p.upper() for kw in dangerous_keywords)]
-                        normal = [p for p in permissions if p not in dangerous]
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.markdown("**🔴 Permisos Peligrosos:**")
-                            for perm in dangerous:
-                                st.code(perm)
-                        
-                        with col2:
-                            st.markdown("**🔵 Permisos Normales:**")
-                            for perm in normal:
-                                st.code(perm)
-                    else:
-                        st.info("**No se encontraron permisos en el manifest**")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.markdown("**🔴 Permisos Peligrosos:**")
+                        for perm in dangerous:
+                            st.code(perm)
                     
-                    manifest_file.seek(0)
-                except Exception as e:
-                    st.error(f"**Error:** {str(e)}")
+                    with col2:
+                        st.markdown("**🔵 Permisos Normales:**")
+                        for perm in normal:
+                            st.code(perm)
+                else:
+                    st.info("**No se encontraron permisos en el manifest**")
         
         with tab3:
             st.subheader("**Componentes de la App**")
             if st.button("**Extraer Componentes**", key="extract_components"):
-                try:
-                    content = manifest_file.read().decode('utf-8')
-                    
-                    # Buscar activities
-                    activity_pattern = r'<activity\s+android:name="([^"]+)"'
-                    activities = re.findall(activity_pattern, content)
-                    
-                    # Buscar services
-                    service_pattern = r'<service\s+android:name="([^"]+)"'
-                    services = re.findall(service_pattern, content)
-                    
-                    # Buscar receivers
-                    receiver_pattern = r'<receiver\s+android:name="([^"]+)"'
-                    receivers = re.findall(receiver_pattern, content)
-                    
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.metric("**Activities**", len(activities))
-                        for act in activities:
-                            st.code(act, language="java")
-                    
-                    with col2:
-                        st.metric("**Services**", len(services))
-                        for srv in services:
-                            st.code(srv, language="java")
-                    
-                    with col3:
-                        st.metric("**Receivers**", len(receivers))
-                        for rcv in receivers:
-                            st.code(rcv, language="java")
-                    
-                    manifest_file.seek(0)
-                except Exception as e:
-                    st.error(f"**Error:** {str(e)}")
+                activities = manifest_info['activities']
+                services = manifest_info['services']
+                receivers = manifest_info['receivers']
+                providers = manifest_info['providers']
+                
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.metric("**Activities**", len(activities))
+                    for act in activities:
+                        st.code(act, language="java")
+                
+                with col2:
+                    st.metric("**Services**", len(services))
+                    for srv in services:
+                        st.code(srv, language="java")
+                
+                with col3:
+                    st.metric("**Receivers**", len(receivers))
+                    for rcv in receivers:
+                        st.code(rcv, language="java")
+                
+                with col4:
+                    st.metric("**Providers**", len(providers))
+                    for prv in providers:
+                        st.code(prv, language="java")
+                
+                if manifest_info.get('exported_components'):
+                    st.warning(f"**⚠️ Componentes exportados:** {len(manifest_info['exported_components'])}")
+                    for comp in manifest_info['exported_components']:
+                        st.write(f"- `{comp}`")
 
 # ==================== SEGURIDAD DE CÓDIGO ====================
 elif categoria == "🔐 Seguridad de Código":
@@ -481,7 +804,7 @@ elif categoria == "🔐 Seguridad de Código":
     if source_files:
         if st.button("**🔍 Escanear Seguridad**", key="scan_source_security"):
             with st.spinner("**Escaneando código...**"):
-                issues = detect_security_issues_android(source_files, 'javascript')
+                issues = session_memo(detect_security_issues_android, source_files, 'javascript', workers=js_workers)
                 
                 if issues:
                     high = [i for i in issues if i['severity'] == 'HIGH']
@@ -501,17 +824,17 @@ elif categoria == "🔐 Seguridad de Código":
                     if high:
                         st.markdown("#### **🔴 Prioridad Alta:**")
                         for issue in high:
-                            st.error(f"**{issue['file']}** (línea {issue.get('line', '?')}): {issue['description']}")
+                            st.error(f"**{issue['file']}** (línea {issue.get('line', '?')}, col {issue.get('column', '?')}): {issue['description']}")
                     
                     if medium:
                         st.markdown("#### **🟡 Prioridad Media:**")
                         for issue in medium:
-                            st.warning(f"**{issue['file']}** (línea {issue.get('line', '?')}): {issue['description']}")
+                            st.warning(f"**{issue['file']}** (línea {issue.get('line', '?')}, col {issue.get('column', '?')}): {issue['description']}")
                     
                     if low:
                         with st.expander("**🔵 Prioridad Baja**"):
                             for issue in low:
-                                st.info(f"**{issue['file']}** (línea {issue.get('line', '?')}): {issue['description']}")
+                                st.info(f"**{issue['file']}** (línea {issue.get('line', '?')}, col {issue.get('column', '?')}): {issue['description']}")
                 else:
                     st.success("**✅ No se detectaron problemas de seguridad**")
                     st.balloons()
@@ -544,7 +867,7 @@ elif categoria == "🔍 Dependencias JavaScript":
         
         if js_files:
             if st.button("**Analizar Dependencias**", key="analyze_js_deps"):
-                deps = analyze_dependencies(js_files)
+                deps = session_memo(analyze_dependencies, js_files, workers=js_workers)
                 
                 st.markdown("### **Dependencias Detectadas:**")
                 
@@ -655,7 +978,7 @@ elif categoria == "📝 Análisis Gradle/Config":
         if gradle_files:
             for gradle_file in gradle_files:
                 with st.expander(f"📄 {gradle_file.name}"):
-                    gradle_info = analyze_gradle_files(gradle_file)
+                    gradle_info = session_memo(analyze_gradle_files, gradle_file)
                     
                     col1, col2 = st.columns(2)
                     
@@ -693,7 +1016,7 @@ elif categoria == "📝 Análisis Gradle/Config":
             st.success(f"**✅ Archivo cargado: {config_file.name}**")
             
             try:
-                content = config_file.read().decode('utf-8')
+                content = read_text(config_file)
                 st.code(content, language="text")
                 
                 # Buscar configuraciones sensibles
@@ -897,6 +1220,22 @@ elif categoria == "💡 Guía de Uso":
         - **Esc**: Cerrar menú lateral
         """)
 
+# Estado de la caché de análisis (al final, para incluir los análisis de esta ejecución)
+analysis_cache = get_cache()
+if analysis_cache is not None:
+    cache_stats = analysis_cache.stats()
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("**🗄️ Caché de análisis**")
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        st.metric("**Aciertos**", cache_stats['hits'])
+    with col2:
+        st.metric("**Fallos**", cache_stats['misses'])
+    st.sidebar.caption(
+        f"{cache_stats['entries']} entradas · "
+        f"{cache_stats['bytes'] / 1024 / 1024:.1f} de {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB"
+    )
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,51 @@
+"""
+Arrays compactos de enteros compartidos por los índices (DEX, SMALI, grafo de llamadas, xrefs)
+Conversión little-endian para leer tablas binarias y serializar índices, y construcción de CSR
+"""
+
+import sys
+from array import array
+
+
+# Código de tipo de array para enteros sin signo de 32 bits
+U32 = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def array_from(buf, offset, count, typecode):
+    """Copia un bloque little-endian del buffer a un array de enteros"""
+    values = array(typecode)
+    values.frombytes(buf[offset:offset + count * values.itemsize])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def array_to_le_bytes(values):
+    """Bytes little-endian de un array de enteros (formato de los índices serializados)"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def csr(node_count, sources, targets):
+    """Offsets y destinos agrupados por origen (ordenación por conteo), sin aristas repetidas"""
+    counts = array(U32, bytes(4 * (node_count + 1)))
+    for source in sources:
+        counts[source + 1] += 1
+    for i in range(node_count):
+        counts[i + 1] += counts[i]
+
+    position = counts[:-1]
+    grouped = array(U32, bytes(4 * len(targets)))
+    for source, target in zip(sources, targets):
+        grouped[position[source]] = target
+        position[source] += 1
+
+    offsets = array(U32, [0])
+    unique = array(U32)
+    for node_id in range(node_count):
+        row = sorted(set(grouped[counts[node_id]:counts[node_id + 1]]))
+        unique.extend(row)
+        offsets.append(len(unique))
+    return offsets, unique
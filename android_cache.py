@@ -0,0 +1,345 @@
+"""
+Caché en disco de resultados de análisis
+Las entradas se identifican por el SHA-256 de su contenido más el nombre y la versión del analizador
+"""
+
+import base64
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import zlib
+
+
+# Formato de los archivos de caché (cambiarlo invalida todas las entradas)
+CACHE_FORMAT = 1
+
+# Tamaño máximo por defecto de la caché en disco
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Al desalojar se baja hasta esta fracción del presupuesto para no desalojar en cada escritura
+EVICTION_TARGET = 0.9
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Variables de entorno de configuración
+ENV_ENABLED = 'ANDROID_ANALYZER_CACHE'
+ENV_DIR = 'ANDROID_ANALYZER_CACHE_DIR'
+ENV_MAX_MB = 'ANDROID_ANALYZER_CACHE_MB'
+
+# Hashes de archivos en disco por (ruta, tamaño, mtime) para no releerlos
+_file_digests = {}
+_MAX_FILE_DIGESTS = 1024
+
+
+def _default_directory():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'android-analyzer')
+
+
+def file_sha256(path):
+    """SHA-256 de un archivo en disco (memoizado mientras no cambie su tamaño ni su mtime)"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_digests.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        if len(_file_digests) >= _MAX_FILE_DIGESTS:
+            _file_digests.clear()
+        _file_digests[key] = digest
+    return digest
+
+
+def input_digest(source):
+    """SHA-256 del contenido de una entrada (ruta, bytes, archivo subido o ApkArchive); None si no se reconoce"""
+    if hasattr(source, 'sha256'):
+        return source.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        return file_sha256(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    if hasattr(source, 'getbuffer'):
+        # BytesIO / UploadedFile de Streamlit: se hashea en memoria sin copiar
+        with source.getbuffer() as view:
+            return hashlib.sha256(view).hexdigest()
+    if hasattr(source, 'read') and hasattr(source, 'seek'):
+        position = source.tell()
+        sha = hashlib.sha256()
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+        source.seek(position)
+        return sha.hexdigest()
+    return None
+
+
+def _describe_input(source):
+    """[nombre, sha256] de una entrada o lista de entradas; None si alguna no se reconoce"""
+    if isinstance(source, (list, tuple)):
+        described = [_describe_input(item) for item in source]
+        return None if None in described else described
+    digest = input_digest(source)
+    if digest is None:
+        return None
+    if isinstance(source, (str, os.PathLike)):
+        name = os.path.basename(os.fspath(source))
+    else:
+        name = getattr(source, 'name', '')
+    return [name, digest]
+
+
+# Fallos notificados con report_failure() (contador global del proceso)
+_failures = 0
+
+
+def report_failure():
+    """Marca como fallido el análisis en curso: su resultado (y el de quien lo llamó) no se guarda.
+    Lo usan los analizadores cuyas claves salen de los datos, donde 'error' puede ser un nombre real"""
+    global _failures
+    _failures += 1
+
+
+def _is_error(result):
+    """Los resultados con errores no se guardan (el error puede ser transitorio)"""
+    if isinstance(result, dict):
+        return 'error' in result
+    if isinstance(result, list):
+        for item in result:
+            if isinstance(item, dict) and ('error' in item or item.get('type') == 'analysis_error'):
+                return True
+            if isinstance(item, str) and item.startswith('Error: '):
+                return True
+    return False
+
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray)):
+        envelope = {'kind': 'bytes', 'value': base64.b64encode(value).decode('ascii')}
+    else:
+        envelope = {'kind': 'json', 'value': value}
+    return zlib.compress(json.dumps(envelope, ensure_ascii=False).encode('utf-8'))
+
+
+def _decode(data):
+    envelope = json.loads(zlib.decompress(data).decode('utf-8'))
+    if envelope['kind'] == 'bytes':
+        return base64.b64decode(envelope['value'])
+    return envelope['value']
+
+
+class AnalysisCache:
+    """Caché de resultados en disco direccionada por contenido, con desalojo LRU bajo un presupuesto de bytes"""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or _default_directory()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        # Bytes ocupados en disco (se calculan en el primer uso)
+        self._size = None
+
+    def key(self, analyzer, version, inputs, params=None):
+        """Clave de una llamada: analizador, versión, entradas [nombre, sha256] y parámetros"""
+        payload = json.dumps(
+            [CACHE_FORMAT, analyzer, version, inputs, params or {}],
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json.z')
+
+    def get(self, key):
+        """Devuelve (True, valor) si la clave está en caché o (False, None) si no"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # El mtime marca el último uso para el desalojo LRU
+            os.utime(path)
+            value = _decode(data)
+        except FileNotFoundError:
+            self.misses += 1
+            return False, None
+        except (OSError, ValueError, KeyError, zlib.error):
+            # Entrada ilegible o corrupta: se descarta
+            self.errors += 1
+            self.misses += 1
+            self._remove(path)
+            return False, None
+
+        self.hits += 1
+        return True, value
+
+    def put(self, key, value):
+        """Guarda un resultado (JSON o bytes); devuelve False si no es serializable o no se pudo escribir"""
+        try:
+            data = _encode(value)
+        except (TypeError, ValueError):
+            return False
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            # Escritura atómica: temporal en el mismo directorio y os.replace
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            self.errors += 1
+            return False
+
+        self._size = self.size() + len(data) - previous
+        if self._size > self.max_bytes:
+            self._evict()
+        return True
+
+    def _entries(self):
+        """(mtime, tamaño, ruta) de cada entrada en disco"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith('.json.z'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def size(self):
+        """Bytes ocupados por la caché en disco"""
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        if self._size is not None:
+            self._size -= size
+
+    def _evict(self):
+        """Elimina las entradas usadas hace más tiempo hasta quedar bajo el presupuesto"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICTION_TARGET
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    def clear(self):
+        """Vacía la caché en disco y reinicia los contadores"""
+        for _, _, path in self._entries():
+            self._remove(path)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def stats(self):
+        """Aciertos, fallos, entradas y bytes ocupados"""
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'directory': self.directory
+        }
+
+
+_default_cache = None
+_configured = False
+
+
+def configure_cache(directory=None, max_bytes=None, enabled=True):
+    """Configura la caché por defecto (por defecto se toma de las variables de entorno)"""
+    global _default_cache, _configured
+    _configured = True
+    if not enabled:
+        _default_cache = None
+        return None
+    if max_bytes is None:
+        max_bytes = int(float(os.environ.get(ENV_MAX_MB, DEFAULT_MAX_BYTES / 1024 / 1024)) * 1024 * 1024)
+    _default_cache = AnalysisCache(directory or os.environ.get(ENV_DIR), max_bytes)
+    return _default_cache
+
+
+def get_cache():
+    """Caché por defecto (None si está desactivada con ANDROID_ANALYZER_CACHE=0)"""
+    if not _configured:
+        enabled = os.environ.get(ENV_ENABLED, '1').lower() not in ('0', 'false', 'no', 'off')
+        configure_cache(enabled=enabled)
+    return _default_cache
+
+
+def cached(analyzer, version=1, inputs=1, ignore=(), encode=None, decode=None, data_keys=False):
+    """Decora un analizador para reutilizar su resultado si ya se analizó el mismo contenido
+
+    Las primeras `inputs` posiciones son entradas (se identifican por contenido); el resto de
+    argumentos forman parte de la clave salvo los nombrados en `ignore`. `encode`/`decode`
+    convierten resultados que no son JSON en bytes y viceversa. Con `data_keys` las claves del
+    resultado salen de los datos (strings, ABIs...): no se busca 'error' en ellas y los fallos
+    se notifican con report_failure().
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+
+            try:
+                # Argumentos por nombre: f(x, 4) y f(x, workers=8) dan la misma clave si se ignora workers
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = list(bound.arguments.items())
+                described = [_describe_input(source) for _, source in arguments[:inputs]]
+                params = {name: value for name, value in arguments[inputs:] if name not in ignore}
+                key = None if None in described else cache.key(analyzer, version, described, params)
+            except (OSError, TypeError, ValueError):
+                key = None
+            if key is None:
+                return func(*args, **kwargs)
+
+            hit, value = cache.get(key)
+            if hit:
+                return decode(value) if decode else value
+
+            failures = _failures
+            result = func(*args, **kwargs)
+            failed = _failures != failures or (not data_keys and _is_error(result))
+            if not failed:
+                cache.put(key, encode(result) if encode else result)
+            return result
+
+        # Acceso directo a la versión sin caché
+        wrapper.uncached = func
+        return wrapper
+    return decorator
@@ -0,0 +1,465 @@
+"""
+Grafo de llamadas y alcanzabilidad
+Se construye a partir de las instrucciones invoke-* de los DEX o de archivos SMALI y se guarda como
+arrays CSR de enteros (offsets + destinos) en ambos sentidos, con los métodos como nodos ordenados
+"""
+
+import base64
+import bisect
+import json
+import re
+import zlib
+from array import array
+from collections import Counter
+
+from android_arrays import U32, array_from, array_to_le_bytes, csr
+from android_dalvik import ReferenceResolver, code_xrefs
+from android_dex import NO_INDEX
+from android_smali import to_descriptor
+
+
+# access_flags de métodos
+ACC_PRIVATE = 0x2
+ACC_STATIC = 0x8
+ACC_CONSTRUCTOR = 0x10000
+
+_SMALI_ACCESS = {
+    'private': ACC_PRIVATE,
+    'static': ACC_STATIC,
+    'constructor': ACC_CONSTRUCTOR
+}
+
+# Flags por nodo
+NODE_DEFINED = 1   # método con código o declarado en la app (el resto son llamadas a librerías)
+NODE_VIRTUAL = 2   # se puede sobrescribir: ni static, ni private, ni constructor
+
+OBJECT_CLASS = 'Ljava/lang/Object;'
+
+# Métodos de Object que el runtime invoca sin llamadas explícitas desde la app
+OBJECT_CALLBACKS = frozenset([
+    'toString()Ljava/lang/String;',
+    'equals(Ljava/lang/Object;)Z',
+    'hashCode()I',
+    'finalize()V',
+    'clone()Ljava/lang/Object;'
+])
+
+CLASS_INITIALIZER = '<clinit>()V'
+
+# Declaraciones e invocaciones de SMALI (el inicio de línea se comprueba después, ver android_smali)
+_SMALI_STATEMENT = re.compile(
+    rb'(\.class|\.super|\.implements|\.method|\.end method|invoke-[a-z/\-]+)[ \t]*([^\r\n]*)'
+)
+
+
+def split_signature(signature):
+    """'Lcom/app/Main;->onCreate(Landroid/os/Bundle;)V' -> ('Lcom/app/Main;', 'onCreate(...)V')"""
+    descriptor, _, member = signature.partition('->')
+    return descriptor, member
+
+
+class CallGraphBuilder:
+    """Acumula clases, métodos y aristas de llamada; build() devuelve el CallGraph compacto"""
+
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+        self._flags = bytearray()
+        self._sources = array(U32)
+        self._targets = array(U32)
+        # descriptor -> (superclase, interfaces, miembros definidos)
+        self.classes = {}
+
+    def node(self, signature):
+        node_id = self._ids.get(signature)
+        if node_id is None:
+            node_id = self._ids[signature] = len(self._names)
+            self._names.append(signature)
+            self._flags.append(0)
+        return node_id
+
+    def _edges(self, source, targets):
+        for target in targets:
+            self._sources.append(source)
+            self._targets.append(target)
+
+    def add_class(self, descriptor, superclass, interfaces):
+        """Registra una clase; devuelve False si ya estaba (multidex: gana la primera)"""
+        if descriptor in self.classes:
+            return False
+        self.classes[descriptor] = (superclass, list(interfaces), [])
+        return True
+
+    def add_method(self, descriptor, member, access_flags, callees):
+        """Método definido en la clase y los ids de los nodos a los que llama"""
+        node_id = self.node(f'{descriptor}->{member}')
+        flags = NODE_DEFINED
+        if not access_flags & (ACC_PRIVATE | ACC_STATIC | ACC_CONSTRUCTOR) and not member.startswith('<'):
+            flags |= NODE_VIRTUAL
+        self._flags[node_id] |= flags
+        self.classes[descriptor][2].append(member)
+        self._edges(node_id, set(callees))
+
+    def add_dex(self, dex):
+        """Métodos y llamadas de todas las clases definidas en un DexFile"""
+        resolver = ReferenceResolver(dex)
+        nodes = {}
+        for class_def in dex.class_defs:
+            descriptor = resolver.type_name(class_def.class_idx)
+            superclass = class_def.superclass_idx
+            interfaces = [resolver.type_name(t) for t in dex.type_list_indices(class_def.interfaces_off)]
+            if not self.add_class(descriptor,
+                                  resolver.type_name(superclass) if superclass != NO_INDEX else None,
+                                  interfaces):
+                continue
+
+            data = dex.class_data(class_def.class_data_off)
+            if data is None:
+                continue
+            for method in data.direct_methods + data.virtual_methods:
+                callees = []
+                code = dex.code_item(method.code_off)
+                if code is not None:
+                    for method_idx in code_xrefs(dex.code_units(code))[1]:
+                        # Los índices de método se resuelven una sola vez por DEX
+                        node_id = nodes.get(method_idx)
+                        if node_id is None:
+                            node_id = nodes[method_idx] = self.node(resolver.method(method_idx))
+                        callees.append(node_id)
+                self.add_method(descriptor, resolver.method_member(method.method_idx),
+                                method.access_flags, callees)
+
+    def add_smali(self, data):
+        """Métodos y llamadas de un archivo SMALI (bytes)"""
+        descriptor = None
+        superclass = None
+        interfaces = []
+        methods = []
+        current = None
+        for match in _SMALI_STATEMENT.finditer(data):
+            start = match.start()
+            line_start = data.rfind(b'\n', 0, start) + 1
+            if data[line_start:start].strip(b' \t'):
+                continue
+            keyword = match.group(1)
+            text = match.group(2).decode('utf-8', errors='replace')
+
+            if keyword.startswith(b'invoke-'):
+                if current is None or keyword.startswith(b'invoke-custom'):
+                    continue
+                # invoke-virtual {p0, v1}, Lcom/app/A;->run(I)V  (polymorphic añade un proto al final)
+                target = text[text.find('}') + 1:].lstrip(', ').split(None, 1)
+                if target and '->' in target[0]:
+                    current[2].append(self.node(target[0].rstrip(',')))
+            elif keyword == b'.method':
+                parts = text.split()
+                access = 0
+                for word in parts[:-1]:
+                    access |= _SMALI_ACCESS.get(word, 0)
+                current = (parts[-1] if parts else '', access, [])
+            elif keyword == b'.end method':
+                if current is not None:
+                    methods.append(current)
+                current = None
+            elif keyword == b'.class':
+                descriptor = text.split()[-1] if text.split() else None
+            elif keyword == b'.super':
+                superclass = text.strip()
+            else:
+                interfaces.append(text.strip())
+
+        if descriptor is None or not self.add_class(descriptor, superclass, interfaces):
+            return
+        for member, access, callees in methods:
+            self.add_method(descriptor, member, access, callees)
+
+    def _supertypes(self, descriptor):
+        """Supertipos transitivos (superclases e interfaces) y si alguno es externo a la app"""
+        seen = []
+        external = False
+        pending = [descriptor]
+        visited = {descriptor}
+        while pending:
+            superclass, interfaces, _ = self.classes[pending.pop()]
+            for parent in ([superclass] if superclass else []) + interfaces:
+                if parent in visited:
+                    continue
+                visited.add(parent)
+                if parent in self.classes:
+                    seen.append(parent)
+                    pending.append(parent)
+                elif parent != OBJECT_CLASS:
+                    external = True
+        return seen, external
+
+    def _resolve_inherited(self, descriptor, member):
+        """Clase de la app que define el miembro heredado por descriptor (None si ninguna)"""
+        pending = [descriptor]
+        visited = set()
+        while pending:
+            current = pending.pop(0)
+            if current in visited or current not in self.classes:
+                continue
+            visited.add(current)
+            if current != descriptor and f'{current}->{member}' in self._ids \
+                    and self._flags[self._ids[f'{current}->{member}']] & NODE_DEFINED:
+                return current
+            superclass, interfaces, _ = self.classes[current]
+            pending.extend(([superclass] if superclass else []) + interfaces)
+        return None
+
+    def _dispatch_edges(self):
+        """Aproximación del despacho virtual (análisis de jerarquía de clases):
+        - una llamada a S->m llega a las sobrescrituras C->m de las subclases de la app
+        - una llamada a C->m heredado llega a la clase de la app que lo define
+        - los métodos virtuales de clases con supertipos externos (callbacks del framework) y
+          <clinit> se consideran alcanzables desde los constructores de la clase"""
+        ids = self._ids
+        for descriptor, (_, _, members) in self.classes.items():
+            supertypes, external = self._supertypes(descriptor)
+            constructors = [ids[f'{descriptor}->{m}'] for m in members if m.startswith('<init>')]
+            for member in members:
+                node_id = ids[f'{descriptor}->{member}']
+                if not self._flags[node_id] & NODE_VIRTUAL:
+                    continue
+                for parent in supertypes:
+                    parent_id = ids.get(f'{parent}->{member}')
+                    if parent_id is not None:
+                        self._edges(parent_id, (node_id,))
+                if external or member in OBJECT_CALLBACKS:
+                    for constructor in constructors:
+                        self._edges(constructor, (node_id,))
+
+            initializer = ids.get(f'{descriptor}->{CLASS_INITIALIZER}')
+            if initializer is not None:
+                for member in members:
+                    if member != CLASS_INITIALIZER:
+                        self._edges(ids[f'{descriptor}->{member}'], (initializer,))
+
+        for signature, node_id in list(ids.items()):
+            if self._flags[node_id] & NODE_DEFINED:
+                continue
+            descriptor, member = split_signature(signature)
+            if descriptor in self.classes:
+                owner = self._resolve_inherited(descriptor, member)
+                if owner is not None:
+                    self._edges(node_id, (ids[f'{owner}->{member}'],))
+
+    def build(self):
+        """CallGraph con los nodos ordenados por firma y las aristas en CSR"""
+        self._dispatch_edges()
+
+        order = sorted(range(len(self._names)), key=self._names.__getitem__)
+        remap = array(U32, bytes(4 * len(order)))
+        for new_id, old_id in enumerate(order):
+            remap[old_id] = new_id
+        names = [self._names[old_id] for old_id in order]
+        flags = bytearray(self._flags[old_id] for old_id in order)
+
+        sources = array(U32, (remap[s] for s in self._sources))
+        targets = array(U32, (remap[t] for t in self._targets))
+        offsets, targets = csr(len(names), sources, targets)
+        return CallGraph(names, flags, offsets, targets)
+
+
+def package_name(descriptor):
+    """'Lcom/app/ui/Main;' -> 'com.app.ui'"""
+    return descriptor[1:-1].rpartition('/')[0].replace('/', '.')
+
+
+class CallGraph:
+    """Grafo de llamadas en CSR: offsets[n]..offsets[n+1] indexa los destinos del nodo n en targets.
+    El grafo inverso (quién llama a quién) se construye al primer uso"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, names, flags, offsets, targets):
+        self.names = names
+        self.flags = flags
+        self.offsets = offsets
+        self.targets = targets
+        self._reverse = None
+
+    @property
+    def node_count(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def node(self, signature):
+        """Id del nodo de una firma completa (None si no existe)"""
+        pos = bisect.bisect_left(self.names, signature)
+        if pos < len(self.names) and self.names[pos] == signature:
+            return pos
+        return None
+
+    def _prefix_range(self, prefix):
+        start = bisect.bisect_left(self.names, prefix)
+        end = bisect.bisect_left(self.names, prefix + '\uffff', start)
+        return range(start, end)
+
+    def find(self, query, limit=100):
+        """Firmas que empiezan por la consulta (Lcom/app/Main;->onCreate o Lcom/app/)"""
+        return [self.names[i] for i in self._prefix_range(query)[:limit]]
+
+    def class_methods(self, descriptor):
+        """Ids de los métodos definidos en la clase"""
+        return [i for i in self._prefix_range(descriptor + '->') if self.flags[i] & NODE_DEFINED]
+
+    def reverse(self):
+        """(offsets, sources) del grafo inverso"""
+        if self._reverse is None:
+            sources = array(U32)
+            for node_id in range(self.node_count):
+                sources.extend([node_id] * (self.offsets[node_id + 1] - self.offsets[node_id]))
+            self._reverse = csr(self.node_count, self.targets, sources)
+        return self._reverse
+
+    def callees(self, signature):
+        """Llamadas directas del método (incluye despacho virtual resuelto por jerarquía)"""
+        node_id = self.node(signature)
+        if node_id is None:
+            return []
+        return [self.names[t] for t in self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]]
+
+    def callers(self, signature):
+        """Métodos que llaman directamente a este"""
+        node_id = self.node(signature)
+        if node_id is None:
+            return []
+        offsets, sources = self.reverse()
+        return [self.names[s] for s in sources[offsets[node_id]:offsets[node_id + 1]]]
+
+    @staticmethod
+    def _walk(roots, offsets, targets, node_count):
+        """Nodos alcanzables desde roots (recorrido iterativo); devuelve una máscara bytearray"""
+        visited = bytearray(node_count)
+        stack = []
+        for root in roots:
+            if not visited[root]:
+                visited[root] = 1
+                stack.append(root)
+        while stack:
+            node_id = stack.pop()
+            for target in targets[offsets[node_id]:offsets[node_id + 1]]:
+                if not visited[target]:
+                    visited[target] = 1
+                    stack.append(target)
+        return visited
+
+    def reachable(self, roots):
+        """Máscara de nodos alcanzables desde los ids dados"""
+        return self._walk(roots, self.offsets, self.targets, self.node_count)
+
+    def _walk_from(self, signature, offsets, targets, limit):
+        node_id = self.node(signature)
+        if node_id is None:
+            return {'found': False, 'count': 0, 'methods': []}
+        visited = self._walk([node_id], offsets, targets, self.node_count)
+        visited[node_id] = 0
+        ids = [i for i, flag in enumerate(visited) if flag]
+        return {
+            'found': True,
+            'count': len(ids),
+            'defined': sum(1 for i in ids if self.flags[i] & NODE_DEFINED),
+            'methods': [self.names[i] for i in ids[:limit]]
+        }
+
+    def reached_from(self, signature, limit=1000):
+        """Qué alcanza un punto de entrada (cierre transitivo de llamadas)"""
+        return self._walk_from(signature, self.offsets, self.targets, limit)
+
+    def reaching(self, signature, limit=1000):
+        """Qué métodos pueden llegar a este (cierre transitivo de llamadores)"""
+        offsets, sources = self.reverse()
+        return self._walk_from(signature, offsets, sources, limit)
+
+    def dead_code(self, entry_classes, top=20):
+        """Alcanzabilidad desde todos los métodos de las clases de entrada (componentes del manifest)
+        y estimación de los métodos definidos que nunca se alcanzan"""
+        entry_classes = [to_descriptor(c) for c in entry_classes if c]
+        roots = []
+        found = 0
+        for descriptor in entry_classes:
+            methods = self.class_methods(descriptor)
+            if methods:
+                found += 1
+                roots.extend(methods)
+        if not roots:
+            # Sin raíces todo saldría inalcanzable: no hay estimación posible
+            return {
+                'entry_classes': len(entry_classes),
+                'entry_classes_found': 0,
+                'entry_methods': 0,
+                'defined_methods': sum(1 for flag in self.flags if flag & NODE_DEFINED),
+                'reachable_methods': None,
+                'unreachable_methods': None,
+                'dead_code_pct': None,
+                'warning': 'no se resolvió ningún punto de entrada del manifest en el código DEX'
+            }
+        visited = self.reachable(roots)
+
+        defined = 0
+        reachable = 0
+        class_total = Counter()
+        class_reached = Counter()
+        for node_id, flag in enumerate(self.flags):
+            if not flag & NODE_DEFINED:
+                continue
+            descriptor = split_signature(self.names[node_id])[0]
+            defined += 1
+            class_total[descriptor] += 1
+            if visited[node_id]:
+                reachable += 1
+                class_reached[descriptor] += 1
+
+        dead_classes = sorted(c for c in class_total if not class_reached[c])
+        dead_by_package = Counter()
+        for descriptor, total in class_total.items():
+            dead_by_package[package_name(descriptor)] += total - class_reached[descriptor]
+
+        return {
+            'entry_classes': len(entry_classes),
+            'entry_classes_found': found,
+            'entry_methods': len(roots),
+            'defined_methods': defined,
+            'reachable_methods': reachable,
+            'unreachable_methods': defined - reachable,
+            'dead_code_pct': round((defined - reachable) / defined * 100, 1) if defined else 0,
+            'defined_classes': len(class_total),
+            'unreachable_classes': len(dead_classes),
+            'top_unreachable_packages': [
+                {'package': package or '(default)', 'methods': count}
+                for package, count in dead_by_package.most_common(top) if count
+            ],
+            'sample_unreachable_classes': dead_classes[:top]
+        }
+
+    def memory_bytes(self):
+        """Bytes ocupados por los arrays CSR (sin contar la tabla de nombres)"""
+        arrays = [self.offsets, self.targets] + list(self._reverse or ())
+        return sum(a.itemsize * len(a) for a in arrays) + len(self.flags)
+
+    def to_bytes(self):
+        """Serializa el grafo: nombres en JSON y arrays CSR little-endian en base64"""
+        payload = {
+            'version': self.FORMAT_VERSION,
+            'names': self.names,
+            'flags': base64.b64encode(bytes(self.flags)).decode('ascii'),
+            'offsets': base64.b64encode(array_to_le_bytes(self.offsets)).decode('ascii'),
+            'targets': base64.b64encode(array_to_le_bytes(self.targets)).decode('ascii')
+        }
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def from_bytes(cls, data):
+        payload = json.loads(zlib.decompress(data).decode('utf-8'))
+        if payload.get('version') != cls.FORMAT_VERSION:
+            raise ValueError('Versión de grafo de llamadas no soportada')
+        arrays = []
+        for key in ('offsets', 'targets'):
+            raw = base64.b64decode(payload[key])
+            arrays.append(array_from(raw, 0, len(raw) // 4, U32))
+        return cls(payload['names'], bytearray(base64.b64decode(payload['flags'])), *arrays)
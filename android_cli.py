@@ -0,0 +1,319 @@
+"""
+Escaneo por lotes desde la línea de comandos
+Recorre directorios o listas de archivos (APK, DEX, JS, SMALI, manifest, gradle),
+ejecuta los analizadores de android_converter y escribe un resultado JSONL por archivo
+
+Uso:
+    python android_cli.py corpus/ -o resultados.jsonl --workers 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from android_cache import configure_cache
+from android_converter import (
+    ApkArchive,
+    decompile_apk,
+    analyze_manifest,
+    detect_permissions,
+    analyze_multidex,
+    analyze_reachability,
+    build_dex_xref_index,
+    detect_native_libs,
+    scan_apk_secrets,
+    detect_security_issues_android,
+    parse_dex_file,
+    analyze_dex_tables,
+    analyze_js_statistics,
+    analyze_dependencies,
+    parse_smali_file,
+    parse_manifest_file,
+    analyze_gradle_files
+)
+
+
+# Extensiones reconocidas por tipo de archivo
+JS_EXTENSIONS = ('.js', '.jsx', '.mjs', '.cjs', '.bundle')
+GRADLE_NAMES = ('build.gradle', 'build.gradle.kts', 'settings.gradle', 'settings.gradle.kts')
+
+
+def _open_file(path):
+    """Archivo abierto en binario; los analizadores usan file.name como nombre"""
+    return open(path, 'rb')
+
+
+def _apk_stages(archive):
+    # Todas las etapas comparten el ApkArchive abierto en scan_file
+    secrets = {}
+    
+    def scan_secrets():
+        secrets.update(scan_apk_secrets(archive))
+        return secrets
+    
+    return [
+        ('apk', lambda: decompile_apk(archive)),
+        ('manifest', lambda: analyze_manifest(archive)),
+        ('permissions', lambda: detect_permissions(archive)),
+        # Un solo proceso por APK: el paralelismo ya está entre archivos
+        ('multidex', lambda: analyze_multidex(archive, workers=1)),
+        ('reachability', lambda: analyze_reachability(archive)),
+        # El índice queda en la caché: las consultas posteriores no recorren el código
+        ('xrefs', lambda: build_dex_xref_index([archive]).stats()),
+        ('native_libs', lambda: detect_native_libs(archive, workers=1)),
+        ('secrets', scan_secrets),
+        ('security', lambda: detect_security_issues_android(archive, 'apk', secrets=secrets or None))
+    ]
+
+
+def _dex_stages(path):
+    def run(analyzer):
+        with _open_file(path) as f:
+            return analyzer(f)
+    return [
+        ('dex', lambda: run(parse_dex_file)),
+        ('dex_tables', lambda: run(analyze_dex_tables)),
+        ('xrefs', lambda: build_dex_xref_index([path]).stats())
+    ]
+
+
+def _js_stages(path):
+    def run(analyzer, *args):
+        with _open_file(path) as f:
+            return analyzer([f], *args)
+    return [
+        ('js_stats', lambda: run(analyze_js_statistics)),
+        ('dependencies', lambda: run(analyze_dependencies)),
+        ('security', lambda: run(detect_security_issues_android, 'javascript'))
+    ]
+
+
+def _single_file_stages(stage, analyzer):
+    def stages(path):
+        def run():
+            with _open_file(path) as f:
+                return analyzer(f)
+        return [(stage, run)]
+    return stages
+
+
+_STAGES_BY_KIND = {
+    'apk': _apk_stages,
+    'dex': _dex_stages,
+    'js': _js_stages,
+    'smali': _single_file_stages('smali', parse_smali_file),
+    'manifest': _single_file_stages('manifest', parse_manifest_file),
+    'gradle': _single_file_stages('gradle', analyze_gradle_files)
+}
+
+
+def classify_file(path):
+    """Tipo de análisis para un archivo (None si no se reconoce)"""
+    name = os.path.basename(path)
+    lower = name.lower()
+    if lower.endswith('.apk'):
+        return 'apk'
+    if lower.endswith('.dex'):
+        return 'dex'
+    if lower.endswith('.smali'):
+        return 'smali'
+    if lower.endswith(JS_EXTENSIONS):
+        return 'js'
+    if name == 'AndroidManifest.xml':
+        return 'manifest'
+    if lower in GRADLE_NAMES:
+        return 'gradle'
+    return None
+
+
+def iter_inputs(paths, kinds=None):
+    """Archivos reconocidos en las rutas dadas (los directorios se recorren recursivamente)"""
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = []
+            for root, dirs, files in os.walk(path):
+                # Orden estable y sin directorios ocultos ni node_modules
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != 'node_modules')
+                candidates.extend(os.path.join(root, name) for name in sorted(files))
+        else:
+            candidates = [path]
+
+        for candidate in candidates:
+            kind = classify_file(candidate)
+            if kind is None or (kinds and kind not in kinds):
+                continue
+            real = os.path.realpath(candidate)
+            if real in seen:
+                continue
+            seen.add(real)
+            yield candidate, kind
+
+
+def scan_file(path, kind):
+    """Ejecuta todas las etapas de un archivo y devuelve su registro JSONL"""
+    record = {
+        'path': path,
+        'kind': kind,
+        'size': 0,
+        'results': {},
+        'timings': {},
+        'errors': {}
+    }
+    try:
+        record['size'] = os.path.getsize(path)
+    except OSError as e:
+        record['errors']['stat'] = str(e)
+        return record
+
+    # Un APK se abre una sola vez: su directorio ZIP lo comparten todas las etapas
+    source = path
+    if kind == 'apk':
+        try:
+            source = ApkArchive(path)
+        except Exception as e:
+            record['errors']['open'] = str(e)
+            return record
+    
+    try:
+        for stage, run in _STAGES_BY_KIND[kind](source):
+            start = time.perf_counter()
+            try:
+                result = run()
+                record['results'][stage] = result
+                # Los analizadores informan sus fallos en la clave 'error' del resultado
+                # (o de una entrada, si devuelven una lista)
+                error = None
+                if isinstance(result, dict):
+                    error = result.get('error')
+                elif isinstance(result, list):
+                    error = next((item['error'] for item in result
+                                  if isinstance(item, dict) and item.get('error')), None)
+                if error:
+                    record['errors'][stage] = error
+            except Exception as e:
+                record['errors'][stage] = str(e)
+            record['timings'][stage] = round(time.perf_counter() - start, 6)
+        # La memoria se mide en esta ejecución, fuera de los resultados que guarda la caché
+        if source is not path:
+            record['memory'] = source.memory_stats()
+    finally:
+        if source is not path:
+            source.close()
+
+    if not record['errors']:
+        del record['errors']
+    return record
+
+
+def _scan_job(job):
+    return scan_file(*job)
+
+
+def _init_worker(cache_enabled):
+    configure_cache(enabled=cache_enabled)
+
+
+def scan(paths, output, workers=1, kinds=None, cache_enabled=True):
+    """Escanea las rutas y escribe un registro JSON por línea; devuelve las estadísticas"""
+    jobs = list(iter_inputs(paths, kinds))
+    stats = {
+        'files': 0,
+        'bytes': 0,
+        'errors': 0,
+        'kinds': Counter(),
+        'stage_seconds': defaultdict(float),
+        'stage_calls': Counter()
+    }
+
+    started = time.perf_counter()
+    if workers > 1 and len(jobs) > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(cache_enabled,)
+        )
+        # Bloques pequeños: los tamaños de archivo varían mucho entre APKs y JS
+        records = pool.map(_scan_job, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+    else:
+        pool = None
+        records = map(_scan_job, jobs)
+
+    try:
+        for record in records:
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            stats['files'] += 1
+            stats['bytes'] += record['size']
+            stats['kinds'][record['kind']] += 1
+            if record.get('errors'):
+                stats['errors'] += 1
+            for stage, seconds in record['timings'].items():
+                stats['stage_seconds'][stage] += seconds
+                stats['stage_calls'][stage] += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+
+def format_stats(stats):
+    """Resumen de rendimiento legible: archivos/s, MB/s y tiempo por etapa"""
+    elapsed = stats['elapsed'] or 1e-9
+    megabytes = stats['bytes'] / 1024 / 1024
+    lines = [
+        f"Archivos: {stats['files']} ({', '.join(f'{k}: {v}' for k, v in sorted(stats['kinds'].items()))})",
+        f"Datos: {megabytes:.2f} MB en {stats['elapsed']:.2f} s",
+        f"Rendimiento: {stats['files'] / elapsed:.1f} archivos/s, {megabytes / elapsed:.2f} MB/s",
+        f"Archivos con errores: {stats['errors']}",
+        "Tiempo por etapa:"
+    ]
+    for stage, seconds in sorted(stats['stage_seconds'].items(), key=lambda item: -item[1]):
+        calls = stats['stage_calls'][stage]
+        lines.append(f"  {stage:<14} {seconds:9.3f} s  ({calls} llamadas, {seconds / calls * 1000:.1f} ms/llamada)")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Escaneo por lotes de APKs, DEX, JavaScript, SMALI, manifests y gradle'
+    )
+    parser.add_argument('paths', nargs='*', help='Archivos o directorios a escanear')
+    parser.add_argument('-o', '--output', default='-', help='Archivo JSONL de salida (- = stdout)')
+    parser.add_argument('-f', '--files-from', help='Archivo con una ruta por línea (- = stdin)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Procesos en paralelo (0 = todos los núcleos)')
+    parser.add_argument('-k', '--kind', action='append', choices=sorted(_STAGES_BY_KIND),
+                        help='Limitar a estos tipos de archivo (se puede repetir)')
+    parser.add_argument('--no-cache', action='store_true', help='No usar la caché de análisis en disco')
+    parser.add_argument('-q', '--quiet', action='store_true', help='No imprimir estadísticas')
+    args = parser.parse_args(argv)
+
+    paths = list(args.paths)
+    if args.files_from:
+        source = sys.stdin if args.files_from == '-' else open(args.files_from, encoding='utf-8')
+        with source:
+            paths.extend(line.strip() for line in source if line.strip())
+    if not paths:
+        parser.error('indica al menos un archivo o directorio')
+
+    cache_enabled = not args.no_cache
+    configure_cache(enabled=cache_enabled)
+    workers = args.workers or os.cpu_count() or 1
+
+    if args.output == '-':
+        stats = scan(paths, sys.stdout, workers, args.kind, cache_enabled)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            stats = scan(paths, output, workers, args.kind, cache_enabled)
+
+    if not args.quiet:
+        print(format_stats(stats), file=sys.stderr)
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,59 +4,509 @@ Soporta JavaScript, DEX, SMALI y APK
 """
 
 import re
+import os
+import sys
+import copy
+import mmap
+import shutil
+import struct
+import tempfile
 import zipfile
-import io
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, ExitStack
 from datetime import datetime
 import json
+from bisect import bisect_right
+import xml.etree.ElementTree as ET
+from collections import Counter, OrderedDict
 
+from android_cache import cached, file_sha256, report_failure
+from android_callgraph import CallGraph, CallGraphBuilder
+from android_dalvik import class_fingerprints, diff_class_fingerprints
+from android_dex import DexFile, DexStringIndex
+from android_disasm import DexDisassembler, write_smali_zip
+from android_elf import summarize_elf
+from android_jslex import analyze_source, iter_code_lines
+from android_resources import ResourceTable, parse_xml_document, summarize_manifest
+from android_secrets import SecretScanner
+from android_smali import SmaliIndex
+from android_text import decode_bytes, read_text
+from android_xref import XrefIndex, XrefIndexBuilder
 
-def convert_js_to_txt(files, preserve_comments=True, add_line_numbers=False, 
-                      add_metadata=True, beautify_code=True):
-    """Convierte archivos JavaScript a texto plano"""
-    result = []
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Tamaño de bloque al volcar streams a disco
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+# Presupuesto (en caracteres) de fuentes JS tokenizados que se mantienen en memoria
+JS_UNIT_CACHE_CHARS = 64 * 1024 * 1024
+
+# Líneas por bloque al generar la conversión a texto y caracteres de la vista previa
+JS_TXT_BATCH_LINES = 4096
+JS_TXT_PREVIEW_CHARS = 200 * 1024
+
+# Límite de referencias a métodos (y campos) por archivo DEX
+DEX_REFERENCE_LIMIT = 65536
+
+# Permisos peligrosos conocidos
+DANGEROUS_PERMISSIONS = {
+    'READ_CONTACTS': 'dangerous',
+    'WRITE_CONTACTS': 'dangerous',
+    'READ_SMS': 'dangerous',
+    'SEND_SMS': 'dangerous',
+    'RECEIVE_SMS': 'dangerous',
+    'CAMERA': 'dangerous',
+    'RECORD_AUDIO': 'dangerous',
+    'ACCESS_FINE_LOCATION': 'dangerous',
+    'ACCESS_COARSE_LOCATION': 'dangerous',
+    'READ_EXTERNAL_STORAGE': 'dangerous',
+    'WRITE_EXTERNAL_STORAGE': 'dangerous',
+    'READ_PHONE_STATE': 'dangerous',
+    'CALL_PHONE': 'dangerous',
+    'READ_CALL_LOG': 'dangerous',
+    'WRITE_CALL_LOG': 'dangerous'
+}
+
+# Reglas de seguridad para JavaScript: nombre -> (patrón, severidad, descripción)
+JS_SECURITY_RULES = {
+    'eval': (r'\beval\s*\(', 'HIGH', 'Uso de eval() puede ejecutar código arbitrario'),
+    'innerHTML': (r'\.innerHTML\s*=', 'MEDIUM', 'innerHTML puede causar XSS'),
+    'dangerouslySetInnerHTML': (r'dangerouslySetInnerHTML', 'HIGH', 'Riesgo de XSS en React'),
+    'localStorage_password': (r'localStorage.*password', 'HIGH', 'No guardar passwords en localStorage'),
+    'http_urls': (r'http://(?!localhost)', 'MEDIUM', 'Uso de HTTP en lugar de HTTPS'),
+    'hardcoded_key': (r'api[_-]?key\s*[:=]\s*["\'].+["\']', 'HIGH', 'API key hardcoded'),
+    'console_log': (r'console\.log', 'LOW', 'console.log en producción puede exponer datos'),
+}
+
+
+def _peak_rss_mb():
+    """Memoria residente máxima del proceso en MB (None si no está disponible)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS reporta bytes
+    if sys.platform == 'darwin':
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+class LineIndex:
+    """Tabla de offsets de saltos de línea para convertir posiciones en (línea, columna)"""
+    
+    def __init__(self, content):
+        self._newlines = [m.start() for m in re.finditer('\n', content)]
+    
+    def position(self, offset):
+        """Línea y columna (ambas desde 1) de un offset del texto"""
+        line = bisect_right(self._newlines, offset - 1)
+        line_start = self._newlines[line - 1] + 1 if line else 0
+        return line + 1, offset - line_start + 1
+
+
+class PatternScanner:
+    """Aplica varias reglas regex en una sola pasada sobre el texto"""
+    
+    def __init__(self, rules, flags=0, first_chars=None):
+        self.names = list(rules)
+        self._patterns = [re.compile(rules[name], flags) for name in self.names]
+        # Cada regla va dentro de un lookahead: el motor prueba todas en cada posición
+        # sin consumir texto y el grupo nombrado indica qué regla coincidió
+        combined = '|'.join(
+            f'(?=(?P<_r{i}>{pattern}))' for i, pattern in enumerate(rules.values())
+        )
+        if first_chars:
+            # Prefiltro opcional: solo se prueban las reglas donde puede empezar alguna
+            combined = f'(?=[{re.escape(first_chars)}])(?:{combined})'
+        self._combined = re.compile(combined, flags)
+    
+    def scan(self, content):
+        """Genera (regla, inicio, fin) con los mismos resultados que re.finditer por regla"""
+        # Fin del último match aceptado de cada regla (los de una misma regla no se solapan)
+        next_start = [0] * len(self._patterns)
+        for match in self._combined.finditer(content):
+            pos = match.start()
+            first = int(match.lastgroup[2:])
+            for i in range(first, len(self._patterns)):
+                if pos < next_start[i]:
+                    continue
+                if i == first:
+                    end = match.end(match.lastgroup)
+                else:
+                    # Otra regla puede coincidir en la misma posición
+                    other = self._patterns[i].match(content, pos)
+                    if other is None:
+                        continue
+                    end = other.end()
+                next_start[i] = end if end > pos else pos + 1
+                yield self.names[i], pos, end
+
+
+_JS_SECURITY_SCANNER = PatternScanner(
+    {name: rule[0] for name, rule in JS_SECURITY_RULES.items()},
+    re.IGNORECASE,
+    first_chars='.acdehl'
+)
+
+# Resúmenes léxicos de archivos JS por hash de contenido (LRU)
+_JS_UNITS = OrderedDict()
+
+
+def _analyze_js_text(text):
+    """Resumen léxico y problemas de seguridad de un fuente JS ya decodificado"""
+    unit = analyze_source(text)
+    
+    # Reglas de seguridad en una pasada; se descartan las coincidencias dentro de comentarios
+    comment_starts = [start for start, _ in unit['comments']]
+    lines = LineIndex(text)
+    issues = []
+    for issue_type, start, _ in _JS_SECURITY_SCANNER.scan(text):
+        index = bisect_right(comment_starts, start) - 1
+        if index >= 0 and start < unit['comments'][index][1]:
+            continue
+        line_num, column = lines.position(start)
+        issues.append((issue_type, line_num, column))
+    unit['issues'] = issues
+    return unit
+
+
+def _analyze_js_worker(data):
+    """Ejecutado en un proceso del pool: el texto no se devuelve para no serializarlo de vuelta"""
+    return _analyze_js_text(decode_bytes(data))
+
+
+def _store_js_unit(key, unit):
+    _JS_UNITS[key] = unit
+    cached = sum(len(u['text']) for u in _JS_UNITS.values())
+    while cached > JS_UNIT_CACHE_CHARS and len(_JS_UNITS) > 1:
+        _, evicted = _JS_UNITS.popitem(last=False)
+        cached -= len(evicted['text'])
+
+
+def _js_unit(file):
+    """Lee, decodifica y tokeniza un archivo JS una sola vez; todos los análisis JS lo comparten"""
+    data = file.read()
+    file.seek(0)
+    key = hashlib.sha1(data).digest()
+    unit = _JS_UNITS.get(key)
+    if unit is not None:
+        _JS_UNITS.move_to_end(key)
+        return unit
+    
+    text = decode_bytes(data)
+    unit = _analyze_js_text(text)
+    unit['text'] = text
+    _store_js_unit(key, unit)
+    return unit
+
+
+def _js_units(files, workers=1):
+    """Unidades léxicas de varios archivos en el orden recibido; con workers > 1 (None = todos
+    los núcleos) los archivos no cacheados se reparten en bloques entre procesos"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(files) < 2:
+        return [_js_unit(file) for file in files]
+    
+    keys = []
+    pending = {}
+    for file in files:
+        data = file.read()
+        file.seek(0)
+        key = hashlib.sha1(data).digest()
+        keys.append(key)
+        if key not in _JS_UNITS:
+            pending[key] = data
+    
+    units = {key: _JS_UNITS[key] for key in keys if key in _JS_UNITS}
+    workers = min(workers, len(pending))
+    if workers > 1:
+        # Varios bloques por proceso para repartir bien archivos de tamaños muy distintos
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_analyze_js_worker, pending.values(), chunksize=chunksize)
+            for (key, data), unit in zip(pending.items(), results):
+                unit['text'] = decode_bytes(data)
+                units[key] = unit
+    else:
+        for key, data in pending.items():
+            text = decode_bytes(data)
+            units[key] = _analyze_js_text(text)
+            units[key]['text'] = text
+    
+    for key in pending:
+        _store_js_unit(key, units[key])
+    return [units[key] for key in keys]
+
+
+class BinaryInput:
+    """Entrada binaria con memoria acotada: ruta en disco, BytesIO o stream volcado a temporal"""
+    
+    def __init__(self, source):
+        self.name = getattr(source, 'name', 'archivo')
+        self._source = source
+        self._owned = None
+        self._mmap = None
+        self._view = None
+        self.path = None
+        
+        if isinstance(source, (str, os.PathLike)):
+            # Ruta en disco: se abre directamente, sin copias
+            self.path = os.fspath(source)
+            self.name = os.path.basename(self.path)
+            self._owned = open(source, 'rb')
+            self.fileobj = self._owned
+            self.size = os.fstat(self.fileobj.fileno()).st_size
+        elif hasattr(source, 'getbuffer'):
+            # BytesIO / UploadedFile de Streamlit: ya está en memoria, se usa tal cual
+            source.seek(0)
+            self.fileobj = source
+            self.size = source.getbuffer().nbytes
+        else:
+            # Cualquier otro stream se vuelca a un temporal por bloques
+            self._owned = tempfile.TemporaryFile()
+            shutil.copyfileobj(source, self._owned, SPOOL_CHUNK_SIZE)
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            self._owned.seek(0)
+            self.fileobj = self._owned
+            self.size = os.fstat(self.fileobj.fileno()).st_size
+    
+    def buffer(self):
+        """Vista de solo lectura del contenido completo (mmap o memoryview, sin copiar)"""
+        if self._view is None:
+            if self.fileobj is self._source and hasattr(self._source, 'getbuffer'):
+                self._view = self._source.getbuffer().toreadonly()
+            elif self.size == 0:
+                self._view = memoryview(b'')
+            else:
+                self._mmap = mmap.mmap(self.fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+        return self._view
+    
+    def close(self):
+        # Si quedan vistas derivadas vivas, se liberan con el recolector
+        try:
+            if self._view is not None:
+                self._view.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            pass
+        self._view = None
+        self._mmap = None
+        
+        if self._owned is not None:
+            self._owned.close()
+        elif hasattr(self._source, 'seek'):
+            self._source.seek(0)
+
+
+class ApkArchive:
+    """Contexto de un APK abierto una sola vez y compartido entre analizadores"""
+    
+    def __init__(self, apk_file):
+        self._input = BinaryInput(apk_file)
+        self.name = self._input.name
+        self.path = self._input.path
+        self.size = self._input.size
+        self._rss_start = _peak_rss_mb()
+        try:
+            self._zip = zipfile.ZipFile(self._input.fileobj)
+        except Exception:
+            # Un archivo que no es ZIP no debe dejar abiertos el mmap ni el temporal
+            self._input.close()
+            raise
+        self._memo = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        self._zip.close()
+        self._memo.clear()
+        self._input.close()
+    
+    def memo(self, key, factory):
+        """Calcula un resultado una sola vez por APK y lo reutiliza"""
+        if key not in self._memo:
+            self._memo[key] = factory()
+        return self._memo[key]
+    
+    def sha256(self):
+        """SHA-256 del APK completo, usado como clave de la caché de análisis"""
+        def digest():
+            if self.path is not None:
+                return file_sha256(self.path)
+            return hashlib.sha256(self._input.buffer()).hexdigest()
+        return self.memo('sha256', digest)
+    
+    def infolist(self):
+        """Directorio central del ZIP (lista de ZipInfo)"""
+        return self.memo('infolist', self._zip.infolist)
+    
+    def namelist(self):
+        return self.memo('namelist', lambda: [info.filename for info in self.infolist()])
+    
+    def getinfo(self, name):
+        return self._zip.getinfo(name)
+    
+    def has_entry(self, name):
+        return name in self.memo('nameset', lambda: set(self.namelist()))
+    
+    def read(self, name):
+        return self._zip.read(name)
+    
+    def open(self, name):
+        return self._zip.open(name)
+    
+    def entry_view(self, name):
+        """Contenido de una entrada; las entradas sin comprimir se devuelven como vista del mmap"""
+        info = self._zip.getinfo(name)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            return self.read(name)
+        
+        buf = self._input.buffer()
+        # Cabecera local: 30 bytes fijos + nombre + campo extra
+        name_len, extra_len = struct.unpack_from('<HH', buf, info.header_offset + 26)
+        start = info.header_offset + 30 + name_len + extra_len
+        return buf[start:start + info.file_size]
     
+    def memory_stats(self):
+        """Memoria pico (RSS) del proceso y crecimiento durante este análisis"""
+        peak = _peak_rss_mb()
+        if peak is None:
+            return {'peak_rss_mb': None, 'rss_growth_mb': None}
+        return {
+            'peak_rss_mb': round(peak, 1),
+            'rss_growth_mb': round(peak - self._rss_start, 1)
+        }
+    
+    def manifest_bytes(self):
+        """Bytes crudos de AndroidManifest.xml (None si no existe)"""
+        def load():
+            if self.has_entry('AndroidManifest.xml'):
+                return self.read('AndroidManifest.xml')
+            return None
+        return self.memo('manifest_bytes', load)
+
+
+@contextmanager
+def _apk_archive(apk_file):
+    """Reutiliza un ApkArchive existente o abre uno temporal para la llamada"""
+    if isinstance(apk_file, ApkArchive):
+        yield apk_file
+        return
+    
+    archive = ApkArchive(apk_file)
+    try:
+        yield archive
+    finally:
+        archive.close()
+
+
+def _iter_js_txt_lines(files, preserve_comments, add_line_numbers, add_metadata):
+    """Líneas del texto convertido, un archivo en memoria cada vez"""
     if add_metadata:
-        result.append("=" * 80)
-        result.append("CONVERSIÓN DE ARCHIVOS JAVASCRIPT/ANDROID")
-        result.append(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        result.append(f"Total de archivos: {len(files)}")
-        result.append("=" * 80)
-        result.append("\n")
+        yield "=" * 80
+        yield "CONVERSIÓN DE ARCHIVOS JAVASCRIPT/ANDROID"
+        yield f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        yield f"Total de archivos: {len(files)}"
+        yield "=" * 80
+        yield "\n"
     
     for idx, file in enumerate(files, 1):
-        try:
-            content = file.read().decode('utf-8')
-        except:
-            try:
-                content = file.read().decode('latin-1')
-            except:
-                content = "[Error: No se pudo decodificar el archivo]"
-        
-        result.append(f"\n{'=' * 80}")
-        result.append(f"ARCHIVO {idx}: {file.name}")
-        result.append(f"Tipo: {file.name.split('.')[-1].upper()}")
-        result.append(f"Líneas: {len(content.splitlines())}")
-        result.append(f"{'=' * 80}\n")
-        
-        lines = content.splitlines()
-        
-        for line_num, line in enumerate(lines, 1):
-            if not preserve_comments:
-                if line.strip().startswith('//') or line.strip().startswith('/*'):
-                    continue
-            
+        unit = _js_unit(file)
+        content = unit['text']
+        
+        yield f"\n{'=' * 80}"
+        yield f"ARCHIVO {idx}: {file.name}"
+        yield f"Tipo: {file.name.split('.')[-1].upper()}"
+        yield f"Líneas: {unit['total_lines']}"
+        yield f"{'=' * 80}\n"
+        
+        if preserve_comments:
+            lines = enumerate(content.splitlines(), 1)
+        else:
+            # Los comentarios salen del tokenizador: bloques /* */ multilínea incluidos
+            lines = iter_code_lines(content, unit)
+        
+        for line_num, line in lines:
             if add_line_numbers:
-                result.append(f"{line_num:4d} | {line}")
+                yield f"{line_num:4d} | {line}"
             else:
-                result.append(line)
+                yield line
         
-        result.append("\n")
-        file.seek(0)
+        yield "\n"
+
+
+def iter_js_to_txt(files, preserve_comments=True, add_line_numbers=False,
+                   add_metadata=True, beautify_code=True):
+    """Convierte archivos JavaScript a texto plano generando el resultado por bloques"""
+    batch = []
+    separator = ''
+    for line in _iter_js_txt_lines(files, preserve_comments, add_line_numbers, add_metadata):
+        batch.append(line)
+        if len(batch) >= JS_TXT_BATCH_LINES:
+            yield separator + "\n".join(batch)
+            separator = "\n"
+            batch = []
+    if batch:
+        yield separator + "\n".join(batch)
+
+
+def convert_js_to_txt(files, preserve_comments=True, add_line_numbers=False, 
+                      add_metadata=True, beautify_code=True):
+    """Convierte archivos JavaScript a texto plano"""
+    return "".join(iter_js_to_txt(files, preserve_comments, add_line_numbers,
+                                  add_metadata, beautify_code))
+
+
+def write_js_to_txt(files, output=None, preview_chars=JS_TXT_PREVIEW_CHARS, **options):
+    """Escribe la conversión a texto en un archivo (temporal si no se indica) sin mantenerla
+    entera en memoria; devuelve la ruta, el tamaño y una vista previa acotada"""
+    result = {
+        'path': None,
+        'bytes': 0,
+        'preview': '',
+        'truncated': False
+    }
+    
+    try:
+        if output is None:
+            fd, output = tempfile.mkstemp(prefix='android_code_', suffix='.txt')
+            os.close(fd)
+        result['path'] = output
+        
+        preview = []
+        written = 0
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            for chunk in iter_js_to_txt(files, **options):
+                f.write(chunk)
+                if written < preview_chars:
+                    preview.append(chunk[:preview_chars - written])
+                written += len(chunk)
+        
+        result['bytes'] = os.path.getsize(output)
+        result['preview'] = "".join(preview)
+        result['truncated'] = written > preview_chars
+    
+    except Exception as e:
+        result['error'] = str(e)
     
-    return "\n".join(result)
+    return result
 
 
-def analyze_js_statistics(files):
+@cached('analyze_js_statistics', version=2, ignore=('workers',))
+def analyze_js_statistics(files, workers=1):
     """Analiza estadísticas de código JavaScript"""
     stats = {
         'total_lines': 0,
@@ -75,137 +525,554 @@ def analyze_js_statistics(files):
         'jsx_used': False
     }
     
-    # Patrones regex para JavaScript
-    function_pattern = r'\bfunction\s+(\w+)\s*\('
-    arrow_function_pattern = r'\bconst\s+(\w+)\s*=\s*\([^)]*\)\s*=>'
-    class_pattern = r'\bclass\s+(\w+)'
-    react_component_pattern = r'\b(const|function)\s+([A-Z]\w+)\s*=?\s*\([^)]*\)\s*(?:=>)?\s*\{?'
-    import_pattern = r'\bimport\s+.*\s+from\s+["\'](.+)["\']'
-    export_pattern = r'\bexport\s+(default|const|function|class)'
-    
-    for file in files:
-        try:
-            content = file.read().decode('utf-8')
-        except:
-            content = file.read().decode('latin-1', errors='ignore')
-        
-        lines = content.splitlines()
-        stats['total_lines'] += len(lines)
+    for file, unit in zip(files, _js_units(files, workers)):
+        stats['total_lines'] += unit['total_lines']
+        stats['code_lines'] += unit['code_lines']
+        stats['comment_lines'] += unit['comment_lines']
+        stats['blank_lines'] += unit['blank_lines']
         
         # Detectar si usa JSX
-        if '.jsx' in file.name or '<' in content and '>' in content:
+        if '.jsx' in file.name or unit['jsx_used']:
             stats['jsx_used'] = True
         
-        for line in lines:
-            stripped = line.strip()
-            
-            if not stripped:
-                stats['blank_lines'] += 1
-            elif stripped.startswith('//') or stripped.startswith('/*'):
-                stats['comment_lines'] += 1
-            else:
-                stats['code_lines'] += 1
-        
-        # Detectar funciones
-        functions = re.findall(function_pattern, content)
-        arrow_functions = re.findall(arrow_function_pattern, content)
-        stats['function_list'].extend(functions + arrow_functions)
-        stats['functions'] += len(functions) + len(arrow_functions)
-        
-        # Detectar clases
-        classes = re.findall(class_pattern, content)
-        stats['class_list'].extend(classes)
-        stats['classes'] += len(classes)
-        
-        # Detectar componentes React
-        components = re.findall(react_component_pattern, content)
-        for comp in components:
-            comp_name = comp[1] if isinstance(comp, tuple) else comp
-            if comp_name[0].isupper():  # Componentes empiezan con mayúscula
-                stats['component_list'].append(comp_name)
-                stats['react_components'] += 1
-        
-        # Detectar imports
-        imports = re.findall(import_pattern, content)
-        stats['imports'] += len(imports)
-        
-        # Detectar exports
-        exports = re.findall(export_pattern, content)
-        stats['exports'] += len(exports)
+        stats['function_list'].extend(unit['functions'])
+        stats['functions'] += len(unit['functions'])
         
-        file.seek(0)
+        stats['class_list'].extend(unit['classes'])
+        stats['classes'] += len(unit['classes'])
+        
+        stats['component_list'].extend(unit['components'])
+        stats['react_components'] += len(unit['components'])
+        
+        stats['imports'] += unit['imports']
+        stats['exports'] += unit['exports']
     
-    # Eliminar duplicados
-    stats['function_list'] = list(set(stats['function_list']))
-    stats['class_list'] = list(set(stats['class_list']))
-    stats['component_list'] = list(set(stats['component_list']))
+    # Eliminar duplicados (conservando el orden de aparición)
+    stats['function_list'] = list(dict.fromkeys(stats['function_list']))
+    stats['class_list'] = list(dict.fromkeys(stats['class_list']))
+    stats['component_list'] = list(dict.fromkeys(stats['component_list']))
     
     return stats
 
 
+def _source_name(source):
+    """Nombre de archivo de una ruta o de un objeto subido"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(os.fspath(source))
+    return getattr(source, 'name', '')
+
+
+@contextmanager
+def _open_dex(dex_file):
+    """Abre un DEX (ruta, upload o bytes) como DexFile sobre un buffer sin copias"""
+    if isinstance(dex_file, (bytes, bytearray, memoryview)):
+        yield DexFile(dex_file)
+        return
+    
+    source = BinaryInput(dex_file)
+    try:
+        yield DexFile(source.buffer())
+    finally:
+        source.close()
+
+
+@cached('parse_dex_file')
 def parse_dex_file(dex_file):
     """Analiza un archivo DEX (Dalvik Executable)"""
     dex_info = {
-        'filename': dex_file.name,
+        'filename': _source_name(dex_file),
         'size': 0,
         'class_count': 0,
         'method_count': 0,
         'string_count': 0,
         'field_count': 0,
+        'type_count': 0,
+        'proto_count': 0,
         'classes': [],
         'magic': '',
         'version': ''
     }
     
     try:
-        content = dex_file.read()
-        dex_info['size'] = len(content)
+        with _open_dex(dex_file) as dex:
+            dex_info['size'] = dex.size
+            dex_info['magic'] = dex.magic
+            dex_info['version'] = dex.version
+            
+            # Tamaños de las tablas de IDs del header
+            dex_info['string_count'] = dex.string_ids_size
+            dex_info['type_count'] = dex.type_ids_size
+            dex_info['proto_count'] = dex.proto_ids_size
+            dex_info['field_count'] = dex.field_ids_size
+            dex_info['method_count'] = dex.method_ids_size
+            dex_info['class_count'] = dex.class_defs_size
+            
+            # Solo se decodifican los strings de los descriptores de clase
+            dex_info['classes'] = list(dex.class_names())
         
-        # Leer magic number (primeros 8 bytes)
-        magic = content[:8]
-        if magic.startswith(b'dex\n'):
-            dex_info['magic'] = magic.decode('ascii', errors='ignore')
-            dex_info['version'] = magic[4:7].decode('ascii', errors='ignore')
+    except Exception as e:
+        dex_info['error'] = str(e)
+    
+    return dex_info
+
+
+@cached('analyze_dex_tables')
+def analyze_dex_tables(dex_file, top=20):
+    """Estadísticas de métodos y campos a partir de las tablas de IDs del DEX"""
+    stats = {
+        'filename': _source_name(dex_file),
+        'method_count': 0,
+        'field_count': 0,
+        'defined_classes': 0,
+        'internal_method_refs': 0,
+        'external_method_refs': 0,
+        'internal_field_refs': 0,
+        'external_field_refs': 0,
+        'top_classes_by_methods': [],
+        'top_external_classes': [],
+        'top_method_names': []
+    }
+    
+    try:
+        with _open_dex(dex_file) as dex:
+            # Las tablas se decodifican en bloque como columnas de enteros
+            methods = dex.method_columns()
+            fields = dex.field_columns()
+            defined = set(dex.class_def_types())
+            
+            stats['method_count'] = len(methods.class_idx)
+            stats['field_count'] = len(fields.class_idx)
+            stats['defined_classes'] = len(defined)
+            
+            methods_per_class = Counter(methods.class_idx)
+            internal = Counter({idx: n for idx, n in methods_per_class.items() if idx in defined})
+            external = Counter({idx: n for idx, n in methods_per_class.items() if idx not in defined})
+            stats['internal_method_refs'] = sum(internal.values())
+            stats['external_method_refs'] = sum(external.values())
+            
+            internal_fields = sum(1 for idx in fields.class_idx if idx in defined)
+            stats['internal_field_refs'] = internal_fields
+            stats['external_field_refs'] = stats['field_count'] - internal_fields
+            
+            stats['top_classes_by_methods'] = [
+                {'class': dex.type_name(idx), 'methods': n} for idx, n in internal.most_common(top)
+            ]
+            stats['top_external_classes'] = [
+                {'class': dex.type_name(idx), 'methods': n} for idx, n in external.most_common(top)
+            ]
+            stats['top_method_names'] = [
+                {'name': dex.strings[idx], 'count': n}
+                for idx, n in Counter(methods.name_idx).most_common(top)
+            ]
         
-        # Parseo básico del header DEX
-        # Offset 0x38: string_ids_size (4 bytes)
-        if len(content) >= 0x3C:
-            dex_info['string_count'] = int.from_bytes(content[0x38:0x3C], 'little')
+    except Exception as e:
+        stats['error'] = str(e)
+    
+    return stats
+
+
+def _apk_dex_entries(archive):
+    """Entradas classes*.dex del APK en orden multidex (classes, classes2, ...)"""
+    def order(name):
+        digits = re.sub(r'\D', '', name)
+        return int(digits) if digits else 1
+    
+    names = [n for n in archive.namelist() if re.fullmatch(r'classes\d*\.dex', n)]
+    return sorted(names, key=order)
+
+
+@cached('build_dex_string_index', encode=DexStringIndex.to_bytes,
+        decode=DexStringIndex.from_bytes)
+def build_dex_string_index(sources):
+    """Índice de búsqueda sobre los pools de strings de todos los DEX (APKs o archivos .dex)"""
+    def build(stack):
+        dex_files = []
+        for source in sources:
+            name = _source_name(source)
+            if isinstance(source, ApkArchive) or name.lower().endswith('.apk'):
+                archive = stack.enter_context(_apk_archive(source))
+                for entry in _apk_dex_entries(archive):
+                    label = entry if len(sources) == 1 else f"{archive.name}:{entry}"
+                    dex_files.append((label, DexFile(archive.entry_view(entry))))
+            else:
+                dex_files.append((name, stack.enter_context(_open_dex(source))))
+        return DexStringIndex.build(dex_files)
+    
+    # Un ApkArchive solo construye su índice una vez
+    if len(sources) == 1 and isinstance(sources[0], ApkArchive):
+        return sources[0].memo('string_index', lambda: build(ExitStack()))
+    
+    with ExitStack() as stack:
+        return build(stack)
+
+
+@cached('build_dex_xref_index', encode=XrefIndex.to_bytes, decode=XrefIndex.from_bytes)
+def build_dex_xref_index(sources):
+    """Referencias cruzadas del código de todos los DEX (APKs o archivos .dex): métodos que usan
+    cada string, que llaman a cada método y que leen cada campo"""
+    def build(stack):
+        builder = XrefIndexBuilder()
+        for source in sources:
+            name = _source_name(source)
+            if isinstance(source, ApkArchive) or name.lower().endswith('.apk'):
+                archive = stack.enter_context(_apk_archive(source))
+                for entry in _apk_dex_entries(archive):
+                    label = entry if len(sources) == 1 else f"{archive.name}:{entry}"
+                    builder.add_dex(label, DexFile(archive.entry_view(entry)))
+            else:
+                builder.add_dex(name, stack.enter_context(_open_dex(source)))
+        return builder.build()
+    
+    # Un ApkArchive solo construye su índice una vez
+    if len(sources) == 1 and isinstance(sources[0], ApkArchive):
+        return sources[0].memo('xref_index', lambda: build(ExitStack()))
+    
+    with ExitStack() as stack:
+        return build(stack)
+
+
+def _dex_summary(name, source):
+    """Resumen de un DEX del APK; se ejecuta dentro de un proceso del pool o en serie"""
+    # source es la ruta del APK (se descomprime en el propio proceso) o el contenido del DEX
+    if isinstance(source, str):
+        with zipfile.ZipFile(source) as zf:
+            data = zf.read(name)
+    else:
+        data = source
+    
+    dex = DexFile(data)
+    defined_fields, defined_methods = dex.defined_member_counts()
+    return {
+        'dex': name,
+        'size': dex.size,
+        'class_count': dex.class_defs_size,
+        'method_refs': dex.method_ids_size,
+        'field_refs': dex.field_ids_size,
+        'string_count': dex.string_ids_size,
+        'defined_methods': defined_methods,
+        'defined_fields': defined_fields,
+        'method_limit_pct': round(dex.method_ids_size / DEX_REFERENCE_LIMIT * 100, 1),
+        'field_limit_pct': round(dex.field_ids_size / DEX_REFERENCE_LIMIT * 100, 1)
+    }
+
+
+@cached('analyze_multidex', ignore=('workers',))
+def analyze_multidex(apk_file, workers=None):
+    """Analiza todos los classes*.dex de un APK en paralelo y los compara con el límite de 64K"""
+    multidex_info = {
+        'filename': _source_name(apk_file),
+        'dex_count': 0,
+        'dex_files': [],
+        'total_classes': 0,
+        'total_method_refs': 0,
+        'total_field_refs': 0,
+        'total_defined_methods': 0,
+        'max_method_limit_pct': 0,
+        'near_limit': [],
+        'workers': 1
+    }
+    
+    try:
+        with _apk_archive(apk_file) as archive:
+            multidex_info['filename'] = archive.name
+            entries = _apk_dex_entries(archive)
+            multidex_info['dex_count'] = len(entries)
+            
+            if workers is None:
+                workers = os.cpu_count() or 1
+            workers = max(1, min(workers, len(entries)))
+            # Un APK subido (en memoria) se procesa en serie: enviar los DEX a los procesos
+            # exigiría tenerlos todos descomprimidos a la vez
+            if archive.path is None:
+                workers = 1
+            multidex_info['workers'] = workers
+            
+            if workers > 1:
+                # Cada proceso abre el APK y descomprime solo su DEX
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    summaries = list(pool.map(_dex_summary, entries, [archive.path] * len(entries)))
+            else:
+                # De uno en uno: solo hay un DEX descomprimido en memoria
+                summaries = [_dex_summary(name, archive.entry_view(name)) for name in entries]
         
-        # Offset 0x58: class_defs_size (4 bytes)
-        if len(content) >= 0x5C:
-            dex_info['class_count'] = int.from_bytes(content[0x58:0x5C], 'little')
+        multidex_info['dex_files'] = summaries
+        for summary in summaries:
+            multidex_info['total_classes'] += summary['class_count']
+            multidex_info['total_method_refs'] += summary['method_refs']
+            multidex_info['total_field_refs'] += summary['field_refs']
+            multidex_info['total_defined_methods'] += summary['defined_methods']
+            # Por encima del 90% cualquier dependencia nueva puede romper el build
+            if max(summary['method_limit_pct'], summary['field_limit_pct']) >= 90:
+                multidex_info['near_limit'].append(summary['dex'])
         
-        # Offset 0x48: method_ids_size (4 bytes)
-        if len(content) >= 0x4C:
-            dex_info['method_count'] = int.from_bytes(content[0x48:0x4C], 'little')
+        if summaries:
+            multidex_info['max_method_limit_pct'] = max(s['method_limit_pct'] for s in summaries)
         
-        # Offset 0x40: field_ids_size (4 bytes)
-        if len(content) >= 0x44:
-            dex_info['field_count'] = int.from_bytes(content[0x40:0x44], 'little')
+    except Exception as e:
+        multidex_info['error'] = str(e)
+    
+    return multidex_info
+
+
+@cached('build_call_graph', encode=CallGraph.to_bytes, decode=CallGraph.from_bytes)
+def build_call_graph(sources):
+    """Grafo de llamadas (invoke-*) de APKs, archivos .dex o archivos .smali"""
+    def build(stack):
+        builder = CallGraphBuilder()
+        for source in sources:
+            name = _source_name(source).lower()
+            if isinstance(source, ApkArchive) or name.endswith('.apk'):
+                archive = stack.enter_context(_apk_archive(source))
+                for entry in _apk_dex_entries(archive):
+                    builder.add_dex(DexFile(archive.entry_view(entry)))
+            elif name.endswith('.smali'):
+                if hasattr(source, 'read'):
+                    data = source.read()
+                    source.seek(0)
+                else:
+                    with open(source, 'rb') as f:
+                        data = f.read()
+                builder.add_smali(data)
+            else:
+                builder.add_dex(stack.enter_context(_open_dex(source)))
+        return builder.build()
+    
+    # Un ApkArchive solo construye su grafo una vez
+    if len(sources) == 1 and isinstance(sources[0], ApkArchive):
+        return sources[0].memo('call_graph', lambda: build(ExitStack()))
+    
+    with ExitStack() as stack:
+        return build(stack)
+
+
+@cached('analyze_reachability', version=3)
+def analyze_reachability(apk_file, top=20):
+    """Alcanzabilidad desde los componentes del manifest y estimación de código muerto"""
+    result = {
+        'filename': _source_name(apk_file),
+        'entry_points': [],
+        'nodes': 0,
+        'edges': 0
+    }
+    
+    try:
+        with _apk_archive(apk_file) as archive:
+            result['filename'] = archive.name
+            start = time.perf_counter()
+            graph = build_call_graph([archive])
+            result['graph_seconds'] = round(time.perf_counter() - start, 3)
+            
+            # El framework llama a los componentes declarados y a la clase Application
+            manifest = analyze_manifest(archive)
+            entry_points = [manifest.get('application_class', '')]
+            for key in ('activities', 'services', 'receivers', 'providers'):
+                entry_points.extend(manifest[key])
+            result['entry_points'] = [name for name in entry_points if name]
+            
+            start = time.perf_counter()
+            result.update(graph.dead_code(result['entry_points'], top))
+            result['reachability_seconds'] = round(time.perf_counter() - start, 3)
+            result['nodes'] = graph.node_count
+            result['edges'] = graph.edge_count
+            result['graph_mb'] = round(graph.memory_bytes() / 1024 / 1024, 1)
+    
+    except Exception as e:
+        result['error'] = str(e)
+    
+    return result
+
+
+@cached('disassemble_dex_class', version=2)
+def disassemble_dex_class(dex_file, class_name, method=None):
+    """SMALI de una clase del DEX (o de uno solo de sus métodos), desensamblado al pedirlo"""
+    result = {
+        'filename': _source_name(dex_file),
+        'class': class_name,
+        'methods': [],
+        'smali': ''
+    }
+    
+    try:
+        with _open_dex(dex_file) as dex:
+            disassembler = DexDisassembler(dex)
+            result['methods'] = disassembler.methods(class_name)
+            if method:
+                result['smali'] = disassembler.disassemble_method(class_name, method)
+            else:
+                result['smali'] = disassembler.disassemble_class(class_name)
+    
+    except Exception as e:
+        result['error'] = str(e)
+    
+    return result
+
+
+def write_dex_smali_zip(sources, output=None):
+    """Desensambla todas las clases de APKs o DEX a un ZIP (smali/, smali_classes2/, ...) escrito
+    clase a clase en un archivo (temporal si no se indica); devuelve la ruta y el tamaño"""
+    result = {
+        'path': None,
+        'bytes': 0,
+        'classes': 0,
+        'errors': []
+    }
+    
+    try:
+        if output is None:
+            fd, output = tempfile.mkstemp(prefix='android_smali_', suffix='.zip')
+            os.close(fd)
+        result['path'] = output
         
-        dex_file.seek(0)
+        with ExitStack() as stack:
+            dex_files = []
+            for source in sources:
+                name = _source_name(source)
+                if isinstance(source, ApkArchive) or name.lower().endswith('.apk'):
+                    archive = stack.enter_context(_apk_archive(source))
+                    for entry in _apk_dex_entries(archive):
+                        dex_files.append((entry, DexFile(archive.entry_view(entry))))
+                else:
+                    dex_files.append((name, stack.enter_context(_open_dex(source))))
+            result.update(write_smali_zip(dex_files, output))
         
+        result['bytes'] = os.path.getsize(output)
+    
     except Exception as e:
-        dex_info['error'] = str(e)
+        result['error'] = str(e)
     
-    return dex_info
+    return result
 
 
+@cached('parse_smali_file', version=2)
 def parse_smali_file(smali_file):
     """Lee y parsea un archivo SMALI"""
     try:
-        content = smali_file.read().decode('utf-8')
-        smali_file.seek(0)
-        return content
+        return read_text(smali_file)
     except Exception as e:
         return f"Error leyendo archivo SMALI: {str(e)}"
 
 
+@cached('build_smali_index', encode=SmaliIndex.to_bytes, decode=SmaliIndex.from_bytes)
+def build_smali_index(smali_files):
+    """Índice de símbolos (clases, métodos y campos) de varios archivos SMALI"""
+    index = SmaliIndex()
+    for smali_file in smali_files:
+        data = smali_file.read()
+        smali_file.seek(0)
+        index.add_source(smali_file.name, data)
+    return index
+
+
+def _size_bucket(buckets, key, info):
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = {'files': 0, 'compressed': 0, 'uncompressed': 0}
+    bucket['files'] += 1
+    bucket['compressed'] += info.compress_size
+    bucket['uncompressed'] += info.file_size
+
+
+def _sorted_buckets(buckets, label):
+    """Lista de grupos ordenada por bytes comprimidos (lo que ocupan en el APK)"""
+    rows = []
+    for key, bucket in buckets.items():
+        row = {label: key}
+        row.update(bucket)
+        row['ratio'] = round(bucket['compressed'] / bucket['uncompressed'], 3) if bucket['uncompressed'] else 1.0
+        rows.append(row)
+    rows.sort(key=lambda row: (-row['compressed'], row[label]))
+    return rows
+
+
+def zip_size_breakdown(infos, top=20):
+    """Tamaño comprimido y sin comprimir por directorio, extensión y ABI, las entradas más
+    grandes y los grupos de contenido duplicado (mismo CRC32 y tamaño), solo con ZipInfo"""
+    by_directory = {}
+    by_extension = {}
+    by_abi = {}
+    by_method = {}
+    by_content = {}
+    files = []
+    
+    for info in infos:
+        if info.is_dir():
+            continue
+        name = info.filename
+        files.append(info)
+        
+        slash = name.find('/')
+        _size_bucket(by_directory, name[:slash] + '/' if slash > 0 else '(raíz)', info)
+        
+        base = name.rsplit('/', 1)[-1]
+        dot = base.rfind('.')
+        _size_bucket(by_extension, base[dot:].lower() if dot > 0 else '(sin extensión)', info)
+        
+        parts = name.split('/')
+        if len(parts) >= 3 and parts[0] == 'lib':
+            _size_bucket(by_abi, parts[1], info)
+        
+        _size_bucket(by_method, 'stored' if info.compress_type == zipfile.ZIP_STORED else 'deflated', info)
+        
+        if info.file_size:
+            by_content.setdefault((info.CRC, info.file_size), []).append(info)
+    
+    duplicates = []
+    for (crc, size), group in by_content.items():
+        if len(group) < 2:
+            continue
+        compressed = sorted(info.compress_size for info in group)
+        duplicates.append({
+            'crc': f'{crc:08x}',
+            'size': size,
+            'count': len(group),
+            # Todas las copias menos la más pequeña sobran
+            'wasted_bytes': sum(compressed[1:]),
+            'files': sorted(info.filename for info in group)[:top]
+        })
+    duplicates.sort(key=lambda group: (-group['wasted_bytes'], group['files'][0]))
+    
+    compressed_total = sum(info.compress_size for info in files)
+    uncompressed_total = sum(info.file_size for info in files)
+    largest = sorted(files, key=lambda info: (-info.compress_size, info.filename))[:top]
+    return {
+        'entries': len(files),
+        'compressed_bytes': compressed_total,
+        'uncompressed_bytes': uncompressed_total,
+        'ratio': round(compressed_total / uncompressed_total, 3) if uncompressed_total else 1.0,
+        'by_directory': _sorted_buckets(by_directory, 'directory'),
+        'by_extension': _sorted_buckets(by_extension, 'extension'),
+        'by_abi': _sorted_buckets(by_abi, 'abi'),
+        'by_compression': _sorted_buckets(by_method, 'method'),
+        'largest_files': [
+            {'name': info.filename, 'compressed': info.compress_size, 'uncompressed': info.file_size}
+            for info in largest
+        ],
+        'duplicate_groups': len(duplicates),
+        'duplicate_wasted_bytes': sum(group['wasted_bytes'] for group in duplicates),
+        'duplicates': duplicates[:top]
+    }
+
+
+@cached('analyze_apk_size')
+def analyze_apk_size(apk_file, top=20):
+    """Desglose de tamaño de un APK a partir del directorio central ZIP (sin descomprimir)"""
+    try:
+        with _apk_archive(apk_file) as archive:
+            breakdown = zip_size_breakdown(archive.infolist(), top)
+            breakdown['filename'] = archive.name
+            breakdown['size'] = archive.size
+            # Cabeceras locales, directorio central y firma (v2/v3) del APK
+            breakdown['zip_overhead_bytes'] = archive.size - breakdown['compressed_bytes']
+            return breakdown
+    except Exception as e:
+        return {'filename': _source_name(apk_file), 'error': str(e)}
+
+
+@cached('decompile_apk', version=3)
 def decompile_apk(apk_file, extract_all=False):
     """Descompila y analiza un archivo APK"""
     apk_info = {
-        'filename': apk_file.name,
+        'filename': getattr(apk_file, 'name', ''),
         'size': 0,
         'files': [],
         'dex_files': [],
@@ -213,17 +1080,17 @@ def decompile_apk(apk_file, extract_all=False):
         'native_libs': [],
         'resource_count': 0,
         'has_manifest': False,
-        'structure': {}
+        'structure': {},
+        'size_breakdown': {}
     }
     
     try:
-        content = apk_file.read()
-        apk_info['size'] = len(content)
-        
         # Un APK es básicamente un archivo ZIP
-        with zipfile.ZipFile(io.BytesIO(content)) as zf:
-            file_list = zf.namelist()
-            apk_info['files'] = file_list
+        with _apk_archive(apk_file) as archive:
+            apk_info['filename'] = archive.name
+            apk_info['size'] = archive.size
+            file_list = archive.namelist()
+            apk_info['files'] = list(file_list)
             apk_info['resource_count'] = len(file_list)
             
             # Detectar archivos DEX
@@ -236,7 +1103,7 @@ def decompile_apk(apk_file, extract_all=False):
             apk_info['native_libs'] = native_libs
             
             # Verificar AndroidManifest.xml
-            if 'AndroidManifest.xml' in file_list:
+            if archive.has_entry('AndroidManifest.xml'):
                 apk_info['has_manifest'] = True
             
             # Estructura de directorios
@@ -248,8 +1115,7 @@ def decompile_apk(apk_file, extract_all=False):
                     dirs[dir_name] = dirs.get(dir_name, 0) + 1
             
             apk_info['structure'] = dirs
-        
-        apk_file.seek(0)
+            apk_info['size_breakdown'] = analyze_apk_size.uncached(archive)
         
     except Exception as e:
         apk_info['error'] = str(e)
@@ -257,9 +1123,18 @@ def decompile_apk(apk_file, extract_all=False):
     return apk_info
 
 
-def analyze_manifest(apk_file):
-    """Analiza el AndroidManifest.xml de un APK"""
-    manifest_info = {
+def _parse_manifest_bytes(data):
+    """Parsea un manifest (AXML o texto) y devuelve su resumen más el XML legible"""
+    root = parse_xml_document(data)
+    summary = summarize_manifest(root)
+    if hasattr(ET, 'indent'):
+        ET.indent(root)
+    summary['raw_xml'] = ET.tostring(root, encoding='unicode')
+    return summary
+
+
+def _empty_manifest_info():
+    return {
         'package': '',
         'version_name': '',
         'version_code': '',
@@ -271,33 +1146,51 @@ def analyze_manifest(apk_file):
         'receivers': [],
         'providers': [],
         'app_name': '',
+        'application_class': '',
         'raw_xml': ''
     }
+
+
+@cached('analyze_manifest', version=4)
+def analyze_manifest(apk_file):
+    """Analiza el AndroidManifest.xml de un APK"""
+    manifest_info = _empty_manifest_info()
     
     try:
-        content = apk_file.read()
-        
-        with zipfile.ZipFile(io.BytesIO(content)) as zf:
-            if 'AndroidManifest.xml' in zf.namelist():
-                manifest_bytes = zf.read('AndroidManifest.xml')
-                
-                # El manifest está en formato binario XML (AXML)
-                # Aquí haríamos un parsing básico
-                # Para producción, usar librerías como androguard o axmlprinter
-                
-                # Parseo muy básico buscando strings
-                manifest_str = manifest_bytes.decode('latin-1', errors='ignore')
-                manifest_info['raw_xml'] = manifest_str
-                
-                # Buscar patrones comunes
-                package_match = re.search(r'package="([^"]+)"', manifest_str)
-                if package_match:
-                    manifest_info['package'] = package_match.group(1)
-                
-                # Nota: Para un parsing completo del AXML se necesitaría androguard
-                manifest_info['note'] = 'El manifest está en formato binario. Se requiere androguard para parsing completo.'
+        with _apk_archive(apk_file) as archive:
+            def parse():
+                manifest_bytes = archive.manifest_bytes()
+                if manifest_bytes is None:
+                    return None
+                # El manifest compilado está en XML binario (AXML)
+                return _parse_manifest_bytes(manifest_bytes)
+            
+            parsed = archive.memo('manifest', parse)
+            if parsed is not None:
+                manifest_info.update(copy.deepcopy(parsed))
+            
+            # Resolver referencias @0x7f... del nombre de la app contra resources.arsc
+            if manifest_info['app_name'].startswith('@0x'):
+                table = _resource_table(archive)
+                if table is not None:
+                    resolved = table.resolve(int(manifest_info['app_name'][1:], 16))
+                    if resolved:
+                        manifest_info['app_name'] = resolved
         
-        apk_file.seek(0)
+    except Exception as e:
+        manifest_info['error'] = str(e)
+    
+    return manifest_info
+
+
+@cached('parse_manifest_file', version=3)
+def parse_manifest_file(manifest_file):
+    """Analiza un AndroidManifest.xml suelto, en formato binario (AXML) o texto"""
+    manifest_info = _empty_manifest_info()
+    
+    try:
+        manifest_info.update(_parse_manifest_bytes(manifest_file.read()))
+        manifest_file.seek(0)
         
     except Exception as e:
         manifest_info['error'] = str(e)
@@ -305,15 +1198,14 @@ def analyze_manifest(apk_file):
     return manifest_info
 
 
+@cached('extract_resources')
 def extract_resources(apk_file):
     """Extrae lista de recursos del APK"""
     resources = []
     
     try:
-        content = apk_file.read()
-        
-        with zipfile.ZipFile(io.BytesIO(content)) as zf:
-            file_list = zf.namelist()
+        with _apk_archive(apk_file) as archive:
+            file_list = archive.namelist()
             
             # Filtrar recursos comunes
             resource_dirs = ['res/', 'assets/', 'resources/']
@@ -324,51 +1216,43 @@ def extract_resources(apk_file):
                         resources.append(file)
                         break
         
-        apk_file.seek(0)
-        
     except Exception as e:
         resources = [f"Error: {str(e)}"]
     
     return resources
 
 
+def classify_permissions(names):
+    """Asigna nivel (dangerous/normal) a una lista de permisos"""
+    permissions = []
+    for name in names:
+        short_name = name.rsplit('.', 1)[-1]
+        level = 'normal'
+        if name.startswith('android.permission.'):
+            level = DANGEROUS_PERMISSIONS.get(short_name, 'normal')
+        permissions.append({
+            'name': name,
+            'level': level
+        })
+    return permissions
+
+
+@cached('detect_permissions', version=2)
 def detect_permissions(apk_file):
     """Detecta permisos del APK"""
     permissions = []
     
-    # Permisos peligrosos conocidos
-    dangerous_permissions = {
-        'READ_CONTACTS': 'dangerous',
-        'WRITE_CONTACTS': 'dangerous',
-        'READ_SMS': 'dangerous',
-        'SEND_SMS': 'dangerous',
-        'RECEIVE_SMS': 'dangerous',
-        'CAMERA': 'dangerous',
-        'RECORD_AUDIO': 'dangerous',
-        'ACCESS_FINE_LOCATION': 'dangerous',
-        'ACCESS_COARSE_LOCATION': 'dangerous',
-        'READ_EXTERNAL_STORAGE': 'dangerous',
-        'WRITE_EXTERNAL_STORAGE': 'dangerous',
-        'READ_PHONE_STATE': 'dangerous',
-        'CALL_PHONE': 'dangerous',
-        'READ_CALL_LOG': 'dangerous',
-        'WRITE_CALL_LOG': 'dangerous'
-    }
-    
     try:
-        manifest_info = analyze_manifest(apk_file)
-        raw_xml = manifest_info.get('raw_xml', '')
-        
-        # Buscar permisos en el manifest
-        perm_pattern = r'android\.permission\.(\w+)'
-        found_perms = re.findall(perm_pattern, raw_xml)
-        
-        for perm in set(found_perms):
-            level = dangerous_permissions.get(perm, 'normal')
-            permissions.append({
-                'name': f'android.permission.{perm}',
-                'level': level
-            })
+        with _apk_archive(apk_file) as archive:
+            def parse():
+                manifest_info = analyze_manifest(archive)
+                # Un manifest ilegible no equivale a "sin permisos"
+                if 'error' in manifest_info:
+                    raise ValueError(manifest_info['error'])
+                return classify_permissions(manifest_info['permissions'])
+            
+            parsed = archive.memo('permissions', parse)
+            permissions = [dict(p) for p in parsed]
         
     except Exception as e:
         permissions = [{'error': str(e)}]
@@ -376,93 +1260,118 @@ def detect_permissions(apk_file):
     return permissions
 
 
-def analyze_dependencies(files):
+def _permissions_error(permissions):
+    """Mensaje de error de un resultado de detect_permissions (None si no falló)"""
+    for permission in permissions:
+        if 'error' in permission:
+            return permission['error']
+    return None
+
+
+@cached('analyze_dependencies', version=2, ignore=('workers',), data_keys=True)
+def analyze_dependencies(files, workers=1):
     """Analiza dependencias en archivos JavaScript"""
     dependencies = {}
     
-    import_pattern = r'import\s+.*\s+from\s+["\'](.+)["\']'
-    require_pattern = r'require\(["\'](.+)["\']\)'
-    
-    for file in files:
-        try:
-            content = file.read().decode('utf-8')
-        except:
-            content = file.read().decode('latin-1', errors='ignore')
-        
-        imports = []
-        
-        # Buscar imports ES6
-        es6_imports = re.findall(import_pattern, content)
-        imports.extend(es6_imports)
-        
-        # Buscar requires CommonJS
-        commonjs_imports = re.findall(require_pattern, content)
-        imports.extend(commonjs_imports)
-        
-        dependencies[file.name] = list(set(imports))
-        file.seek(0)
+    # imports ES6, export ... from, require() e import() dinámico
+    for file, unit in zip(files, _js_units(files, workers)):
+        dependencies[file.name] = list(dict.fromkeys(unit['dependencies']))
     
     return dependencies
 
 
-def detect_security_issues_android(files, file_type='javascript'):
-    """Detecta problemas de seguridad en código Android"""
-    issues = []
+@cached('scan_apk_secrets', version=2)
+def scan_apk_secrets(apk_file, entropy=True, max_findings=1000):
+    """Busca secretos en todas las entradas del APK leyéndolas por bloques (memoria constante)"""
+    result = {
+        'filename': None,
+        'findings': [],
+        'by_type': {},
+        'by_severity': {}
+    }
     
-    if file_type == 'javascript':
-        security_patterns = {
-            'eval': (r'\beval\s*\(', 'HIGH', 'Uso de eval() puede ejecutar código arbitrario'),
-            'innerHTML': (r'\.innerHTML\s*=', 'MEDIUM', 'innerHTML puede causar XSS'),
-            'dangerouslySetInnerHTML': (r'dangerouslySetInnerHTML', 'HIGH', 'Riesgo de XSS en React'),
-            'localStorage_password': (r'localStorage.*password', 'HIGH', 'No guardar passwords en localStorage'),
-            'http_urls': (r'http://(?!localhost)', 'MEDIUM', 'Uso de HTTP en lugar de HTTPS'),
-            'hardcoded_key': (r'api[_-]?key\s*[:=]\s*["\'].+["\']', 'HIGH', 'API key hardcoded'),
-            'console_log': (r'console\.log', 'LOW', 'console.log en producción puede exponer datos'),
-        }
-        
-        for file in files:
-            try:
-                content = file.read().decode('utf-8')
-            except:
-                content = file.read().decode('latin-1', errors='ignore')
+    try:
+        with _apk_archive(apk_file) as archive:
+            result['filename'] = archive.name
+            scanner = SecretScanner(chunk_size=SPOOL_CHUNK_SIZE, max_findings=max_findings,
+                                    entropy=entropy)
             
-            for issue_type, (pattern, severity, description) in security_patterns.items():
-                matches = re.finditer(pattern, content, re.IGNORECASE)
-                for match in matches:
-                    line_num = content[:match.start()].count('\n') + 1
-                    issues.append({
-                        'file': file.name,
-                        'line': line_num,
-                        'type': issue_type,
-                        'severity': severity,
-                        'description': description
-                    })
+            # Assets, recursos, DEX (incluye su pool de strings), JS/JSON empaquetados, .so...
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info.filename) as stream:
+                    scanner.scan_stream(stream, info.filename)
             
-            file.seek(0)
+            findings = sorted(scanner.findings, key=lambda f: (f['file'], f['offset']))
+            result['findings'] = findings
+            result['by_type'] = dict(Counter(f['type'] for f in findings).most_common())
+            result['by_severity'] = dict(Counter(f['severity'] for f in findings).most_common())
+            result.update(scanner.stats())
+    
+    except Exception as e:
+        result['error'] = str(e)
+    
+    return result
+
+
+@cached('detect_security_issues_android', version=4, ignore=('workers', 'secrets'))
+def detect_security_issues_android(files, file_type='javascript', workers=1, secrets=None):
+    """Detecta problemas de seguridad en código Android; `secrets` reutiliza un resultado de
+    scan_apk_secrets del mismo APK en lugar de volver a escanearlo"""
+    issues = []
+    
+    if file_type == 'javascript':
+        for file, unit in zip(files, _js_units(files, workers)):
+            for issue_type, line_num, column in unit['issues']:
+                _, severity, description = JS_SECURITY_RULES[issue_type]
+                issues.append({
+                    'file': file.name,
+                    'line': line_num,
+                    'column': column,
+                    'type': issue_type,
+                    'severity': severity,
+                    'description': description
+                })
     
     elif file_type == 'apk':
         # Analizar APK
         try:
-            manifest = analyze_manifest(files)
-            permissions = detect_permissions(files)
-            
-            # Verificar permisos peligrosos
-            dangerous_perms = [p for p in permissions if p.get('level') == 'dangerous']
-            if len(dangerous_perms) > 5:
-                issues.append({
-                    'type': 'excessive_permissions',
-                    'severity': 'MEDIUM',
-                    'description': f'La app solicita {len(dangerous_perms)} permisos peligrosos'
-                })
-            
-            # Verificar uso de HTTP
-            apk_info = decompile_apk(files)
-            if any('http://' in f for f in apk_info.get('files', [])):
-                issues.append({
-                    'type': 'http_usage',
-                    'severity': 'MEDIUM',
-                    'description': 'La app puede usar conexiones HTTP no seguras'
-                })
+            with _apk_archive(files) as archive:
+                permissions = detect_permissions(archive)
+                if _permissions_error(permissions):
+                    raise ValueError(_permissions_error(permissions))
+                
+                # Verificar permisos peligrosos
+                dangerous_perms = [p for p in permissions if p.get('level') == 'dangerous']
+                if len(dangerous_perms) > 5:
+                    issues.append({
+                        'type': 'excessive_permissions',
+                        'severity': 'MEDIUM',
+                        'description': f'La app solicita {len(dangerous_perms)} permisos peligrosos'
+                    })
+                
+                # Verificar uso de HTTP
+                if any('http://' in f for f in archive.namelist()):
+                    issues.append({
+                        'type': 'http_usage',
+                        'severity': 'MEDIUM',
+                        'description': 'La app puede usar conexiones HTTP no seguras'
+                    })
+                
+                # Secretos embebidos en cualquier entrada del APK
+                if secrets is None:
+                    secrets = scan_apk_secrets(archive)
+                if 'error' in secrets:
+                    raise ValueError(secrets['error'])
+                for finding in secrets['findings']:
+                    issues.append({
+                        'file': finding['file'],
+                        'offset': finding['offset'],
+                        'type': finding['type'],
+                        'severity': finding['severity'],
+                        'description': f"{finding['description']}: {finding['preview']}"
+                    })
             
         except Exception as e:
             issues.append({
@@ -474,69 +1383,174 @@ def detect_security_issues_android(files, file_type='javascript'):
     return issues
 
 
+@cached('generate_apk_report', version=4)
 def generate_apk_report(apk_file, detailed=False):
     """Genera un reporte completo del APK"""
     report = "REPORTE DE ANÁLISIS APK\n"
     report += "=" * 80 + "\n\n"
     
-    # Información básica
-    apk_info = decompile_apk(apk_file, extract_all=detailed)
-    report += f"Archivo: {apk_info['filename']}\n"
-    report += f"Tamaño: {apk_info['size'] / 1024 / 1024:.2f} MB\n"
-    report += f"Archivos DEX: {apk_info['dex_count']}\n"
-    report += f"Total de archivos: {apk_info['resource_count']}\n\n"
-    
-    # Permisos
-    permissions = detect_permissions(apk_file)
-    report += "PERMISOS:\n"
-    report += "-" * 40 + "\n"
-    for perm in permissions:
-        report += f"- {perm.get('name')} [{perm.get('level')}]\n"
-    report += "\n"
-    
-    # Problemas de seguridad
-    issues = detect_security_issues_android(apk_file, 'apk')
-    if issues:
-        report += "PROBLEMAS DE SEGURIDAD:\n"
+    # Un único ApkArchive: el APK se lee y descomprime una sola vez
+    with _apk_archive(apk_file) as archive:
+        # Información básica
+        apk_info = decompile_apk(archive, extract_all=detailed)
+        report += f"Archivo: {apk_info['filename']}\n"
+        report += f"Tamaño: {apk_info['size'] / 1024 / 1024:.2f} MB\n"
+        report += f"Archivos DEX: {apk_info['dex_count']}\n"
+        report += f"Total de archivos: {apk_info['resource_count']}\n\n"
+        
+        # Permisos
+        permissions = detect_permissions(archive)
+        report += "PERMISOS:\n"
         report += "-" * 40 + "\n"
-        for issue in issues:
-            report += f"[{issue['severity']}] {issue['description']}\n"
+        error = _permissions_error(permissions)
+        if error:
+            report += f"Error: {error}\n"
+        for perm in permissions:
+            if 'name' in perm:
+                report += f"- {perm['name']} [{perm['level']}]\n"
+        report += "\n"
+        
+        # Problemas de seguridad
+        issues = detect_security_issues_android(archive, 'apk')
+        if issues:
+            report += "PROBLEMAS DE SEGURIDAD:\n"
+            report += "-" * 40 + "\n"
+            for issue in issues:
+                report += f"[{issue['severity']}] {issue['description']}\n"
+            report += "\n"
     
     return report.encode('utf-8')
 
 
-def compare_apk_versions(apk1, apk2):
-    """Compara dos versiones de APK"""
+def diff_zip_entries(infos1, infos2):
+    """Compara dos listas de ZipInfo por nombre usando solo el directorio central (CRC32 y
+    tamaños), sin descomprimir nada"""
+    entries1 = {info.filename: info for info in infos1 if not info.is_dir()}
+    entries2 = {info.filename: info for info in infos2 if not info.is_dir()}
+    
+    diff = {
+        'added': sorted(entries2.keys() - entries1.keys()),
+        'removed': sorted(entries1.keys() - entries2.keys()),
+        'modified': [],
+        'recompressed': [],
+        'unchanged': []
+    }
+    
+    for name in sorted(entries1.keys() & entries2.keys()):
+        old, new = entries1[name], entries2[name]
+        if old.CRC != new.CRC or old.file_size != new.file_size:
+            diff['modified'].append({
+                'name': name,
+                'old_size': old.file_size,
+                'new_size': new.file_size,
+                'size_diff': new.file_size - old.file_size
+            })
+        elif old.compress_size != new.compress_size or old.compress_type != new.compress_type:
+            # Mismo contenido guardado con otra compresión
+            diff['recompressed'].append(name)
+        else:
+            diff['unchanged'].append(name)
+    
+    return diff
+
+
+def _dex_fingerprints(name, apk_path):
+    """Huellas de las clases de un DEX; se ejecuta dentro de un proceso del pool"""
+    # Cada proceso abre el APK y descomprime solo su DEX
+    with zipfile.ZipFile(apk_path) as zf:
+        return class_fingerprints(DexFile(zf.read(name)))
+
+
+@cached('dex_class_fingerprints', ignore=('workers',))
+def dex_class_fingerprints(source, workers=None):
+    """Huellas por clase y por método de un DEX o de todos los classes*.dex de un APK"""
+    fingerprints = {}
+    
+    try:
+        name = _source_name(source)
+        if isinstance(source, ApkArchive) or name.lower().endswith('.apk'):
+            with _apk_archive(source) as archive:
+                entries = _apk_dex_entries(archive)
+                if workers is None:
+                    workers = os.cpu_count() or 1
+                workers = max(1, min(workers, len(entries)))
+                # Igual que en analyze_multidex: un APK subido (en memoria) se procesa en serie
+                if archive.path is None:
+                    workers = 1
+                
+                if workers > 1:
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        per_dex = list(pool.map(_dex_fingerprints, entries, [archive.path] * len(entries)))
+                else:
+                    per_dex = [class_fingerprints(DexFile(archive.entry_view(entry))) for entry in entries]
+            
+            # En multidex una clase duplicada la resuelve el primer DEX que la define
+            for classes in reversed(per_dex):
+                fingerprints.update(classes)
+        else:
+            with _open_dex(source) as dex:
+                fingerprints = class_fingerprints(dex)
+    
+    except Exception as e:
+        return {'error': str(e)}
+    
+    return {'classes': fingerprints}
+
+
+def compare_dex_classes(old, new, workers=None):
+    """Diferencias por clase y por método entre dos APKs (o dos DEX)"""
+    before = dex_class_fingerprints(old, workers=workers)
+    if 'error' in before:
+        return before
+    after = dex_class_fingerprints(new, workers=workers)
+    if 'error' in after:
+        return after
+    return diff_class_fingerprints(before['classes'], after['classes'])
+
+
+@cached('compare_apk_versions', version=4, inputs=2, ignore=('workers',))
+def compare_apk_versions(apk1, apk2, class_level=False, workers=None):
+    """Compara dos versiones de APK (con class_level, también clase a clase si cambió algún DEX)"""
     diff = {
         'size_diff': 0,
         'new_permissions': 0,
         'removed_permissions': 0,
         'modified_files': 0,
         'new_files': [],
-        'removed_files': []
+        'removed_files': [],
+        'file_diff': {}
     }
     
     try:
-        info1 = decompile_apk(apk1)
-        info2 = decompile_apk(apk2)
-        
-        # Diferencia de tamaño
-        diff['size_diff'] = (info2['size'] - info1['size']) / 1024 / 1024
-        
-        # Archivos nuevos y eliminados
-        files1 = set(info1.get('files', []))
-        files2 = set(info2.get('files', []))
-        
-        diff['new_files'] = list(files2 - files1)
-        diff['removed_files'] = list(files1 - files2)
-        diff['modified_files'] = len(files1.intersection(files2))
-        
-        # Permisos
-        perms1 = set(p['name'] for p in detect_permissions(apk1))
-        perms2 = set(p['name'] for p in detect_permissions(apk2))
-        
-        diff['new_permissions'] = len(perms2 - perms1)
-        diff['removed_permissions'] = len(perms1 - perms2)
+        with _apk_archive(apk1) as archive1, _apk_archive(apk2) as archive2:
+            # Diferencia de tamaño
+            diff['size_diff'] = (archive2.size - archive1.size) / 1024 / 1024
+            
+            # Archivos nuevos, eliminados y modificados según el directorio central
+            file_diff = diff_zip_entries(archive1.infolist(), archive2.infolist())
+            diff['file_diff'] = file_diff
+            diff['new_files'] = file_diff['added']
+            diff['removed_files'] = file_diff['removed']
+            diff['modified_files'] = len(file_diff['modified'])
+            
+            # Permisos (si el manifest no cambió, tampoco cambian)
+            changed = set(file_diff['added'] + file_diff['removed'])
+            changed.update(entry['name'] for entry in file_diff['modified'])
+            if 'AndroidManifest.xml' in changed:
+                permissions1 = detect_permissions(archive1)
+                permissions2 = detect_permissions(archive2)
+                for permissions in (permissions1, permissions2):
+                    if _permissions_error(permissions):
+                        raise ValueError(_permissions_error(permissions))
+                perms1 = set(p['name'] for p in permissions1)
+                perms2 = set(p['name'] for p in permissions2)
+                
+                diff['new_permissions'] = len(perms2 - perms1)
+                diff['removed_permissions'] = len(perms1 - perms2)
+            
+            # Solo se recorre el bytecode si el directorio central indica que cambió algún DEX
+            if class_level and any(re.fullmatch(r'classes\d*\.dex', name) for name in changed):
+                diff['class_diff'] = compare_dex_classes(archive1, archive2, workers=workers)
         
     except Exception as e:
         diff['error'] = str(e)
@@ -544,19 +1558,48 @@ def compare_apk_versions(apk1, apk2):
     return diff
 
 
-def extract_strings_xml(apk_file):
+def _resource_table(archive):
+    """ResourceTable del APK (memoizada); None si no hay resources.arsc"""
+    def load():
+        if not archive.has_entry('resources.arsc'):
+            return None
+        return ResourceTable(archive.entry_view('resources.arsc'))
+    
+    return archive.memo('resource_table', load)
+
+
+@cached('list_string_locales', version=2)
+def list_string_locales(apk_file):
+    """Lista los locales con strings en resources.arsc ('' es el valor por defecto)"""
+    try:
+        with _apk_archive(apk_file) as archive:
+            table = _resource_table(archive)
+            if table is not None:
+                return table.locales('string')
+    
+    except Exception:
+        pass
+    
+    return []
+
+
+@cached('extract_strings_xml', version=3, data_keys=True)
+def extract_strings_xml(apk_file, locale=''):
     """Extrae strings.xml del APK"""
     strings = {}
     
     try:
-        content = apk_file.read()
-        
-        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        with _apk_archive(apk_file) as archive:
+            table = _resource_table(archive)
+            if table is not None:
+                # APK compilado: solo se decodifica el locale pedido (más el respaldo por defecto)
+                return table.strings_for_locale(locale)
+            
             # Buscar strings.xml en diferentes locales
-            string_files = [f for f in zf.namelist() if 'strings.xml' in f]
+            string_files = [f for f in archive.namelist() if 'strings.xml' in f]
             
             for string_file in string_files:
-                xml_content = zf.read(string_file).decode('utf-8', errors='ignore')
+                xml_content = decode_bytes(archive.read(string_file))
                 
                 # Parsear XML básico
                 name_pattern = r'<string\s+name="([^"]+)">([^<]+)</string>'
@@ -565,14 +1608,14 @@ def extract_strings_xml(apk_file):
                 for name, value in matches:
                     strings[name] = value
         
-        apk_file.seek(0)
-        
     except Exception as e:
         strings['error'] = str(e)
+        report_failure()
     
     return strings
 
 
+@cached('analyze_gradle_files', version=2)
 def analyze_gradle_files(gradle_file):
     """Analiza archivos build.gradle"""
     gradle_info = {
@@ -585,7 +1628,7 @@ def analyze_gradle_files(gradle_file):
     }
     
     try:
-        content = gradle_file.read().decode('utf-8')
+        content = read_text(gradle_file)
         
         # Buscar dependencias
         dep_pattern = r'implementation\s+["\'](.+)["\']'
@@ -617,32 +1660,59 @@ def analyze_gradle_files(gradle_file):
     return gradle_info
 
 
-def detect_native_libs(apk_file):
-    """Detecta librerías nativas (.so) en el APK"""
+def _native_lib_summary(archive, name):
+    """Resumen ELF de una librería leída del APK sin extraerla a disco"""
+    summary = {'name': name.split('/')[-1], 'size': archive.getinfo(name).file_size}
+    try:
+        summary.update(summarize_elf(archive.entry_view(name)))
+    except Exception as e:
+        summary['error'] = str(e)
+    return summary
+
+
+def _native_abi_summaries(names, apk_path):
+    """Resume las librerías de una ABI; se ejecuta dentro de un proceso del pool"""
+    # Cada proceso abre el APK con mmap: las librerías no se copian entre procesos
+    with ApkArchive(apk_path) as archive:
+        return [_native_lib_summary(archive, name) for name in names]
+
+
+@cached('detect_native_libs', version=2, ignore=('workers',), data_keys=True)
+def detect_native_libs(apk_file, workers=None):
+    """Detecta librerías nativas (.so) en el APK y resume su ELF: dependencias, símbolos
+    exportados/importados, métodos JNI y si están stripped (una ABI por proceso)"""
     native_libs = {}
     
     try:
-        content = apk_file.read()
-        
-        with zipfile.ZipFile(io.BytesIO(content)) as zf:
-            # Buscar archivos .so
-            so_files = [f for f in zf.namelist() if f.endswith('.so')]
-            
-            # Organizar por arquitectura
-            for so_file in so_files:
+        with _apk_archive(apk_file) as archive:
+            # Organizar por arquitectura: lib/<abi>/<librería>.so
+            by_abi = {}
+            for so_file in archive.namelist():
                 parts = so_file.split('/')
-                if len(parts) >= 3 and parts[0] == 'lib':
-                    arch = parts[1]  # armeabi-v7a, arm64-v8a, x86, etc.
-                    lib_name = parts[2]
-                    
-                    if arch not in native_libs:
-                        native_libs[arch] = []
-                    
-                    native_libs[arch].append(lib_name)
-        
-        apk_file.seek(0)
+                if so_file.endswith('.so') and len(parts) >= 3 and parts[0] == 'lib':
+                    by_abi.setdefault(parts[1], []).append(so_file)
+            
+            abis = sorted(by_abi)
+            if workers is None:
+                workers = os.cpu_count() or 1
+            workers = max(1, min(workers, len(abis)))
+            # Un APK subido (en memoria) se procesa en serie: enviar las librerías a los
+            # procesos exigiría tenerlas todas copiadas a la vez
+            if archive.path is None:
+                workers = 1
+            
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_native_abi_summaries, [by_abi[abi] for abi in abis],
+                                            [archive.path] * len(abis)))
+            else:
+                results = [[_native_lib_summary(archive, name) for name in by_abi[abi]] for abi in abis]
+            
+            for abi, summaries in zip(abis, results):
+                native_libs[abi] = sorted(summaries, key=lambda summary: summary['name'])
         
     except Exception as e:
         native_libs['error'] = str(e)
+        report_failure()
     
     return native_libs
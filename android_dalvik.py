@@ -0,0 +1,403 @@
+"""
+Bytecode Dalvik
+Tabla de opcodes (nombre, formato, tipo de índice), recorrido de instrucciones y huellas
+de clases y métodos para comparar DEX entre versiones
+"""
+
+import hashlib
+from collections import namedtuple
+
+from android_dex import NO_INDEX
+
+
+# Unidades de 16 bits que ocupa cada formato de instrucción
+FORMAT_UNITS = {
+    '10x': 1, '12x': 1, '11n': 1, '11x': 1, '10t': 1,
+    '20t': 2, '20bc': 2, '22x': 2, '21t': 2, '21s': 2, '21h': 2, '21c': 2,
+    '23x': 2, '22b': 2, '22t': 2, '22s': 2, '22c': 2, '22cs': 2,
+    '30t': 3, '32x': 3, '31i': 3, '31t': 3, '31c': 3,
+    '35c': 3, '35ms': 3, '35mi': 3, '3rc': 3, '3rms': 3, '3rmi': 3,
+    '45cc': 4, '4rcc': 4, '51l': 5
+}
+
+# Tipos de índice a las tablas del DEX
+INDEX_STRING = 'string'
+INDEX_TYPE = 'type'
+INDEX_FIELD = 'field'
+INDEX_METHOD = 'method'
+INDEX_PROTO = 'proto'
+INDEX_CALL_SITE = 'call_site'
+INDEX_METHOD_HANDLE = 'method_handle'
+
+Opcode = namedtuple('Opcode', 'value name format index units')
+
+_UNARY = ('neg-int not-int neg-long not-long neg-float neg-double int-to-long int-to-float '
+          'int-to-double long-to-int long-to-float long-to-double float-to-int float-to-long '
+          'float-to-double double-to-int double-to-long double-to-float int-to-byte '
+          'int-to-char int-to-short').split()
+_BINARY = ('add-int sub-int mul-int div-int rem-int and-int or-int xor-int shl-int shr-int '
+           'ushr-int add-long sub-long mul-long div-long rem-long and-long or-long xor-long '
+           'shl-long shr-long ushr-long add-float sub-float mul-float div-float rem-float '
+           'add-double sub-double mul-double div-double rem-double').split()
+_TYPES = ('', '-wide', '-object', '-boolean', '-byte', '-char', '-short')
+
+# (primer opcode, nombres, formato, tipo de índice) en orden de opcode
+_OPCODE_GROUPS = (
+    (0x00, ['nop'], '10x', None),
+    (0x01, ['move', 'move/from16', 'move/16', 'move-wide', 'move-wide/from16', 'move-wide/16',
+            'move-object', 'move-object/from16', 'move-object/16'], None, None),
+    (0x0a, ['move-result', 'move-result-wide', 'move-result-object', 'move-exception'], '11x', None),
+    (0x0e, ['return-void'], '10x', None),
+    (0x0f, ['return', 'return-wide', 'return-object'], '11x', None),
+    (0x12, ['const/4'], '11n', None),
+    (0x13, ['const/16'], '21s', None),
+    (0x14, ['const'], '31i', None),
+    (0x15, ['const/high16'], '21h', None),
+    (0x16, ['const-wide/16'], '21s', None),
+    (0x17, ['const-wide/32'], '31i', None),
+    (0x18, ['const-wide'], '51l', None),
+    (0x19, ['const-wide/high16'], '21h', None),
+    (0x1a, ['const-string'], '21c', INDEX_STRING),
+    (0x1b, ['const-string/jumbo'], '31c', INDEX_STRING),
+    (0x1c, ['const-class'], '21c', INDEX_TYPE),
+    (0x1d, ['monitor-enter', 'monitor-exit'], '11x', None),
+    (0x1f, ['check-cast'], '21c', INDEX_TYPE),
+    (0x20, ['instance-of'], '22c', INDEX_TYPE),
+    (0x21, ['array-length'], '12x', None),
+    (0x22, ['new-instance'], '21c', INDEX_TYPE),
+    (0x23, ['new-array'], '22c', INDEX_TYPE),
+    (0x24, ['filled-new-array'], '35c', INDEX_TYPE),
+    (0x25, ['filled-new-array/range'], '3rc', INDEX_TYPE),
+    (0x26, ['fill-array-data'], '31t', None),
+    (0x27, ['throw'], '11x', None),
+    (0x28, ['goto'], '10t', None),
+    (0x29, ['goto/16'], '20t', None),
+    (0x2a, ['goto/32'], '30t', None),
+    (0x2b, ['packed-switch', 'sparse-switch'], '31t', None),
+    (0x2d, ['cmpl-float', 'cmpg-float', 'cmpl-double', 'cmpg-double', 'cmp-long'], '23x', None),
+    (0x32, ['if-eq', 'if-ne', 'if-lt', 'if-ge', 'if-gt', 'if-le'], '22t', None),
+    (0x38, ['if-eqz', 'if-nez', 'if-ltz', 'if-gez', 'if-gtz', 'if-lez'], '21t', None),
+    (0x44, ['aget' + t for t in _TYPES] + ['aput' + t for t in _TYPES], '23x', None),
+    (0x52, ['iget' + t for t in _TYPES] + ['iput' + t for t in _TYPES], '22c', INDEX_FIELD),
+    (0x60, ['sget' + t for t in _TYPES] + ['sput' + t for t in _TYPES], '21c', INDEX_FIELD),
+    (0x6e, ['invoke-virtual', 'invoke-super', 'invoke-direct', 'invoke-static',
+            'invoke-interface'], '35c', INDEX_METHOD),
+    (0x74, ['invoke-virtual/range', 'invoke-super/range', 'invoke-direct/range',
+            'invoke-static/range', 'invoke-interface/range'], '3rc', INDEX_METHOD),
+    (0x7b, _UNARY, '12x', None),
+    (0x90, _BINARY, '23x', None),
+    (0xb0, [name + '/2addr' for name in _BINARY], '12x', None),
+    (0xd0, ['add-int/lit16', 'rsub-int', 'mul-int/lit16', 'div-int/lit16', 'rem-int/lit16',
+            'and-int/lit16', 'or-int/lit16', 'xor-int/lit16'], '22s', None),
+    (0xd8, ['add-int/lit8', 'rsub-int/lit8', 'mul-int/lit8', 'div-int/lit8', 'rem-int/lit8',
+            'and-int/lit8', 'or-int/lit8', 'xor-int/lit8', 'shl-int/lit8', 'shr-int/lit8',
+            'ushr-int/lit8'], '22b', None),
+    (0xfa, ['invoke-polymorphic'], '45cc', INDEX_METHOD),
+    (0xfb, ['invoke-polymorphic/range'], '4rcc', INDEX_METHOD),
+    (0xfc, ['invoke-custom'], '35c', INDEX_CALL_SITE),
+    (0xfd, ['invoke-custom/range'], '3rc', INDEX_CALL_SITE),
+    (0xfe, ['const-method-handle'], '21c', INDEX_METHOD_HANDLE),
+    (0xff, ['const-method-type'], '21c', INDEX_PROTO)
+)
+
+# Formatos de la familia move (se repiten cada tres opcodes)
+_MOVE_FORMATS = ('12x', '22x', '32x')
+
+
+def _build_opcodes():
+    table = [None] * 256
+    for first, names, fmt, index in _OPCODE_GROUPS:
+        for offset, name in enumerate(names):
+            value = first + offset
+            op_format = fmt or _MOVE_FORMATS[offset % 3]
+            table[value] = Opcode(value, name, op_format, index, FORMAT_UNITS[op_format])
+    # Huecos del juego de instrucciones (reservados u odex)
+    for value, entry in enumerate(table):
+        if entry is None:
+            table[value] = Opcode(value, f'unused-{value:02x}', '10x', None, 1)
+    return tuple(table)
+
+
+OPCODES = _build_opcodes()
+
+# Pseudo-instrucciones de datos (identificador en la unidad con opcode nop)
+PACKED_SWITCH_PAYLOAD = 0x0100
+SPARSE_SWITCH_PAYLOAD = 0x0200
+FILL_ARRAY_DATA_PAYLOAD = 0x0300
+
+# Tablas planas por opcode para el bucle de recorrido
+_UNITS = tuple(op.units for op in OPCODES)
+_INDEX = tuple(op.index for op in OPCODES)
+# Posición del índice: u4 en 31c, u2 en el resto (tras la primera unidad)
+_WIDE_INDEX = frozenset(op.value for op in OPCODES if op.format == '31c')
+_PROTO_INDEX = frozenset(op.value for op in OPCODES if op.format in ('45cc', '4rcc'))
+# invoke-* con índice de método (invoke-custom apunta a un call site)
+_INVOKE = frozenset(op.value for op in OPCODES
+                    if op.name.startswith('invoke-') and op.index == INDEX_METHOD)
+# const-string(/jumbo) y lecturas de campos (iget-*, sget-*)
+_CONST_STRING = frozenset([0x1a, 0x1b])
+_FIELD_READ = frozenset(op.value for op in OPCODES if op.name.startswith(('iget', 'sget')))
+
+# Huella de un método sin código (abstract o native)
+_NO_CODE = b'-'
+
+# Tamaño de las huellas en bytes (las comparaciones solo necesitan igualdad)
+FINGERPRINT_BYTES = 10
+
+
+def _hasher(data):
+    return hashlib.blake2b(data, digest_size=FINGERPRINT_BYTES)
+
+
+def payload_units(units, pc):
+    """Tamaño en unidades de una pseudo-instrucción de datos en pc (0 si no es un payload)"""
+    ident = units[pc]
+    if ident == PACKED_SWITCH_PAYLOAD:
+        return units[pc + 1] * 2 + 4
+    if ident == SPARSE_SWITCH_PAYLOAD:
+        return units[pc + 1] * 4 + 2
+    if ident == FILL_ARRAY_DATA_PAYLOAD:
+        if pc + 4 > len(units):
+            # Cabecera truncada: el tamaño mínimo ya excede el code_item
+            return 4
+        width = units[pc + 1]
+        size = units[pc + 2] | (units[pc + 3] << 16)
+        return (size * width + 1) // 2 + 4
+    return 0
+
+
+def iter_instructions(units):
+    """Genera (pc, opcode, unidades) de cada instrucción; los payloads tienen opcode None.
+    Se detiene en una instrucción truncada al final del code_item"""
+    pc = 0
+    total = len(units)
+    while pc < total:
+        opcode = units[pc] & 0xFF
+        if opcode == 0 and units[pc] and pc + 1 < total:
+            length = payload_units(units, pc)
+            if length:
+                if pc + length > total:
+                    break
+                yield pc, None, length
+                pc += length
+                continue
+        length = _UNITS[opcode]
+        if pc + length > total:
+            break
+        yield pc, opcode, length
+        pc += length
+
+
+def code_references(units):
+    """Referencias (tipo, índice) de las instrucciones en orden y las instrucciones con los
+    índices a cero, para comparar código cuyas tablas se han renumerado"""
+    normalized = units[:]
+    references = []
+    for pc, opcode, _ in iter_instructions(units):
+        if opcode is None:
+            continue
+        kind = _INDEX[opcode]
+        if kind is not None:
+            if opcode in _WIDE_INDEX:
+                references.append((kind, units[pc + 1] | (units[pc + 2] << 16)))
+                normalized[pc + 2] = 0
+            else:
+                references.append((kind, units[pc + 1]))
+            normalized[pc + 1] = 0
+            if opcode in _PROTO_INDEX:
+                references.append((INDEX_PROTO, units[pc + 3]))
+                normalized[pc + 3] = 0
+    return references, normalized
+
+
+def code_xrefs(units):
+    """Índices de string (const-string), método (invoke-*) y campo leído (iget/sget) del código"""
+    strings = []
+    methods = []
+    fields = []
+    for pc, opcode, _ in iter_instructions(units):
+        if opcode in _INVOKE:
+            methods.append(units[pc + 1])
+        elif opcode in _FIELD_READ:
+            fields.append(units[pc + 1])
+        elif opcode in _CONST_STRING:
+            if opcode in _WIDE_INDEX:
+                strings.append(units[pc + 1] | (units[pc + 2] << 16))
+            else:
+                strings.append(units[pc + 1])
+    return strings, methods, fields
+
+
+class ReferenceResolver:
+    """Convierte índices de un DEX en nombres estables (memoizados) para las huellas"""
+
+    def __init__(self, dex):
+        self.dex = dex
+        # Tablas de IDs decodificadas en bloque como columnas de enteros
+        self._type_strings = dex.type_columns()
+        self._methods = dex.method_columns()
+        self._fields = dex.field_columns()
+        self._strings = {}
+        self._types = {}
+        self._protos = {}
+        self._members = {}
+        self._cache = {}
+        self._resolvers = {
+            INDEX_STRING: self.string,
+            INDEX_TYPE: self.type_name,
+            INDEX_FIELD: self.field,
+            INDEX_METHOD: self.method,
+            INDEX_PROTO: self.proto
+        }
+
+    def string(self, idx):
+        value = self._strings.get(idx)
+        if value is None:
+            value = self._strings[idx] = self.dex.strings[idx]
+        return value
+
+    def type_name(self, idx):
+        value = self._types.get(idx)
+        if value is None:
+            value = self._types[idx] = self.string(self._type_strings[idx])
+        return value
+
+    def proto(self, idx):
+        """(params)retorno"""
+        value = self._protos.get(idx)
+        if value is None:
+            proto = self.dex.proto_ids[idx]
+            params = ''
+            if proto.parameters_off:
+                params = ''.join(self.type_name(t) for t in self.dex.type_list_indices(proto.parameters_off))
+            value = self._protos[idx] = f'({params}){self.type_name(proto.return_type_idx)}'
+        return value
+
+    def method_member(self, idx):
+        """Firma de un método sin la clase: nombre(params)retorno"""
+        key = (INDEX_METHOD, idx)
+        value = self._members.get(key)
+        if value is None:
+            methods = self._methods
+            value = self._members[key] = self.string(methods.name_idx[idx]) + self.proto(methods.proto_idx[idx])
+        return value
+
+    def field_member(self, idx):
+        """Firma de un campo sin la clase: nombre:tipo"""
+        key = (INDEX_FIELD, idx)
+        value = self._members.get(key)
+        if value is None:
+            fields = self._fields
+            value = self._members[key] = f'{self.string(fields.name_idx[idx])}:{self.type_name(fields.type_idx[idx])}'
+        return value
+
+    def method(self, idx):
+        return f'{self.type_name(self._methods.class_idx[idx])}->{self.method_member(idx)}'
+
+    def field(self, idx):
+        return f'{self.type_name(self._fields.class_idx[idx])}->{self.field_member(idx)}'
+
+    def resolve(self, kind, idx):
+        key = (kind, idx)
+        value = self._cache.get(key)
+        if value is None:
+            resolver = self._resolvers.get(kind)
+            try:
+                # call sites y method handles se identifican solo por índice
+                value = resolver(idx) if resolver else f'{kind}@{idx}'
+            except (IndexError, KeyError, ValueError):
+                value = f'{kind}@{idx}?'
+            self._cache[key] = value
+        return value
+
+
+def method_fingerprint(dex, method, resolver):
+    """Huella de un método: flags, cabecera del code_item, instrucciones con los índices
+    sustituidos por los nombres a los que apuntan y manejadores de excepciones"""
+    sha = _hasher(b'%d;' % method.access_flags)
+    code = dex.code_item(method.code_off)
+    if code is None:
+        sha.update(_NO_CODE)
+        return sha.hexdigest()
+
+    sha.update(b'%d,%d,%d;' % (code.registers_size, code.ins_size, code.outs_size))
+    references, normalized = code_references(dex.code_units(code))
+    sha.update(normalized.tobytes())
+    resolve = resolver.resolve
+    sha.update('\n'.join(resolve(kind, idx) for kind, idx in references).encode('utf-8', 'surrogatepass'))
+
+    for try_item in dex.try_items(code):
+        handlers = ','.join(f'{resolve(INDEX_TYPE, type_idx)}@{addr}' for type_idx, addr in try_item.handlers)
+        sha.update(f';{try_item.start_addr}+{try_item.insn_count}:{handlers}:{try_item.catch_all_addr}'
+                   .encode('utf-8', 'surrogatepass'))
+    return sha.hexdigest()
+
+
+def class_fingerprints(dex):
+    """Huellas de cada clase definida: {descriptor: {'hash', 'methods': {firma: hash}}}"""
+    resolver = ReferenceResolver(dex)
+    classes = {}
+    for class_def in dex.class_defs:
+        name = resolver.type_name(class_def.class_idx)
+        interfaces = [resolver.type_name(t) for t in dex.type_list_indices(class_def.interfaces_off)]
+        superclass = class_def.superclass_idx
+        header = [
+            str(class_def.access_flags),
+            resolver.type_name(superclass) if superclass != NO_INDEX else '',
+            ','.join(interfaces)
+        ]
+
+        fields = []
+        methods = {}
+        data = dex.class_data(class_def.class_data_off)
+        if data is not None:
+            for field in data.static_fields + data.instance_fields:
+                fields.append(f'{resolver.field_member(field.field_idx)}#{field.access_flags}')
+            for method in data.direct_methods + data.virtual_methods:
+                signature = resolver.method_member(method.method_idx)
+                methods[signature] = method_fingerprint(dex, method, resolver)
+
+        sha = _hasher('|'.join(header).encode('utf-8', 'surrogatepass'))
+        sha.update('\n'.join(sorted(fields)).encode('utf-8', 'surrogatepass'))
+        for signature in sorted(methods):
+            sha.update(f'\n{signature}={methods[signature]}'.encode('utf-8', 'surrogatepass'))
+        classes[name] = {'hash': sha.hexdigest(), 'methods': methods}
+    return classes
+
+
+def diff_class_fingerprints(old, new):
+    """Clases y métodos añadidos, eliminados y modificados entre dos mapas de huellas"""
+    diff = {
+        'added_classes': sorted(new.keys() - old.keys()),
+        'removed_classes': sorted(old.keys() - new.keys()),
+        'changed_classes': [],
+        'unchanged_classes': 0,
+        'added_methods': [],
+        'removed_methods': [],
+        'changed_methods': []
+    }
+
+    for name in sorted(old.keys() & new.keys()):
+        before, after = old[name], new[name]
+        if before['hash'] == after['hash']:
+            diff['unchanged_classes'] += 1
+            continue
+        diff['changed_classes'].append(name)
+        methods_before, methods_after = before['methods'], after['methods']
+        diff['added_methods'].extend(
+            f'{name}->{sig}' for sig in sorted(methods_after.keys() - methods_before.keys())
+        )
+        diff['removed_methods'].extend(
+            f'{name}->{sig}' for sig in sorted(methods_before.keys() - methods_after.keys())
+        )
+        diff['changed_methods'].extend(
+            f'{name}->{sig}' for sig in sorted(methods_before.keys() & methods_after.keys())
+            if methods_before[sig] != methods_after[sig]
+        )
+
+    # Los métodos de clases nuevas o eliminadas también cuentan
+    for name in diff['added_classes']:
+        diff['added_methods'].extend(f'{name}->{sig}' for sig in sorted(new[name]['methods']))
+    for name in diff['removed_classes']:
+        diff['removed_methods'].extend(f'{name}->{sig}' for sig in sorted(old[name]['methods']))
+    return diff
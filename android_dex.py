@@ -0,0 +1,471 @@
+"""
+Lector de archivos DEX (Dalvik Executable)
+Expone vistas perezosas e indexables sobre las tablas de IDs del DEX
+"""
+
+import base64
+import bisect
+import json
+import mmap
+import struct
+import zlib
+from array import array
+from collections import namedtuple
+
+from android_arrays import U32, array_from, array_to_le_bytes
+
+
+NO_INDEX = 0xFFFFFFFF
+
+HEADER_SIZE = 0x70
+ENDIAN_CONSTANT = 0x12345678
+
+# Header: (tamaño, offset) de cada tabla de IDs a partir de 0x38
+_HEADER_TABLES = struct.Struct('<12I')
+
+ProtoId = namedtuple('ProtoId', 'shorty_idx return_type_idx parameters_off')
+FieldId = namedtuple('FieldId', 'class_idx type_idx name_idx')
+MethodId = namedtuple('MethodId', 'class_idx proto_idx name_idx')
+ClassDef = namedtuple('ClassDef', 'class_idx access_flags superclass_idx interfaces_off '
+                                  'source_file_idx annotations_off class_data_off static_values_off')
+
+# class_data_item y code_item
+EncodedField = namedtuple('EncodedField', 'field_idx access_flags')
+EncodedMethod = namedtuple('EncodedMethod', 'method_idx access_flags code_off')
+ClassData = namedtuple('ClassData', 'static_fields instance_fields direct_methods virtual_methods')
+CodeItem = namedtuple('CodeItem', 'registers_size ins_size outs_size tries_size debug_info_off '
+                                  'insns_size insns_off')
+TryItem = namedtuple('TryItem', 'start_addr insn_count handlers catch_all_addr')
+
+# Columnas decodificadas en bloque (arrays de enteros, una por campo)
+MethodColumns = namedtuple('MethodColumns', 'class_idx proto_idx name_idx')
+FieldColumns = namedtuple('FieldColumns', 'class_idx type_idx name_idx')
+
+_CODE_ITEM = struct.Struct('<4H2I')
+_TRY_ITEM = struct.Struct('<I2H')
+
+
+def read_uleb128(buf, offset):
+    """Lee un ULEB128 y devuelve (valor, siguiente offset)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def read_sleb128(buf, offset):
+    """Lee un SLEB128 y devuelve (valor, siguiente offset)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            if byte & 0x40:
+                result -= 1 << shift
+            return result, offset
+
+
+def decode_mutf8(data):
+    """Decodifica MUTF-8 (UTF-8 modificado de la JVM/Dalvik)"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        pass
+
+    # MUTF-8 codifica U+0000 como C0 80 y los caracteres suplementarios
+    # como pares sustitutos de 3 bytes cada uno
+    text = data.replace(b'\xc0\x80', b'\x00').decode('utf-8', errors='surrogatepass')
+    return text.encode('utf-16-le', errors='surrogatepass').decode('utf-16-le', errors='replace')
+
+
+class _IdTable:
+    """Vista perezosa de una tabla de registros de tamaño fijo"""
+
+    def __init__(self, buf, offset, count, record, factory=None):
+        self._buf = buf
+        self._offset = offset
+        self._count = count
+        self._record = record
+        self._factory = factory
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('índice fuera de la tabla DEX')
+
+        values = self._record.unpack_from(self._buf, self._offset + index * self._record.size)
+        if self._factory is None:
+            return values[0]
+        return self._factory(*values)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+
+class _StringTable:
+    """Vista perezosa del pool de strings; cada entrada se decodifica al accederla"""
+
+    _OFFSET = struct.Struct('<I')
+
+    def __init__(self, buf, offset, count):
+        self._buf = buf
+        self._offsets = _IdTable(buf, offset, count, self._OFFSET)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def raw(self, index):
+        """Bytes MUTF-8 de un string sin decodificar"""
+        utf16_size, start = read_uleb128(self._buf, self._offsets[index])
+        # Cada unidad UTF-16 ocupa como máximo 3 bytes en MUTF-8
+        window = bytes(self._buf[start:start + utf16_size * 3 + 1])
+        end = window.find(b'\x00')
+        return window if end < 0 else window[:end]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return decode_mutf8(self.raw(index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class DexFile:
+    """Archivo DEX sobre un buffer (bytes, mmap o memoryview) sin copias previas"""
+
+    def __init__(self, data):
+        self._buf = data
+        self._mmap = None
+        self.size = len(data)
+
+        if len(data) < HEADER_SIZE or bytes(data[:4]) != b'dex\n':
+            raise ValueError('No es un archivo DEX válido')
+
+        self.magic = bytes(data[:8]).decode('ascii', errors='ignore')
+        self.version = bytes(data[4:7]).decode('ascii', errors='ignore')
+        self.file_size, self.header_size, endian_tag = struct.unpack_from('<3I', data, 0x20)
+        if endian_tag != ENDIAN_CONSTANT:
+            raise ValueError('DEX con orden de bytes no soportado')
+
+        (self.string_ids_size, self.string_ids_off,
+         self.type_ids_size, self.type_ids_off,
+         self.proto_ids_size, self.proto_ids_off,
+         self.field_ids_size, self.field_ids_off,
+         self.method_ids_size, self.method_ids_off,
+         self.class_defs_size, self.class_defs_off) = _HEADER_TABLES.unpack_from(data, 0x38)
+
+        self.strings = _StringTable(data, self.string_ids_off, self.string_ids_size)
+        self.type_ids = _IdTable(data, self.type_ids_off, self.type_ids_size, struct.Struct('<I'))
+        self.proto_ids = _IdTable(data, self.proto_ids_off, self.proto_ids_size,
+                                  struct.Struct('<3I'), ProtoId)
+        self.field_ids = _IdTable(data, self.field_ids_off, self.field_ids_size,
+                                  struct.Struct('<2HI'), FieldId)
+        self.method_ids = _IdTable(data, self.method_ids_off, self.method_ids_size,
+                                   struct.Struct('<2HI'), MethodId)
+        self.class_defs = _IdTable(data, self.class_defs_off, self.class_defs_size,
+                                   struct.Struct('<8I'), ClassDef)
+        self._columns = {}
+
+    @classmethod
+    def open(cls, path):
+        """Abre un DEX en disco mapeándolo en memoria"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        dex = cls(mapped)
+        dex._mmap = mapped
+        return dex
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def type_columns(self):
+        """descriptor_idx de todos los tipos en un único array"""
+        if 'types' not in self._columns:
+            self._columns['types'] = array_from(self._buf, self.type_ids_off,
+                                                self.type_ids_size, U32)
+        return self._columns['types']
+
+    def class_def_types(self):
+        """class_idx de todas las clases definidas en un único array"""
+        if 'class_defs' not in self._columns:
+            words = array_from(self._buf, self.class_defs_off, self.class_defs_size * 8, U32)
+            self._columns['class_defs'] = words[0::8]
+        return self._columns['class_defs']
+
+    def _id_columns(self, key, offset, count, factory):
+        # Registros de 8 bytes (u2, u2, u4): se leen como u2 y como u4 y se separan
+        # con slicing extendido, sin un bucle Python por registro
+        if key not in self._columns:
+            halves = array_from(self._buf, offset, count * 4, 'H')
+            words = array_from(self._buf, offset, count * 2, U32)
+            self._columns[key] = factory(halves[0::4], halves[1::4], words[1::2])
+        return self._columns[key]
+
+    def method_columns(self):
+        """Tabla method_ids completa como columnas (class_idx, proto_idx, name_idx)"""
+        return self._id_columns('methods', self.method_ids_off, self.method_ids_size, MethodColumns)
+
+    def field_columns(self):
+        """Tabla field_ids completa como columnas (class_idx, type_idx, name_idx)"""
+        return self._id_columns('fields', self.field_ids_off, self.field_ids_size, FieldColumns)
+
+    def defined_member_counts(self):
+        """Campos y métodos definidos (con código propio) según los class_data_item"""
+        field_total = 0
+        method_total = 0
+        for class_def in self.class_defs:
+            offset = class_def.class_data_off
+            if not offset:
+                continue
+            static_fields, offset = read_uleb128(self._buf, offset)
+            instance_fields, offset = read_uleb128(self._buf, offset)
+            direct_methods, offset = read_uleb128(self._buf, offset)
+            virtual_methods, offset = read_uleb128(self._buf, offset)
+            field_total += static_fields + instance_fields
+            method_total += direct_methods + virtual_methods
+        return field_total, method_total
+
+    def class_data(self, offset):
+        """class_data_item: campos y métodos definidos con índices absolutos (None si no hay)"""
+        if not offset:
+            return None
+        buf = self._buf
+        sizes = []
+        for _ in range(4):
+            size, offset = read_uleb128(buf, offset)
+            sizes.append(size)
+
+        groups = []
+        for position, size in enumerate(sizes):
+            items = []
+            # Los índices van codificados como diferencia con el anterior del mismo grupo
+            index = 0
+            for _ in range(size):
+                diff, offset = read_uleb128(buf, offset)
+                access_flags, offset = read_uleb128(buf, offset)
+                index += diff
+                if position < 2:
+                    items.append(EncodedField(index, access_flags))
+                else:
+                    code_off, offset = read_uleb128(buf, offset)
+                    items.append(EncodedMethod(index, access_flags, code_off))
+            groups.append(items)
+        return ClassData(*groups)
+
+    def code_item(self, offset):
+        """Cabecera de un code_item; insns_off apunta a las instrucciones (unidades de 16 bits)"""
+        if not offset:
+            return None
+        return CodeItem(*_CODE_ITEM.unpack_from(self._buf, offset), offset + _CODE_ITEM.size)
+
+    def code_units(self, code):
+        """Instrucciones de un code_item como array de unidades de 16 bits"""
+        return array_from(self._buf, code.insns_off, code.insns_size, 'H')
+
+    def try_items(self, code):
+        """Bloques try del code_item con sus manejadores [(type_idx, dirección)]"""
+        if not code.tries_size:
+            return []
+        # Los try_item van alineados a 4 bytes tras las instrucciones
+        tries_off = code.insns_off + code.insns_size * 2
+        tries_off += tries_off % 4
+        handlers_off = tries_off + code.tries_size * _TRY_ITEM.size
+
+        tries = []
+        for index in range(code.tries_size):
+            start_addr, insn_count, handler_off = _TRY_ITEM.unpack_from(
+                self._buf, tries_off + index * _TRY_ITEM.size
+            )
+            size, offset = read_sleb128(self._buf, handlers_off + handler_off)
+            handlers = []
+            for _ in range(abs(size)):
+                type_idx, offset = read_uleb128(self._buf, offset)
+                addr, offset = read_uleb128(self._buf, offset)
+                handlers.append((type_idx, addr))
+            # size <= 0 indica un catch-all al final
+            catch_all = read_uleb128(self._buf, offset)[0] if size <= 0 else None
+            tries.append(TryItem(start_addr, insn_count, handlers, catch_all))
+        return tries
+
+    def type_name(self, type_idx):
+        """Descriptor de un tipo (p. ej. Lcom/app/Main;)"""
+        if type_idx == NO_INDEX:
+            return None
+        return self.strings[self.type_ids[type_idx]]
+
+    def type_list_indices(self, offset):
+        """Índices de tipo de un type_list (parámetros, interfaces)"""
+        if not offset:
+            return ()
+        size = struct.unpack_from('<I', self._buf, offset)[0]
+        return struct.unpack_from(f'<{size}H', self._buf, offset + 4)
+
+    def type_list(self, offset):
+        """Lista de descriptores de un type_list (parámetros, interfaces)"""
+        return [self.type_name(idx) for idx in self.type_list_indices(offset)]
+
+    def proto_signature(self, proto_idx):
+        """Firma de un prototipo en formato Dalvik: (params)retorno"""
+        proto = self.proto_ids[proto_idx]
+        params = ''.join(self.type_list(proto.parameters_off))
+        return f'({params}){self.type_name(proto.return_type_idx)}'
+
+    def method_signature(self, method_idx):
+        """Referencia completa de un método: Lclase;->nombre(params)retorno"""
+        method = self.method_ids[method_idx]
+        return (f'{self.type_name(method.class_idx)}->{self.strings[method.name_idx]}'
+                f'{self.proto_signature(method.proto_idx)}')
+
+    def field_signature(self, field_idx):
+        """Referencia completa de un campo: Lclase;->nombre:tipo"""
+        field = self.field_ids[field_idx]
+        return (f'{self.type_name(field.class_idx)}->{self.strings[field.name_idx]}'
+                f':{self.type_name(field.type_idx)}')
+
+    def class_names(self):
+        """Descriptores de las clases definidas, decodificados bajo demanda"""
+        for class_def in self.class_defs:
+            yield self.type_name(class_def.class_idx)
+
+
+class DexStringIndex:
+    """Índice de los pools de strings de varios DEX: exacto/prefijo por bisect, subcadenas por trigramas"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, strings, masks, dex_names, trigrams=None):
+        self.strings = strings
+        self.masks = masks
+        self.dex_names = dex_names
+        self._trigrams = trigrams
+
+    @classmethod
+    def build(cls, dex_files):
+        """Construye el índice a partir de pares (nombre, DexFile)"""
+        membership = {}
+        dex_names = []
+        for bit, (name, dex) in enumerate(dex_files):
+            dex_names.append(name)
+            flag = 1 << bit
+            for value in dex.strings:
+                membership[value] = membership.get(value, 0) | flag
+
+        strings = sorted(membership)
+        masks = [membership[value] for value in strings]
+        return cls(strings, masks, dex_names)
+
+    def __len__(self):
+        return len(self.strings)
+
+    def _dex_for(self, string_id):
+        mask = self.masks[string_id]
+        return [name for bit, name in enumerate(self.dex_names) if mask >> bit & 1]
+
+    def _results(self, string_ids):
+        return [{'string': self.strings[i], 'dex': self._dex_for(i)} for i in string_ids]
+
+    def find(self, value):
+        """DEX que contienen exactamente este string"""
+        pos = bisect.bisect_left(self.strings, value)
+        if pos < len(self.strings) and self.strings[pos] == value:
+            return self._dex_for(pos)
+        return []
+
+    def prefix(self, prefix, limit=100):
+        """Strings que empiezan por el prefijo, en orden"""
+        start = bisect.bisect_left(self.strings, prefix)
+        ids = []
+        for i in range(start, min(start + limit, len(self.strings))):
+            if not self.strings[i].startswith(prefix):
+                break
+            ids.append(i)
+        return self._results(ids)
+
+    def _build_trigrams(self):
+        trigrams = {}
+        for string_id, value in enumerate(self.strings):
+            for gram in {value[i:i + 3] for i in range(len(value) - 2)}:
+                postings = trigrams.get(gram)
+                if postings is None:
+                    postings = trigrams[gram] = array(U32)
+                postings.append(string_id)
+        self._trigrams = trigrams
+
+    def search(self, query, limit=100):
+        """Strings que contienen la subcadena"""
+        if len(query) < 3:
+            candidates = range(len(self.strings))
+        else:
+            if self._trigrams is None:
+                self._build_trigrams()
+            grams = {query[i:i + 3] for i in range(len(query) - 2)}
+            postings = sorted((self._trigrams.get(gram, ()) for gram in grams), key=len)
+            if not postings[0]:
+                return []
+            # Se intersectan las dos listas más selectivas y se verifica el resto
+            candidates = postings[0]
+            if len(postings) > 1:
+                second = set(postings[1])
+                candidates = [i for i in candidates if i in second]
+
+        ids = []
+        for string_id in candidates:
+            if query in self.strings[string_id]:
+                ids.append(string_id)
+                if len(ids) >= limit:
+                    break
+        return self._results(ids)
+
+    def to_bytes(self):
+        """Serializa el índice (incluidos los trigramas) a JSON comprimido"""
+        if self._trigrams is None:
+            self._build_trigrams()
+        payload = {
+            'version': self.FORMAT_VERSION,
+            'dex_names': self.dex_names,
+            'strings': self.strings,
+            'masks': self.masks,
+            'trigrams': {
+                gram: base64.b64encode(array_to_le_bytes(postings)).decode('ascii')
+                for gram, postings in self._trigrams.items()
+            }
+        }
+        return zlib.compress(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Carga un índice serializado sin volver a parsear los DEX"""
+        payload = json.loads(zlib.decompress(data).decode('utf-8'))
+        if payload.get('version') != cls.FORMAT_VERSION:
+            raise ValueError('Versión de índice de strings no soportada')
+
+        trigrams = {}
+        for gram, encoded in payload['trigrams'].items():
+            raw = base64.b64decode(encoded)
+            trigrams[gram] = array_from(raw, 0, len(raw) // 4, U32)
+        return cls(payload['strings'], payload['masks'], payload['dex_names'], trigrams)
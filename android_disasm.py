@@ -0,0 +1,579 @@
+"""
+Desensamblador Dalvik a SMALI
+Decodifica las instrucciones con la tabla de opcodes de android_dalvik (un formateador por formato)
+y solo cuando se pide una clase o un método; el volcado completo se escribe clase a clase en un ZIP
+"""
+
+import argparse
+import os
+import sys
+import time
+import zipfile
+
+from android_dalvik import (
+    OPCODES, INDEX_PROTO, INDEX_STRING, INDEX_TYPE,
+    FILL_ARRAY_DATA_PAYLOAD, PACKED_SWITCH_PAYLOAD, SPARSE_SWITCH_PAYLOAD,
+    ReferenceResolver, iter_instructions
+)
+from android_dex import DexFile, NO_INDEX
+from android_smali import to_descriptor
+
+
+# Modificadores de acceso en el orden de baksmali: (flag, nombre)
+_CLASS_ACCESS = (
+    (0x1, 'public'), (0x2, 'private'), (0x4, 'protected'), (0x8, 'static'), (0x10, 'final'),
+    (0x200, 'interface'), (0x400, 'abstract'), (0x1000, 'synthetic'), (0x2000, 'annotation'),
+    (0x4000, 'enum')
+)
+_FIELD_ACCESS = (
+    (0x1, 'public'), (0x2, 'private'), (0x4, 'protected'), (0x8, 'static'), (0x10, 'final'),
+    (0x40, 'volatile'), (0x80, 'transient'), (0x1000, 'synthetic'), (0x4000, 'enum')
+)
+_METHOD_ACCESS = (
+    (0x1, 'public'), (0x2, 'private'), (0x4, 'protected'), (0x8, 'static'), (0x10, 'final'),
+    (0x20, 'synchronized'), (0x40, 'bridge'), (0x80, 'varargs'), (0x100, 'native'),
+    (0x400, 'abstract'), (0x800, 'strictfp'), (0x1000, 'synthetic'), (0x10000, 'constructor'),
+    (0x20000, 'declared-synchronized')
+)
+
+# Opcodes con destino de salto (goto) o condicional (if-*)
+_GOTO_FORMATS = frozenset(['10t', '20t', '30t'])
+_COND_FORMATS = frozenset(['21t', '22t'])
+
+# Opcodes cuyo destino es un payload de datos y prefijo de la etiqueta del payload
+_PAYLOAD_LABELS = {0x26: 'array', 0x2b: 'pswitch_data', 0x2c: 'sswitch_data'}
+
+# Opcodes con literal de 64 bits (sufijo L en SMALI)
+_WIDE_LITERALS = frozenset([0x18, 0x19])
+
+# Escapes de los strings de SMALI; el resto de caracteres no imprimibles van como \uXXXX
+_STRING_ESCAPES = {ord('"'): '\\"', ord('\\'): '\\\\', ord("'"): "\\'",
+                   ord('\n'): '\\n', ord('\r'): '\\r', ord('\t'): '\\t'}
+_STRING_ESCAPES.update({code: f'\\u{code:04x}' for code in range(0x20) if code not in _STRING_ESCAPES})
+_STRING_ESCAPES[0x7f] = '\\u007f'
+
+
+def quote_string(value):
+    """Literal de string de SMALI entre comillas"""
+    value = value.translate(_STRING_ESCAPES)
+    if not value.isascii():
+        chars = []
+        for char in value:
+            code = ord(char)
+            if code < 0x80:
+                chars.append(char)
+            elif code <= 0xFFFF:
+                chars.append(f'\\u{code:04x}')
+            else:
+                # Caracteres suplementarios como par de sustitutos (igual que en el DEX)
+                code -= 0x10000
+                chars.append(f'\\u{0xD800 + (code >> 10):04x}\\u{0xDC00 + (code & 0x3FF):04x}')
+        value = ''.join(chars)
+    return '"' + value + '"'
+
+
+def access_string(flags, table):
+    return ' '.join(name for flag, name in table if flags & flag)
+
+
+def _literal(value, suffix=''):
+    return f'-0x{-value:x}{suffix}' if value < 0 else f'0x{value:x}{suffix}'
+
+
+def _s8(value):
+    return (value ^ 0x80) - 0x80
+
+
+def _s16(value):
+    return (value ^ 0x8000) - 0x8000
+
+
+def _s32(units, pc):
+    value = units[pc] | (units[pc + 1] << 16)
+    return (value ^ 0x80000000) - 0x80000000
+
+
+# Formateadores de operandos por formato: (método, unidades, pc, opcode) -> texto
+# A/B son los nibbles de la primera unidad, AA su byte alto (notación de la especificación Dalvik)
+
+def _fmt_10x(m, units, pc, op):
+    return ''
+
+
+def _fmt_12x(m, units, pc, op):
+    unit = units[pc]
+    return f'{m.reg((unit >> 8) & 0xF)}, {m.reg(unit >> 12)}'
+
+
+def _fmt_11n(m, units, pc, op):
+    unit = units[pc]
+    return f'{m.reg((unit >> 8) & 0xF)}, {_literal(((unit >> 12) ^ 8) - 8)}'
+
+
+def _fmt_11x(m, units, pc, op):
+    return m.reg(units[pc] >> 8)
+
+
+def _fmt_10t(m, units, pc, op):
+    return m.label(pc + _s8(units[pc] >> 8), 'goto')
+
+
+def _fmt_20t(m, units, pc, op):
+    return m.label(pc + _s16(units[pc + 1]), 'goto')
+
+
+def _fmt_30t(m, units, pc, op):
+    return m.label(pc + _s32(units, pc + 1), 'goto')
+
+
+def _fmt_22x(m, units, pc, op):
+    return f'{m.reg(units[pc] >> 8)}, {m.reg(units[pc + 1])}'
+
+
+def _fmt_32x(m, units, pc, op):
+    return f'{m.reg(units[pc + 1])}, {m.reg(units[pc + 2])}'
+
+
+def _fmt_21t(m, units, pc, op):
+    return f'{m.reg(units[pc] >> 8)}, {m.label(pc + _s16(units[pc + 1]), "cond")}'
+
+
+def _fmt_22t(m, units, pc, op):
+    unit = units[pc]
+    return f'{m.reg((unit >> 8) & 0xF)}, {m.reg(unit >> 12)}, {m.label(pc + _s16(units[pc + 1]), "cond")}'
+
+
+def _fmt_31t(m, units, pc, op):
+    return f'{m.reg(units[pc] >> 8)}, {m.label(pc + _s32(units, pc + 1), _PAYLOAD_LABELS.get(op))}'
+
+
+def _fmt_21s(m, units, pc, op):
+    return f'{m.reg(units[pc] >> 8)}, {_literal(_s16(units[pc + 1]))}'
+
+
+def _fmt_21h(m, units, pc, op):
+    if op in _WIDE_LITERALS:
+        return f'{m.reg(units[pc] >> 8)}, {_literal(_s16(units[pc + 1]) << 48, "L")}'
+    return f'{m.reg(units[pc] >> 8)}, {_literal(_s16(units[pc + 1]) << 16)}'
+
+
+def _fmt_31i(m, units, pc, op):
+    return f'{m.reg(units[pc] >> 8)}, {_literal(_s32(units, pc + 1))}'
+
+
+def _fmt_51l(m, units, pc, op):
+    value = units[pc + 1] | (units[pc + 2] << 16) | (units[pc + 3] << 32) | (units[pc + 4] << 48)
+    return f'{m.reg(units[pc] >> 8)}, {_literal((value ^ (1 << 63)) - (1 << 63), "L")}'
+
+
+def _fmt_21c(m, units, pc, op):
+    return f'{m.reg(units[pc] >> 8)}, {m.ref(op, units[pc + 1])}'
+
+
+def _fmt_31c(m, units, pc, op):
+    return f'{m.reg(units[pc] >> 8)}, {m.ref(op, units[pc + 1] | (units[pc + 2] << 16))}'
+
+
+def _fmt_22c(m, units, pc, op):
+    unit = units[pc]
+    return f'{m.reg((unit >> 8) & 0xF)}, {m.reg(unit >> 12)}, {m.ref(op, units[pc + 1])}'
+
+
+def _fmt_23x(m, units, pc, op):
+    operands = units[pc + 1]
+    return f'{m.reg(units[pc] >> 8)}, {m.reg(operands & 0xFF)}, {m.reg(operands >> 8)}'
+
+
+def _fmt_22b(m, units, pc, op):
+    operands = units[pc + 1]
+    return f'{m.reg(units[pc] >> 8)}, {m.reg(operands & 0xFF)}, {_literal(_s8(operands >> 8))}'
+
+
+def _fmt_22s(m, units, pc, op):
+    unit = units[pc]
+    return f'{m.reg((unit >> 8) & 0xF)}, {m.reg(unit >> 12)}, {_literal(_s16(units[pc + 1]))}'
+
+
+def _register_list(m, units, pc):
+    # {vC, vD, vE, vF, vG}: A = número de registros, G en el nibble bajo del byte alto
+    unit = units[pc]
+    count = unit >> 12
+    packed = units[pc + 2] | (((unit >> 8) & 0xF) << 16)
+    return '{' + ', '.join(m.reg((packed >> (4 * i)) & 0xF) for i in range(count)) + '}'
+
+
+def _register_range(m, units, pc):
+    count = units[pc] >> 8
+    if not count:
+        return '{}'
+    first = units[pc + 2]
+    return f'{{{m.reg(first)} .. {m.reg(first + count - 1)}}}'
+
+
+def _fmt_35c(m, units, pc, op):
+    return f'{_register_list(m, units, pc)}, {m.ref(op, units[pc + 1])}'
+
+
+def _fmt_3rc(m, units, pc, op):
+    return f'{_register_range(m, units, pc)}, {m.ref(op, units[pc + 1])}'
+
+
+def _fmt_45cc(m, units, pc, op):
+    return f'{_fmt_35c(m, units, pc, op)}, {m.proto(units[pc + 3])}'
+
+
+def _fmt_4rcc(m, units, pc, op):
+    return f'{_fmt_3rc(m, units, pc, op)}, {m.proto(units[pc + 3])}'
+
+
+_FORMATTERS = {
+    '10x': _fmt_10x, '12x': _fmt_12x, '11n': _fmt_11n, '11x': _fmt_11x,
+    '10t': _fmt_10t, '20t': _fmt_20t, '30t': _fmt_30t,
+    '22x': _fmt_22x, '32x': _fmt_32x, '21t': _fmt_21t, '22t': _fmt_22t, '31t': _fmt_31t,
+    '21s': _fmt_21s, '21h': _fmt_21h, '31i': _fmt_31i, '51l': _fmt_51l,
+    '21c': _fmt_21c, '31c': _fmt_31c, '22c': _fmt_22c,
+    '23x': _fmt_23x, '22b': _fmt_22b, '22s': _fmt_22s,
+    '35c': _fmt_35c, '3rc': _fmt_3rc, '45cc': _fmt_45cc, '4rcc': _fmt_4rcc
+}
+
+# Tabla de decodificación por opcode: (nombre, formateador, tipo de índice)
+_DECODERS = tuple((op.name, _FORMATTERS[op.format], op.index) for op in OPCODES)
+
+
+class _MethodWriter:
+    """Estado de un método durante el desensamblado: nombres de registros, etiquetas y referencias"""
+
+    def __init__(self, disassembler, code, units):
+        self.disassembler = disassembler
+        self.units = units
+        # Los parámetros ocupan los últimos registros (p0 = this en métodos de instancia)
+        self.first_param = code.registers_size - code.ins_size
+        self.labels = {}
+        self._registers = {}
+
+    def reg(self, number):
+        name = self._registers.get(number)
+        if name is None:
+            if number >= self.first_param:
+                name = f'p{number - self.first_param}'
+            else:
+                name = f'v{number}'
+            self._registers[number] = name
+        return name
+
+    def label(self, address, prefix):
+        # Las etiquetas se registran en la primera pasada; cada referencia usa la de su tipo
+        # (un goto y un caso de switch al mismo destino llevan etiquetas distintas, como en baksmali)
+        name = f'{prefix}_{address:x}'
+        if name in self.labels.get(address, ()):
+            return ':' + name
+        return f':addr_{address:x}'
+
+    def ref(self, op, idx):
+        return self.disassembler.reference(_DECODERS[op][2], idx)
+
+    def proto(self, idx):
+        return self.disassembler.resolver.resolve(INDEX_PROTO, idx)
+
+    def add_label(self, address, prefix):
+        name = f'{prefix}_{address:x}'
+        names = self.labels.setdefault(address, [])
+        if name not in names:
+            names.append(name)
+        return name
+
+
+class DexDisassembler:
+    """Desensamblador perezoso de un DEX: cada clase o método se decodifica al pedirlo"""
+
+    def __init__(self, dex):
+        self.dex = dex
+        self.resolver = ReferenceResolver(dex)
+        self._class_index = None
+
+    def class_names(self):
+        """Descriptores de las clases definidas, en el orden del DEX"""
+        return [self.resolver.type_name(idx) for idx in self.dex.class_def_types()]
+
+    def class_def(self, name):
+        """class_def de una clase por descriptor (Lcom/app/Main;) o nombre Java (com.app.Main)"""
+        if self._class_index is None:
+            self._class_index = {descriptor: position for position, descriptor in enumerate(self.class_names())}
+        descriptor = to_descriptor(name)
+        position = self._class_index.get(descriptor)
+        if position is None and name.startswith('L') and not name.endswith(';'):
+            # Descriptor escrito sin el ';' final (Lcom/app/Main)
+            position = self._class_index.get(name + ';')
+        if position is None:
+            raise ValueError(f'Clase no definida en el DEX: {descriptor}')
+        return self.dex.class_defs[position]
+
+    def reference(self, kind, idx):
+        if kind == INDEX_STRING:
+            try:
+                return quote_string(self.resolver.string(idx))
+            except (IndexError, ValueError):
+                return f'string@{idx}?'
+        return self.resolver.resolve(kind, idx)
+
+    def methods(self, name):
+        """Firmas (nombre(params)retorno) de los métodos definidos en la clase"""
+        data = self.dex.class_data(self.class_def(name).class_data_off)
+        if data is None:
+            return []
+        return [self.resolver.method_member(method.method_idx)
+                for method in data.direct_methods + data.virtual_methods]
+
+    def disassemble_class(self, name):
+        """Archivo .smali completo de una clase"""
+        class_def = self.class_def(name)
+        resolver = self.resolver
+        lines = [f'.class {self._access(class_def.access_flags, _CLASS_ACCESS)}'
+                 f'{resolver.type_name(class_def.class_idx)}']
+        if class_def.superclass_idx != NO_INDEX:
+            lines.append(f'.super {resolver.type_name(class_def.superclass_idx)}')
+        if class_def.source_file_idx != NO_INDEX:
+            lines.append(f'.source {self.reference(INDEX_STRING, class_def.source_file_idx)}')
+
+        interfaces = self.dex.type_list_indices(class_def.interfaces_off)
+        if interfaces:
+            lines.extend(['', '# interfaces'])
+            lines.extend(f'.implements {resolver.type_name(idx)}' for idx in interfaces)
+
+        data = self.dex.class_data(class_def.class_data_off)
+        if data is not None:
+            for title, fields in (('# static fields', data.static_fields),
+                                  ('# instance fields', data.instance_fields)):
+                if fields:
+                    lines.extend(['', '', title])
+                    for field in fields:
+                        lines.append(f'.field {self._access(field.access_flags, _FIELD_ACCESS)}'
+                                     f'{resolver.field_member(field.field_idx)}')
+                        lines.append('')
+                    lines.pop()
+            for title, methods in (('# direct methods', data.direct_methods),
+                                   ('# virtual methods', data.virtual_methods)):
+                if methods:
+                    lines.extend(['', '', title])
+                    for method in methods:
+                        lines.append(self._method_text(method))
+                        lines.append('')
+                    lines.pop()
+        return '\n'.join(lines) + '\n'
+
+    def disassemble_method(self, name, member):
+        """Un solo método de la clase (member: nombre o nombre(params)retorno)"""
+        data = self.dex.class_data(self.class_def(name).class_data_off)
+        methods = data.direct_methods + data.virtual_methods if data else []
+        matches = [method for method in methods
+                   if self.resolver.method_member(method.method_idx) == member
+                   or self.resolver.method_member(method.method_idx).split('(', 1)[0] == member]
+        if not matches:
+            raise ValueError(f'Método no definido en {name}: {member}')
+        return '\n\n'.join(self._method_text(method) for method in matches) + '\n'
+
+    def iter_classes(self):
+        """(descriptor, smali) de cada clase; solo hay una clase decodificada en memoria"""
+        for descriptor in self.class_names():
+            yield descriptor, self.disassemble_class(descriptor)
+
+    @staticmethod
+    def _access(flags, table):
+        access = access_string(flags, table)
+        return access + ' ' if access else ''
+
+    def _method_text(self, method):
+        header = (f'.method {self._access(method.access_flags, _METHOD_ACCESS)}'
+                  f'{self.resolver.method_member(method.method_idx)}')
+        code = self.dex.code_item(method.code_off)
+        if code is None:
+            return header + '\n.end method'
+        lines = [header, f'    .registers {code.registers_size}']
+        lines.extend(self._code_lines(code))
+        lines.append('.end method')
+        return '\n'.join(lines)
+
+    def _code_lines(self, code):
+        units = self.dex.code_units(code)
+        writer = _MethodWriter(self, code, units)
+        total = len(units)
+
+        # Primera pasada: destinos de saltos, payloads y bloques try para nombrar las etiquetas
+        instructions = []
+        payload_owners = {}
+        for pc, opcode, length in iter_instructions(units):
+            instructions.append((pc, opcode))
+            if opcode is None:
+                continue
+            op_format = OPCODES[opcode].format
+            if op_format in _GOTO_FORMATS:
+                offset = (_s8(units[pc] >> 8) if op_format == '10t' else
+                          _s16(units[pc + 1]) if op_format == '20t' else _s32(units, pc + 1))
+                writer.add_label(pc + offset, 'goto')
+            elif op_format in _COND_FORMATS:
+                writer.add_label(pc + _s16(units[pc + 1]), 'cond')
+            elif opcode in _PAYLOAD_LABELS:
+                target = pc + _s32(units, pc + 1)
+                writer.add_label(target, _PAYLOAD_LABELS[opcode])
+                payload_owners[target] = pc
+
+        # Las etiquetas de los casos son relativas a la instrucción switch, no al payload
+        for target, owner in payload_owners.items():
+            if target + 1 >= total:
+                continue
+            ident = units[target]
+            if ident == PACKED_SWITCH_PAYLOAD:
+                for i in range(units[target + 1]):
+                    writer.add_label(owner + _s32(units, target + 4 + 2 * i), 'pswitch')
+            elif ident == SPARSE_SWITCH_PAYLOAD:
+                size = units[target + 1]
+                for i in range(size):
+                    writer.add_label(owner + _s32(units, target + 2 + 2 * (size + i)), 'sswitch')
+
+        # .catch al final de cada bloque try, antes del resto de etiquetas de esa dirección
+        catches = {}
+        for try_item in self.dex.try_items(code):
+            start = writer.add_label(try_item.start_addr, 'try_start')
+            end_address = try_item.start_addr + try_item.insn_count
+            end = f'try_end_{end_address:x}'
+            directives = catches.setdefault(end_address, [f'    :{end}'])
+            for type_idx, address in try_item.handlers:
+                handler = writer.add_label(address, 'catch')
+                directives.append(f'    .catch {self.reference(INDEX_TYPE, type_idx)} '
+                                  f'{{:{start} .. :{end}}} :{handler}')
+            if try_item.catch_all_addr is not None:
+                handler = writer.add_label(try_item.catch_all_addr, 'catchall')
+                directives.append(f'    .catchall {{:{start} .. :{end}}} :{handler}')
+
+        # Segunda pasada: una línea por instrucción con la tabla de decodificación. El fin de un
+        # bloque try y sus .catch siguen a su última instrucción; las etiquetas de una misma
+        # dirección van ordenadas por nombre
+        lines = []
+        for pc, opcode in instructions:
+            lines.extend(catches.pop(pc, ()))
+            lines.append('')
+            lines.extend(f'    :{name}' for name in sorted(writer.labels.get(pc, ())))
+            if opcode is None:
+                lines.extend(self._payload_lines(writer, units, pc, payload_owners.get(pc)))
+                continue
+            name, formatter, _ = _DECODERS[opcode]
+            operands = formatter(writer, units, pc, opcode)
+            lines.append(f'    {name} {operands}' if operands else f'    {name}')
+        for directives in catches.values():
+            lines.extend(directives)
+        return lines
+
+    def _payload_lines(self, writer, units, pc, owner):
+        ident = units[pc]
+        if ident == FILL_ARRAY_DATA_PAYLOAD:
+            width = units[pc + 1]
+            size = units[pc + 2] | (units[pc + 3] << 16)
+            data = units[pc + 4:pc + 4 + (size * width + 1) // 2].tobytes()
+            suffix = {1: 't', 2: 's', 8: 'L'}.get(width, '')
+            lines = [f'    .array-data {width}']
+            for i in range(size):
+                value = int.from_bytes(data[i * width:(i + 1) * width], 'little', signed=True)
+                lines.append(f'        {_literal(value, suffix)}')
+            lines.append('    .end array-data')
+            return lines
+
+        # Payload sin instrucción switch que lo use: se deja como comentario
+        if owner is None:
+            return [f'    # payload sin referencias (0x{ident:04x})']
+        if ident == PACKED_SWITCH_PAYLOAD:
+            lines = [f'    .packed-switch {_literal(_s32(units, pc + 2))}']
+            lines.extend(f'        {writer.label(owner + _s32(units, pc + 4 + 2 * i), "pswitch")}'
+                         for i in range(units[pc + 1]))
+            lines.append('    .end packed-switch')
+            return lines
+        size = units[pc + 1]
+        lines = ['    .sparse-switch']
+        for i in range(size):
+            key = _s32(units, pc + 2 + 2 * i)
+            target = owner + _s32(units, pc + 2 + 2 * (size + i))
+            lines.append(f'        {_literal(key)} -> {writer.label(target, "sswitch")}')
+        lines.append('    .end sparse-switch')
+        return lines
+
+
+def smali_path(descriptor):
+    """Ruta del .smali de una clase con la estructura de baksmali (com/app/Main.smali)"""
+    name = descriptor[1:-1] if descriptor.startswith('L') and descriptor.endswith(';') else descriptor
+    # Componentes vacíos o relativos no pueden salir del directorio al extraer el ZIP
+    parts = [part if part not in ('', '.', '..') else '_' for part in name.split('/')]
+    return '/'.join(parts) + '.smali'
+
+
+def smali_directory(dex_name):
+    """Directorio de salida de un DEX como en apktool: smali, smali_classes2, ..."""
+    stem = os.path.splitext(os.path.basename(dex_name))[0]
+    return 'smali' if stem in ('', 'classes') else f'smali_{stem}'
+
+
+def write_smali_zip(dex_files, output, max_errors=100):
+    """Vuelca todas las clases de [(nombre, DexFile)] a un ZIP clase a clase; las clases que
+    fallan se anotan y se continúa con el resto"""
+    stats = {'classes': 0, 'errors': [], 'error_count': 0}
+    started = time.perf_counter()
+    directories = set()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for dex_name, dex in dex_files:
+            # Varios APKs o DEX con el mismo nombre no se mezclan en un directorio
+            directory = base = smali_directory(dex_name)
+            while directory in directories:
+                directory = f'{base}_{len(directories)}'
+            directories.add(directory)
+            disassembler = DexDisassembler(dex)
+            for descriptor in disassembler.class_names():
+                try:
+                    text = disassembler.disassemble_class(descriptor)
+                except Exception as e:
+                    stats['error_count'] += 1
+                    if len(stats['errors']) < max_errors:
+                        stats['errors'].append({'dex': dex_name, 'class': descriptor, 'error': str(e)})
+                    continue
+                archive.writestr(f'{directory}/{smali_path(descriptor)}',
+                                 text.encode('utf-8', 'surrogatepass'))
+                stats['classes'] += 1
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Desensamblador de DEX a SMALI')
+    parser.add_argument('dex', nargs='+', help='Archivos .dex')
+    parser.add_argument('-o', '--output', help='ZIP de salida con todas las clases')
+    parser.add_argument('-c', '--class', dest='class_name', help='Clase a mostrar (Lcom/app/Main; o com.app.Main)')
+    parser.add_argument('-m', '--method', help='Método de la clase (nombre o nombre(params)retorno)')
+    args = parser.parse_args(argv)
+
+    dex_files = [(path, DexFile.open(path)) for path in args.dex]
+    try:
+        if args.class_name:
+            for _, dex in dex_files:
+                disassembler = DexDisassembler(dex)
+                try:
+                    if args.method:
+                        text = disassembler.disassemble_method(args.class_name, args.method)
+                    else:
+                        text = disassembler.disassemble_class(args.class_name)
+                except ValueError:
+                    continue
+                sys.stdout.write(text)
+                return 0
+            print(f'Clase no encontrada: {args.class_name}', file=sys.stderr)
+            return 1
+
+        if not args.output:
+            parser.error('Indica --class o --output')
+        stats = write_smali_zip(dex_files, args.output)
+        print(f"{stats['classes']} clases en {stats['seconds']:.2f} s "
+              f"({stats['error_count']} con errores) -> {args.output}", file=sys.stderr)
+        return 0
+    finally:
+        for _, dex in dex_files:
+            dex.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
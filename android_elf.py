@@ -0,0 +1,276 @@
+"""
+Lector de librerías nativas ELF (.so)
+Lee cabecera, secciones, tabla dinámica y .dynsym/.dynstr directamente del buffer (mmap o bytes)
+"""
+
+import struct
+from collections import namedtuple
+
+
+ELF_MAGIC = b'\x7fELF'
+
+# e_ident
+ELFCLASS32 = 1
+ELFCLASS64 = 2
+ELFDATA2LSB = 1
+ELFDATA2MSB = 2
+
+# Arquitecturas habituales en APKs
+MACHINES = {
+    3: 'x86',
+    8: 'mips',
+    40: 'arm',
+    62: 'x86_64',
+    183: 'aarch64',
+    243: 'riscv'
+}
+
+# Tipos de sección y de segmento
+SHT_SYMTAB = 2
+SHT_DYNAMIC = 6
+SHT_DYNSYM = 11
+PT_LOAD = 1
+PT_DYNAMIC = 2
+
+# Entradas de la tabla dinámica
+DT_NULL = 0
+DT_NEEDED = 1
+DT_STRTAB = 5
+DT_STRSZ = 10
+DT_SONAME = 14
+
+# Símbolos
+SHN_UNDEF = 0
+STB_GLOBAL = 1
+STB_WEAK = 2
+STV_DEFAULT = 0
+STV_PROTECTED = 3
+
+# Puntos de entrada JNI exportados por una librería
+JNI_ENTRY_POINTS = ('JNI_OnLoad', 'JNI_OnUnload')
+JNI_PREFIX = 'Java_'
+
+Section = namedtuple('Section', 'name type flags addr offset size link entsize')
+Segment = namedtuple('Segment', 'type offset vaddr filesz')
+Symbol = namedtuple('Symbol', 'name value size bind type visibility shndx')
+
+# Formatos por clase (32/64 bits): cabecera desde e_type, sección, segmento, dinámica, símbolo
+_LAYOUTS = {
+    ELFCLASS32: {
+        'header': 'HHIIIIIHHHHHH',
+        'section': 'IIIIIIIIII',
+        'segment': 'IIIIIIII',
+        'dynamic': 'iI',
+        'symbol': 'IIIBBH'
+    },
+    ELFCLASS64: {
+        'header': 'HHIQQQIHHHHHH',
+        'section': 'IIQQQQIIQQ',
+        'segment': 'IIQQQQQQ',
+        'dynamic': 'qQ',
+        'symbol': 'IBBHQQ'
+    }
+}
+
+
+class ElfFile:
+    """Librería ELF sobre un buffer (bytes, mmap o memoryview) sin copiarla ni extraerla"""
+
+    def __init__(self, data):
+        self._buf = data
+        self.size = len(data)
+
+        if len(data) < 16 or bytes(data[:4]) != ELF_MAGIC:
+            raise ValueError('No es un archivo ELF válido')
+
+        self.elf_class = data[4]
+        if self.elf_class not in _LAYOUTS:
+            raise ValueError('Clase ELF no soportada')
+        self.bits = 64 if self.elf_class == ELFCLASS64 else 32
+        self._endian = '>' if data[5] == ELFDATA2MSB else '<'
+
+        layout = _LAYOUTS[self.elf_class]
+        self._structs = {key: struct.Struct(self._endian + fmt) for key, fmt in layout.items()}
+
+        (self.type, self.machine_id, _, self.entry, self.phoff, self.shoff, self.flags,
+         _, self.phentsize, self.phnum, self.shentsize, self.shnum,
+         self.shstrndx) = self._structs['header'].unpack_from(data, 16)
+        self.machine = MACHINES.get(self.machine_id, f'machine-{self.machine_id}')
+
+        self._sections = None
+        self._segments = None
+        self._strtabs = {}
+
+    def _string_table(self, offset, limit):
+        """Copia (memoizada) de una tabla de strings; son pequeñas frente al resto del ELF"""
+        key = (offset, limit)
+        table = self._strtabs.get(key)
+        if table is None:
+            table = self._strtabs[key] = bytes(self._buf[offset:min(limit, self.size)])
+        return table
+
+    @staticmethod
+    def _cstring(table, offset):
+        """String terminado en cero dentro de una tabla de strings"""
+        end = table.find(b'\0', offset)
+        return table[offset:end if end >= 0 else len(table)].decode('utf-8', errors='replace')
+
+    def sections(self):
+        """Tabla de secciones (vacía si la librería no la conserva)"""
+        if self._sections is None:
+            sections = []
+            if self.shoff and self.shnum and self.shoff + self.shnum * self.shentsize <= self.size:
+                record = self._structs['section']
+                raw = [record.unpack_from(self._buf, self.shoff + i * self.shentsize)
+                       for i in range(self.shnum)]
+                names = b''
+                if self.shstrndx < len(raw):
+                    names_off, names_size = raw[self.shstrndx][4], raw[self.shstrndx][5]
+                    names = self._string_table(names_off, names_off + names_size)
+                for (name, sh_type, flags, addr, offset, size, link, _, _, entsize) in raw:
+                    label = self._cstring(names, name) if name < len(names) else ''
+                    sections.append(Section(label, sh_type, flags, addr, offset, size, link, entsize))
+            self._sections = sections
+        return self._sections
+
+    def section(self, name):
+        for section in self.sections():
+            if section.name == name:
+                return section
+        return None
+
+    def segments(self):
+        """Cabeceras de programa (segmentos)"""
+        if self._segments is None:
+            segments = []
+            if self.phoff and self.phnum and self.phoff + self.phnum * self.phentsize <= self.size:
+                record = self._structs['segment']
+                for i in range(self.phnum):
+                    values = record.unpack_from(self._buf, self.phoff + i * self.phentsize)
+                    if self.elf_class == ELFCLASS64:
+                        p_type, _, offset, vaddr, _, filesz, _, _ = values
+                    else:
+                        p_type, offset, vaddr, _, filesz, _, _, _ = values
+                    segments.append(Segment(p_type, offset, vaddr, filesz))
+            self._segments = segments
+        return self._segments
+
+    def _vaddr_to_offset(self, vaddr):
+        """Offset en el archivo de una dirección virtual según los segmentos PT_LOAD"""
+        for segment in self.segments():
+            if segment.type == PT_LOAD and segment.vaddr <= vaddr < segment.vaddr + segment.filesz:
+                return segment.offset + vaddr - segment.vaddr
+        return None
+
+    def dynamic_entries(self):
+        """(tag, valor) de la tabla dinámica; sin secciones se usa el segmento PT_DYNAMIC"""
+        dynamic = next((s for s in self.sections() if s.type == SHT_DYNAMIC), None)
+        if dynamic is not None:
+            offset, size = dynamic.offset, dynamic.size
+        else:
+            segment = next((s for s in self.segments() if s.type == PT_DYNAMIC), None)
+            if segment is None:
+                return []
+            offset, size = segment.offset, segment.filesz
+
+        record = self._structs['dynamic']
+        size = min(size, self.size - offset) // record.size * record.size
+        entries = []
+        for tag, value in record.iter_unpack(self._buf[offset:offset + size]):
+            if tag == DT_NULL:
+                break
+            entries.append((tag, value))
+        return entries
+
+    def _dynamic_strings(self, entries):
+        """Offset y límite de la tabla de strings dinámica"""
+        dynstr = self.section('.dynstr')
+        if dynstr is not None:
+            return dynstr.offset, dynstr.offset + dynstr.size
+        values = dict(entries)
+        offset = self._vaddr_to_offset(values.get(DT_STRTAB, 0))
+        if offset is None:
+            return None, None
+        return offset, min(self.size, offset + values.get(DT_STRSZ, self.size - offset))
+
+    def needed(self):
+        """Dependencias DT_NEEDED y soname"""
+        entries = self.dynamic_entries()
+        start, limit = self._dynamic_strings(entries)
+        if start is None:
+            return [], None
+        table = self._string_table(start, limit)
+        needed = [self._cstring(table, value) for tag, value in entries if tag == DT_NEEDED]
+        soname = next((self._cstring(table, value) for tag, value in entries
+                       if tag == DT_SONAME), None)
+        return needed, soname
+
+    def dynamic_symbols(self):
+        """Símbolos de .dynsym con su nombre en .dynstr"""
+        dynsym = next((s for s in self.sections() if s.type == SHT_DYNSYM), None)
+        if dynsym is None:
+            return []
+        sections = self.sections()
+        strtab = sections[dynsym.link] if dynsym.link < len(sections) else None
+        if strtab is None:
+            return []
+        table = self._string_table(strtab.offset, strtab.offset + strtab.size)
+
+        record = self._structs['symbol']
+        entsize = dynsym.entsize or record.size
+        count = min(dynsym.size, self.size - dynsym.offset) // entsize
+        block = self._buf[dynsym.offset:dynsym.offset + count * entsize]
+        if entsize != record.size:
+            block = b''.join(bytes(block[i * entsize:i * entsize + record.size]) for i in range(count))
+
+        symbols = []
+        for values in record.iter_unpack(block):
+            if self.elf_class == ELFCLASS64:
+                name, info, other, shndx, value, size = values
+            else:
+                name, value, size, info, other, shndx = values
+            if not name:
+                continue
+            symbols.append(Symbol(self._cstring(table, name), value, size,
+                                  info >> 4, info & 0xF, other & 0x3, shndx))
+        return symbols
+
+    def is_stripped(self):
+        """Sin tabla .symtab (solo quedan los símbolos dinámicos)"""
+        return not any(section.type == SHT_SYMTAB for section in self.sections())
+
+    def has_debug_info(self):
+        return any(section.name.startswith(('.debug_', '.zdebug_')) for section in self.sections())
+
+
+def summarize_elf(data):
+    """Resumen de una librería: arquitectura, dependencias, exports/imports, JNI y strip"""
+    elf = ElfFile(data)
+    needed, soname = elf.needed()
+
+    exports = []
+    imports = []
+    for symbol in elf.dynamic_symbols():
+        if symbol.shndx == SHN_UNDEF:
+            imports.append(symbol.name)
+        elif (symbol.bind in (STB_GLOBAL, STB_WEAK)
+              and symbol.visibility in (STV_DEFAULT, STV_PROTECTED)):
+            exports.append(symbol.name)
+
+    exports = sorted(set(exports))
+    jni = [name for name in exports if name.startswith(JNI_PREFIX) or name in JNI_ENTRY_POINTS]
+    return {
+        'machine': elf.machine,
+        'bits': elf.bits,
+        'soname': soname,
+        'needed': needed,
+        'exports': exports,
+        'imports': sorted(set(imports)),
+        'export_count': len(exports),
+        'import_count': len(set(imports)),
+        'jni_methods': jni,
+        'has_jni_onload': 'JNI_OnLoad' in exports,
+        'stripped': elf.is_stripped(),
+        'debug_info': elf.has_debug_info(),
+        'section_count': len(elf.sections())
+    }
@@ -0,0 +1,233 @@
+"""
+Analizador léxico de JavaScript
+Recorre cada fuente una sola vez y alimenta estadísticas, dependencias y componentes
+"""
+
+import re
+from bisect import bisect_right
+
+
+# Tipos de token
+COMMENT = 'comment'
+STRING = 'string'
+TEMPLATE = 'template'
+REGEX = 'regex'
+KEYWORD = 'keyword'
+JSX = 'jsx'
+
+# Solo se emiten las unidades léxicas que usan los análisis; el código restante
+# (identificadores, operadores, números) lo salta el motor de regex sin pasar por Python
+_TOKEN_RE = re.compile(r'''
+    (?=[/"'`<a-z])
+    (?:
+        (?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+      | (?P<string>"(?:\\[\s\S]|[^"\\\n])*"|'(?:\\[\s\S]|[^'\\\n])*')
+      | (?P<template>`(?:\\[\s\S]|[^`\\])*(?:`|\Z))
+      | (?P<keyword>(?<![\w$.])(?:function|class|const|import|export|require)(?![\w$]))
+      | (?P<slash>/)
+      | (?P<jsx><(?=[A-Za-z>]))
+    )
+''', re.VERBOSE)
+
+_REGEX_RE = re.compile(r'/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*')
+_WORD_BEFORE_RE = re.compile(r'[\w$]+\Z')
+
+# Lo que sigue a cada palabra clave
+_NAME = r'[A-Za-z_$][\w$]*'
+_SPECIFIER = r'''(["'])([^"'\n]*)\1'''
+_FUNCTION_RE = re.compile(r'\s*\*?\s*(' + _NAME + r')\s*\(')
+_CLASS_RE = re.compile(r'\s+(' + _NAME + r')(?:\s+extends\s+(?:React\s*\.\s*)?(' + _NAME + r'))?')
+_ARROW_RE = re.compile(
+    r'\s+(' + _NAME + r')\s*=\s*(?:async\s*)?'
+    r'(?:\((?:[^()]|\([^()]*\))*\)|' + _NAME + r')\s*=>'
+)
+_FROM_RE = re.compile(r'''[^;"'`]*?\bfrom\s*''' + _SPECIFIER)
+_SIDE_EFFECT_RE = re.compile(r'\s*' + _SPECIFIER)
+_CALL_RE = re.compile(r'\s*\(\s*' + _SPECIFIER)
+
+# Palabras tras las que empieza una expresión ('/' abre un regex y '<' un elemento JSX)
+_EXPRESSION_KEYWORDS = frozenset((
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+    'throw', 'case', 'do', 'else', 'yield', 'await'
+))
+
+_REACT_BASES = frozenset(('Component', 'PureComponent'))
+
+# Marcas por línea
+LINE_CODE = 0x1
+LINE_COMMENT = 0x2
+
+
+def _expects_operand(text, pos):
+    """Indica si en pos empieza un operando (y no un operador) mirando el código anterior"""
+    index = pos - 1
+    while index >= 0 and text[index] in ' \t\r\n':
+        index -= 1
+    if index < 0:
+        return True
+    char = text[index]
+    if char in ')]}"\'`':
+        return False
+    if char.isalnum() or char in '_$':
+        word = _WORD_BEFORE_RE.search(text, max(0, index - 15), index + 1)
+        return word is not None and word.group() in _EXPRESSION_KEYWORDS
+    return True
+
+
+def tokenize(text):
+    """Genera los tokens (tipo, valor, inicio, fin): comentarios, strings, templates,
+    regex, palabras clave de declaración y aperturas JSX"""
+    pos = 0
+    while True:
+        for match in _TOKEN_RE.finditer(text, pos):
+            kind = match.lastgroup
+            start, end = match.span()
+            if kind == 'slash':
+                # '/' abre un regex solo donde se espera un operando; si no, es una división
+                # ('</' es el cierre de un elemento JSX)
+                if text[start - 1:start] == '<' or not _expects_operand(text, start):
+                    continue
+                literal = _REGEX_RE.match(text, start)
+                if literal is None:
+                    continue
+                # El regex puede contener comillas o '//': se reanuda el escaneo tras él
+                pos = literal.end()
+                yield REGEX, literal.group(), start, pos
+                break
+            if kind == JSX and not _expects_operand(text, start):
+                continue
+            yield kind, match.group(), start, end
+        else:
+            return
+
+
+def count_lines(text):
+    """Número de líneas de un texto (la última no necesita salto de línea)"""
+    if not text:
+        return 0
+    return text.count('\n') + (0 if text.endswith('\n') else 1)
+
+
+def strip_comments(text, comments):
+    """Texto sin comentarios; los de bloque conservan sus saltos de línea para no mover la numeración"""
+    pieces = []
+    pos = 0
+    for start, end in comments:
+        pieces.append(text[pos:start])
+        pieces.append('\n' * text.count('\n', start, end))
+        pos = end
+    pieces.append(text[pos:])
+    return ''.join(pieces)
+
+
+def _line_flags(text, comments):
+    """Marca cada línea como código, comentario o ambas (0 = en blanco)"""
+    line_flags = bytearray(count_lines(text))
+    total = len(line_flags)
+
+    newlines = [match.start() for match in re.finditer('\n', text)] if comments else []
+    for start, end in comments:
+        first = bisect_right(newlines, start - 1)
+        last = min(bisect_right(newlines, end - 2), total - 1)
+        for index in range(first, last + 1):
+            line_flags[index] |= LINE_COMMENT
+
+    for index, line in enumerate(strip_comments(text, comments).split('\n')[:total]):
+        if line.strip():
+            line_flags[index] |= LINE_CODE
+    return line_flags
+
+
+def analyze_source(text):
+    """Recorre los tokens una vez y resume funciones, clases, componentes, imports y comentarios"""
+    functions = []
+    classes = []
+    components = []
+    dependencies = []
+    comments = []
+    imports = 0
+    exports = 0
+    jsx_used = False
+
+    for kind, value, start, end in tokenize(text):
+        if kind == COMMENT:
+            comments.append((start, end))
+
+        elif kind == JSX:
+            jsx_used = True
+
+        elif kind == KEYWORD:
+            if value == 'function':
+                match = _FUNCTION_RE.match(text, end)
+                if match:
+                    functions.append(match.group(1))
+                    if match.group(1)[0].isupper():
+                        components.append(match.group(1))
+
+            elif value == 'class':
+                match = _CLASS_RE.match(text, end)
+                if match:
+                    classes.append(match.group(1))
+                    # class X extends Component / class X extends React.Component
+                    if match.group(2) in _REACT_BASES:
+                        components.append(match.group(1))
+
+            elif value == 'const':
+                # const Nombre = (...) => / const Nombre = async (...) => / const Nombre = x =>
+                match = _ARROW_RE.match(text, end)
+                if match:
+                    functions.append(match.group(1))
+                    if match.group(1)[0].isupper():
+                        components.append(match.group(1))
+
+            elif value == 'require':
+                match = _CALL_RE.match(text, end)
+                if match:
+                    dependencies.append(match.group(2))
+
+            elif value == 'import':
+                # import('x') dinámico, import 'x' (solo efectos) o import ... from 'x'
+                match = _CALL_RE.match(text, end)
+                if not match:
+                    match = _SIDE_EFFECT_RE.match(text, end) or _FROM_RE.match(text, end)
+                    if match:
+                        imports += 1
+                if match:
+                    dependencies.append(match.group(2))
+
+            else:
+                exports += 1
+                match = _FROM_RE.match(text, end)
+                if match:
+                    # export ... from 'x'
+                    dependencies.append(match.group(2))
+
+    line_flags = _line_flags(text, comments)
+    return {
+        'total_lines': len(line_flags),
+        'code_lines': sum(1 for flags in line_flags if flags & LINE_CODE),
+        'comment_lines': line_flags.count(LINE_COMMENT),
+        'blank_lines': line_flags.count(0),
+        'functions': functions,
+        'classes': classes,
+        'components': components,
+        'imports': imports,
+        'exports': exports,
+        'dependencies': dependencies,
+        'jsx_used': jsx_used,
+        'comments': comments,
+        'line_flags': bytes(line_flags)
+    }
+
+
+def iter_code_lines(text, summary):
+    """Líneas (número, texto) del fuente sin comentarios; se omiten las que solo eran comentario"""
+    line_flags = summary['line_flags']
+    lines = strip_comments(text, summary['comments']).split('\n')
+    for index, flags in enumerate(line_flags):
+        if flags == LINE_COMMENT:
+            continue
+        line = lines[index].rstrip('\r')
+        if flags & LINE_COMMENT:
+            line = line.rstrip()
+        yield index + 1, line
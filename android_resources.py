@@ -0,0 +1,555 @@
+"""
+Parsers de los formatos binarios de recursos de Android
+XML binario (AXML) de AndroidManifest.xml y tabla de recursos resources.arsc
+"""
+
+import struct
+import xml.etree.ElementTree as ET
+
+
+# Tipos de chunk (ResChunk_header.type)
+RES_STRING_POOL_TYPE = 0x0001
+RES_TABLE_TYPE = 0x0002
+RES_XML_TYPE = 0x0003
+RES_XML_START_NAMESPACE_TYPE = 0x0100
+RES_XML_END_NAMESPACE_TYPE = 0x0101
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_END_ELEMENT_TYPE = 0x0103
+RES_XML_CDATA_TYPE = 0x0104
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+RES_TABLE_PACKAGE_TYPE = 0x0200
+RES_TABLE_TYPE_TYPE = 0x0201
+
+# Flags de ResTable_type y ResTable_entry
+TYPE_FLAG_SPARSE = 0x01
+TYPE_FLAG_OFFSET16 = 0x02
+ENTRY_FLAG_COMPLEX = 0x0001
+ENTRY_FLAG_COMPACT = 0x0008
+
+# Tipos de valor (Res_value.dataType)
+TYPE_NULL = 0x00
+TYPE_REFERENCE = 0x01
+TYPE_ATTRIBUTE = 0x02
+TYPE_STRING = 0x03
+TYPE_FLOAT = 0x04
+TYPE_DIMENSION = 0x05
+TYPE_FRACTION = 0x06
+TYPE_DYNAMIC_REFERENCE = 0x07
+TYPE_INT_DEC = 0x10
+TYPE_INT_HEX = 0x11
+TYPE_INT_BOOLEAN = 0x12
+TYPE_FIRST_COLOR_INT = 0x1C
+TYPE_LAST_COLOR_INT = 0x1F
+
+ANDROID_NS = 'http://schemas.android.com/apk/res/android'
+
+_UTF8_FLAG = 0x100
+NO_ENTRY = 0xFFFFFFFF
+
+_CHUNK_HEADER = struct.Struct('<HHI')
+_DIMENSION_UNITS = ['px', 'dip', 'sp', 'pt', 'in', 'mm']
+_FRACTION_UNITS = ['%', '%p']
+_RADIX_MULTS = [1.0 / (1 << 8), 1.0 / (1 << 15), 1.0 / (1 << 23), 1.0 / (1 << 31)]
+
+# Atributos android:* más comunes por ID de recurso, para manifests ofuscados
+# en los que el nombre del atributo se ha eliminado del pool de strings
+ANDROID_ATTRS = {
+    0x01010000: 'theme',
+    0x01010001: 'label',
+    0x01010002: 'icon',
+    0x01010003: 'name',
+    0x01010006: 'permission',
+    0x01010009: 'protectionLevel',
+    0x0101000F: 'debuggable',
+    0x01010010: 'exported',
+    0x01010011: 'process',
+    0x01010018: 'authorities',
+    0x0101020C: 'minSdkVersion',
+    0x0101021B: 'versionCode',
+    0x0101021C: 'versionName',
+    0x01010270: 'targetSdkVersion',
+    0x01010271: 'maxSdkVersion',
+    0x01010280: 'allowBackup',
+    0x0101028E: 'required',
+    0x010102B7: 'installLocation',
+    0x010103AF: 'supportsRtl',
+    0x010104EA: 'extractNativeLibs',
+    0x010104EC: 'usesCleartextTraffic',
+    0x01010527: 'networkSecurityConfig',
+    0x0101052C: 'roundIcon',
+    0x01010572: 'compileSdkVersion',
+    0x0101057A: 'appComponentFactory',
+}
+
+
+class StringPool:
+    """Pool de strings (ResStringPool) con decodificación perezosa por índice"""
+
+    def __init__(self, buf, offset):
+        _, header_size, self.chunk_size = _CHUNK_HEADER.unpack_from(buf, offset)
+        count, _, flags, strings_start, _ = struct.unpack_from('<5I', buf, offset + 8)
+        self._buf = buf
+        self._utf8 = bool(flags & _UTF8_FLAG)
+        self._offsets = struct.unpack_from(f'<{count}I', buf, offset + header_size)
+        self._data = offset + strings_start
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if index == NO_ENTRY or not 0 <= index < len(self._offsets):
+            return None
+        value = self._cache.get(index)
+        if value is None:
+            value = self._decode(self._data + self._offsets[index])
+            self._cache[index] = value
+        return value
+
+    def _decode(self, pos):
+        buf = self._buf
+        if self._utf8:
+            # Longitud en UTF-16 y luego en bytes UTF-8, cada una en 1 o 2 bytes
+            pos += 2 if buf[pos] & 0x80 else 1
+            length = buf[pos]
+            if length & 0x80:
+                length = (length & 0x7F) << 8 | buf[pos + 1]
+                pos += 2
+            else:
+                pos += 1
+            return bytes(buf[pos:pos + length]).decode('utf-8', errors='replace')
+
+        length = struct.unpack_from('<H', buf, pos)[0]
+        pos += 2
+        if length & 0x8000:
+            length = (length & 0x7FFF) << 16 | struct.unpack_from('<H', buf, pos)[0]
+            pos += 2
+        return bytes(buf[pos:pos + length * 2]).decode('utf-16-le', errors='replace')
+
+
+def _complex_value(data, units):
+    mantissa = (data >> 8) & 0xFFFFFF
+    if mantissa & 0x800000:
+        mantissa -= 1 << 24
+    value = mantissa * _RADIX_MULTS[(data >> 4) & 0x3]
+    unit = units[data & 0xF] if (data & 0xF) < len(units) else ''
+    return f'{value:g}{unit}'
+
+
+def format_value(data_type, data, strings, raw_value=NO_ENTRY):
+    """Convierte un Res_value a su representación textual"""
+    if data_type == TYPE_STRING:
+        return strings[data] or ''
+    if raw_value != NO_ENTRY and strings[raw_value] is not None:
+        return strings[raw_value]
+    if data_type == TYPE_INT_DEC:
+        return str(struct.unpack('<i', struct.pack('<I', data))[0])
+    if data_type == TYPE_INT_HEX:
+        return f'0x{data:08x}'
+    if data_type == TYPE_INT_BOOLEAN:
+        return 'true' if data else 'false'
+    if data_type in (TYPE_REFERENCE, TYPE_DYNAMIC_REFERENCE):
+        return f'@0x{data:08x}'
+    if data_type == TYPE_ATTRIBUTE:
+        return f'?0x{data:08x}'
+    if data_type == TYPE_FLOAT:
+        return f"{struct.unpack('<f', struct.pack('<I', data))[0]:g}"
+    if data_type == TYPE_DIMENSION:
+        return _complex_value(data, _DIMENSION_UNITS)
+    if data_type == TYPE_FRACTION:
+        return _complex_value(data, _FRACTION_UNITS)
+    if TYPE_FIRST_COLOR_INT <= data_type <= TYPE_LAST_COLOR_INT:
+        return f'#{data:08x}'
+    if data_type == TYPE_NULL:
+        return ''
+    return f'0x{data:08x}'
+
+
+def is_axml(data):
+    """True si los datos empiezan con un chunk RES_XML_TYPE"""
+    return len(data) >= 8 and _CHUNK_HEADER.unpack_from(data, 0)[0] == RES_XML_TYPE
+
+
+def iter_axml_events(data):
+    """Recorre un AXML chunk a chunk y genera eventos ('start'|'end'|'ns'|'text', ...)"""
+    if not is_axml(data):
+        raise ValueError('No es un XML binario de Android (AXML)')
+
+    strings = None
+    resource_ids = ()
+    prefixes = {}
+    end = min(len(data), _CHUNK_HEADER.unpack_from(data, 0)[2])
+    pos = _CHUNK_HEADER.unpack_from(data, 0)[1]
+
+    while pos + 8 <= end:
+        chunk_type, header_size, chunk_size = _CHUNK_HEADER.unpack_from(data, pos)
+        if chunk_size < 8:
+            raise ValueError(f'Chunk AXML corrupto en el offset {pos}')
+
+        if chunk_type == RES_STRING_POOL_TYPE:
+            strings = StringPool(data, pos)
+
+        elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+            count = (chunk_size - header_size) // 4
+            resource_ids = struct.unpack_from(f'<{count}I', data, pos + header_size)
+
+        elif chunk_type == RES_XML_START_NAMESPACE_TYPE:
+            prefix_idx, uri_idx = struct.unpack_from('<2I', data, pos + header_size)
+            prefix, uri = strings[prefix_idx], strings[uri_idx]
+            prefixes[uri] = prefix
+            yield ('ns', prefix, uri)
+
+        elif chunk_type == RES_XML_START_ELEMENT_TYPE:
+            ext = pos + header_size
+            (_, name_idx, attr_start, attr_size,
+             attr_count) = struct.unpack_from('<2I3H', data, ext)
+            attrs = {}
+            attr_pos = ext + attr_start
+            for _ in range(attr_count):
+                (ns_idx, attr_name_idx, raw_idx, _, _,
+                 data_type, value) = struct.unpack_from('<3IHBBI', data, attr_pos)
+                attr_pos += attr_size
+
+                attr_name = strings[attr_name_idx]
+                if not attr_name and attr_name_idx < len(resource_ids):
+                    resource_id = resource_ids[attr_name_idx]
+                    attr_name = ANDROID_ATTRS.get(resource_id, f'attr_0x{resource_id:08x}')
+                prefix = prefixes.get(strings[ns_idx]) if ns_idx != NO_ENTRY else None
+                key = f'{prefix}:{attr_name}' if prefix else attr_name
+                attrs[key] = format_value(data_type, value, strings, raw_idx)
+            yield ('start', strings[name_idx], attrs)
+
+        elif chunk_type == RES_XML_END_ELEMENT_TYPE:
+            _, name_idx = struct.unpack_from('<2I', data, pos + header_size)
+            yield ('end', strings[name_idx])
+
+        elif chunk_type == RES_XML_CDATA_TYPE:
+            text_idx = struct.unpack_from('<I', data, pos + header_size)[0]
+            yield ('text', strings[text_idx])
+
+        pos += chunk_size
+
+
+def parse_axml(data):
+    """Convierte un AXML en un árbol ElementTree con atributos 'prefijo:nombre'"""
+    namespaces = {}
+    root = None
+    stack = []
+
+    for event in iter_axml_events(data):
+        kind = event[0]
+        if kind == 'ns':
+            namespaces[event[1]] = event[2]
+        elif kind == 'start':
+            element = ET.Element(event[1], event[2])
+            if stack:
+                stack[-1].append(element)
+            else:
+                root = element
+                for prefix, uri in namespaces.items():
+                    element.set(f'xmlns:{prefix}', uri)
+            stack.append(element)
+        elif kind == 'end':
+            if stack:
+                stack.pop()
+        elif kind == 'text' and stack:
+            stack[-1].text = (stack[-1].text or '') + (event[1] or '')
+
+    if root is None:
+        raise ValueError('El AXML no contiene elementos')
+    return root
+
+
+def parse_xml_document(data):
+    """Parsea un manifest en AXML o en XML de texto con la misma forma de atributos"""
+    if is_axml(data):
+        return parse_axml(data)
+
+    root = ET.fromstring(data)
+    # Normaliza '{uri}nombre' a 'android:nombre' como en el árbol AXML
+    uses_android_ns = False
+    for element in root.iter():
+        for key in list(element.attrib):
+            if key.startswith('{'):
+                uri, name = key[1:].split('}', 1)
+                prefix = 'android' if uri == ANDROID_NS else uri
+                uses_android_ns = uses_android_ns or uri == ANDROID_NS
+                element.attrib[f'{prefix}:{name}'] = element.attrib.pop(key)
+    if uses_android_ns:
+        root.set('xmlns:android', ANDROID_NS)
+    return root
+
+
+def _component_class(package, name):
+    """Nombre completo de un componente: .MainActivity y MainActivity (sin puntos) son relativos
+    al package, como los resuelve Android"""
+    if name.startswith('.'):
+        return package + name
+    if name and '.' not in name and package:
+        return f'{package}.{name}'
+    return name
+
+
+def summarize_manifest(root):
+    """Extrae package, versiones, SDKs, permisos y componentes de un manifest parseado"""
+    def attr(element, name):
+        return element.get(f'android:{name}', '') if element is not None else ''
+
+    uses_sdk = root.find('uses-sdk')
+    application = root.find('application')
+
+    summary = {
+        'package': root.get('package', ''),
+        'version_name': attr(root, 'versionName'),
+        'version_code': attr(root, 'versionCode'),
+        'min_sdk': attr(uses_sdk, 'minSdkVersion'),
+        'target_sdk': attr(uses_sdk, 'targetSdkVersion'),
+        'permissions': [],
+        'activities': [],
+        'services': [],
+        'receivers': [],
+        'providers': [],
+        'app_name': attr(application, 'label'),
+        'application_class': attr(application, 'name'),
+        'debuggable': attr(application, 'debuggable') == 'true',
+        'allow_backup': attr(application, 'allowBackup') != 'false',
+        'uses_cleartext_traffic': attr(application, 'usesCleartextTraffic') == 'true',
+        'exported_components': []
+    }
+
+    for tag in ('uses-permission', 'uses-permission-sdk-23'):
+        for element in root.iter(tag):
+            name = attr(element, 'name')
+            if name and name not in summary['permissions']:
+                summary['permissions'].append(name)
+
+    summary['application_class'] = _component_class(summary['package'], summary['application_class'])
+
+    if application is not None:
+        components = {
+            'activity': 'activities',
+            'activity-alias': 'activities',
+            'service': 'services',
+            'receiver': 'receivers',
+            'provider': 'providers'
+        }
+        for element in application:
+            key = components.get(element.tag)
+            if key is None:
+                continue
+            name = _component_class(summary['package'], attr(element, 'name'))
+            summary[key].append(name)
+
+            exported = attr(element, 'exported')
+            if exported == 'true' or (not exported and element.find('intent-filter') is not None):
+                summary['exported_components'].append(name)
+
+    return summary
+
+
+def _config_locale(buf, offset):
+    """Locale de un ResTable_config en formato de carpeta de recursos (en, es-rMX)"""
+    language = _unpack_locale_part(bytes(buf[offset + 8:offset + 10]), ord('a'))
+    region = _unpack_locale_part(bytes(buf[offset + 10:offset + 12]), ord('0'))
+    if not language:
+        return ''
+    return f'{language}-r{region}' if region else language
+
+
+# Rangos de ResTable_config que describen el locale (language/country, script, variante,
+# localeScriptWasComputed y sistema de numeración); el resto son los demás calificadores
+_CONFIG_LOCALE_FIELDS = ((8, 12), (36, 48), (52, 61))
+
+
+def _config_is_default(buf, offset):
+    """True si el ResTable_config no tiene más calificadores que el locale (sin densidad,
+    night, sw600dp, versión de SDK...)"""
+    size = struct.unpack_from('<I', buf, offset)[0]
+    config = bytearray(buf[offset + 4:offset + max(size, 4)])
+    for start, end in _CONFIG_LOCALE_FIELDS:
+        config[start - 4:end - 4] = bytes(len(config[start - 4:end - 4]))
+    return not any(config)
+
+
+def _unpack_locale_part(raw, base):
+    if raw[0] & 0x80:
+        # Códigos de 3 letras empaquetados en 2 bytes (5 bits por letra)
+        first, second = raw
+        chars = [second & 0x1F, ((second & 0xE0) >> 5) | ((first & 0x03) << 3), (first & 0x7C) >> 2]
+        return ''.join(chr(c + base) for c in chars)
+    return raw.replace(b'\x00', b'').decode('ascii', errors='ignore')
+
+
+class ResourceTable:
+    """Tabla resources.arsc: indexa paquetes, tipos y configuraciones; los valores se decodifican bajo demanda"""
+
+    def __init__(self, data):
+        self._buf = data
+        chunk_type, header_size, size = _CHUNK_HEADER.unpack_from(data, 0)
+        if chunk_type != RES_TABLE_TYPE:
+            raise ValueError('No es una tabla de recursos (resources.arsc)')
+
+        self.strings = None
+        self.packages = {}
+        # (package_id, type_id) -> lista de chunks ResTable_type de ese tipo
+        self._types = {}
+        # (tipo, locale) -> valores ya decodificados de la configuración por defecto de ese locale
+        self._values = {}
+
+        pos = header_size
+        end = min(len(data), size)
+        while pos + 8 <= end:
+            chunk_type, header_size, chunk_size = _CHUNK_HEADER.unpack_from(data, pos)
+            if chunk_size < 8:
+                raise ValueError(f'Chunk ARSC corrupto en el offset {pos}')
+            if chunk_type == RES_STRING_POOL_TYPE and self.strings is None:
+                self.strings = StringPool(data, pos)
+            elif chunk_type == RES_TABLE_PACKAGE_TYPE:
+                self._index_package(pos, header_size, chunk_size)
+            pos += chunk_size
+
+    def _index_package(self, start, header_size, chunk_size):
+        buf = self._buf
+        package_id = struct.unpack_from('<I', buf, start + 8)[0]
+        name = bytes(buf[start + 12:start + 12 + 256]).decode('utf-16-le', errors='ignore')
+        type_strings, _, key_strings = struct.unpack_from('<3I', buf, start + 268)
+        package = {
+            'id': package_id,
+            'name': name.split('\x00', 1)[0],
+            'type_names': StringPool(buf, start + type_strings),
+            'keys': StringPool(buf, start + key_strings)
+        }
+        self.packages[package_id] = package
+
+        pos = start + header_size
+        end = start + chunk_size
+        while pos + 8 <= end:
+            chunk_type, type_header_size, type_chunk_size = _CHUNK_HEADER.unpack_from(buf, pos)
+            if type_chunk_size < 8:
+                break
+            if chunk_type == RES_TABLE_TYPE_TYPE:
+                type_id, flags, _, entry_count, entries_start = struct.unpack_from('<BBHII', buf, pos + 8)
+                self._types.setdefault((package_id, type_id), []).append({
+                    'offset': pos,
+                    'header_size': type_header_size,
+                    'flags': flags,
+                    'entry_count': entry_count,
+                    'entries_start': entries_start,
+                    'locale': _config_locale(buf, pos + 20),
+                    'default': _config_is_default(buf, pos + 20)
+                })
+            pos += type_chunk_size
+
+    def _type_id(self, package, type_name):
+        for index in range(len(package['type_names'])):
+            if package['type_names'][index] == type_name:
+                return index + 1
+        return None
+
+    def _chunks(self, type_name):
+        for package_id, package in self.packages.items():
+            type_id = self._type_id(package, type_name)
+            if type_id is not None:
+                for chunk in self._types.get((package_id, type_id), []):
+                    yield package, chunk
+
+    def type_names(self):
+        """Nombres de los tipos de recurso de todos los paquetes"""
+        names = []
+        for package in self.packages.values():
+            for index in range(len(package['type_names'])):
+                if package['type_names'][index] not in names:
+                    names.append(package['type_names'][index])
+        return names
+
+    def locales(self, type_name='string'):
+        """Locales con valores para un tipo ('' es el valor por defecto)"""
+        return sorted({chunk['locale'] for _, chunk in self._chunks(type_name) if chunk['default']})
+
+    def _entry_offsets(self, chunk):
+        buf = self._buf
+        table = chunk['offset'] + chunk['header_size']
+        count = chunk['entry_count']
+        if chunk['flags'] & TYPE_FLAG_SPARSE:
+            # Pares (índice, offset / 4) solo para las entradas presentes
+            for i in range(count):
+                index, offset = struct.unpack_from('<2H', buf, table + i * 4)
+                yield index, offset * 4
+        elif chunk['flags'] & TYPE_FLAG_OFFSET16:
+            for index, offset in enumerate(struct.unpack_from(f'<{count}H', buf, table)):
+                if offset != 0xFFFF:
+                    yield index, offset * 4
+        else:
+            for index, offset in enumerate(struct.unpack_from(f'<{count}I', buf, table)):
+                if offset != NO_ENTRY:
+                    yield index, offset
+
+    def _entry(self, package, chunk, offset):
+        """Decodifica una entrada simple y devuelve (nombre, valor); None si es compleja"""
+        buf = self._buf
+        pos = chunk['offset'] + chunk['entries_start'] + offset
+        size, flags, key = struct.unpack_from('<HHI', buf, pos)
+        if flags & ENTRY_FLAG_COMPACT:
+            # Entrada compacta: la clave va en 'size' y el tipo en el byte alto de flags
+            return package['keys'][size], format_value(flags >> 8, key, self.strings)
+        if flags & ENTRY_FLAG_COMPLEX:
+            return None
+        _, _, data_type, data = struct.unpack_from('<HBBI', buf, pos + size)
+        return package['keys'][key], format_value(data_type, data, self.strings)
+
+    def values(self, type_name, locale=''):
+        """Valores simples de un tipo para un único locale (solo se decodifica ese locale y sin
+        otros calificadores: values-es, no values-es-night ni values-es-sw600dp)"""
+        key = (type_name, locale)
+        if key not in self._values:
+            values = {}
+            for package, chunk in self._chunks(type_name):
+                if chunk['locale'] != locale or not chunk['default']:
+                    continue
+                for _, offset in self._entry_offsets(chunk):
+                    entry = self._entry(package, chunk, offset)
+                    if entry is not None:
+                        values[entry[0]] = entry[1]
+            self._values[key] = values
+        return dict(self._values[key])
+
+    def strings_for_locale(self, locale=''):
+        """Strings de un locale con los valores por defecto como respaldo"""
+        strings = self.values('string', '') if locale else {}
+        strings.update(self.values('string', locale))
+        return strings
+
+    def resolve(self, resource_id, locale=''):
+        """Valor de una referencia @0xPPTTEEEE (None si no existe o es compleja)"""
+        package_id = resource_id >> 24
+        type_id = (resource_id >> 16) & 0xFF
+        entry_index = resource_id & 0xFFFF
+        package = self.packages.get(package_id)
+        chunks = self._types.get((package_id, type_id), [])
+        # Primero el locale pedido y luego el valor por defecto, ambos sin otros calificadores;
+        # las variantes (night, sw600dp...) solo si el recurso no existe fuera de ellas
+        for default, wanted in ((True, locale), (True, ''), (False, locale), (False, '')):
+            for chunk in chunks:
+                if chunk['locale'] != wanted or chunk['default'] != default:
+                    continue
+                offset = self._entry_offset(chunk, entry_index)
+                if offset is not None:
+                    entry = self._entry(package, chunk, offset)
+                    return entry[1] if entry else None
+        return None
+
+    def _entry_offset(self, chunk, index):
+        if chunk['flags'] & TYPE_FLAG_SPARSE:
+            for entry_index, offset in self._entry_offsets(chunk):
+                if entry_index == index:
+                    return offset
+            return None
+        if index >= chunk['entry_count']:
+            return None
+
+        table = chunk['offset'] + chunk['header_size']
+        if chunk['flags'] & TYPE_FLAG_OFFSET16:
+            offset = struct.unpack_from('<H', self._buf, table + index * 2)[0]
+            return None if offset == 0xFFFF else offset * 4
+        offset = struct.unpack_from('<I', self._buf, table + index * 4)[0]
+        return None if offset == NO_ENTRY else offset
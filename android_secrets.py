@@ -0,0 +1,262 @@
+"""
+Detección de secretos en binarios y texto
+Recorre streams por bloques con memoria constante: un prefiltro de bytes localiza candidatos
+y solo a esos se les aplican los formatos conocidos y el cálculo de entropía
+"""
+
+import math
+import re
+import time
+from collections import Counter
+
+
+# Tamaño de bloque al leer cada entrada
+SECRET_CHUNK_SIZE = 1024 * 1024
+
+# Bytes que se arrastran al bloque siguiente: ningún token buscado es más largo
+SECRET_OVERLAP = 512
+
+# Límite de hallazgos por escaneo (el resto solo se cuenta)
+SECRET_MAX_FINDINGS = 1000
+
+# Formatos de token conocidos: nombre -> (patrón o tupla de patrones, severidad, descripción, pistas)
+# Las pistas son literales en minúsculas; los patrones solo se evalúan en bloques que contienen alguna.
+# Varios patrones con prefijo literal son mucho más rápidos que una alternativa al inicio
+SECRET_RULES = {
+    'aws_access_key': (
+        rb'(?:AKIA|ASIA|AGPA|AIDA|AROA|ANPA|ANVA|AIPA)[0-9A-Z]{16}(?![0-9A-Z])',
+        'HIGH', 'Access key de AWS',
+        (b'akia', b'asia', b'agpa', b'aida', b'aroa', b'anpa', b'anva', b'aipa')
+    ),
+    'google_api_key': (
+        rb'AIza[0-9A-Za-z_\-]{35}(?![0-9A-Za-z_\-])',
+        'HIGH', 'API key de Google (Maps, Firebase, ...)',
+        (b'aiza',)
+    ),
+    'google_oauth_client': (
+        rb'[0-9]{6,}-[0-9a-z_]{32}\.apps\.googleusercontent\.com',
+        'MEDIUM', 'Client ID de OAuth de Google',
+        (b'googleusercontent',)
+    ),
+    'firebase_database': (
+        rb'[a-z0-9][a-z0-9\-]{2,62}\.(?:firebaseio\.com|firebasedatabase\.app)',
+        'MEDIUM', 'URL de Firebase Realtime Database (revisar reglas de acceso)',
+        (b'firebaseio', b'firebasedatabase')
+    ),
+    'firebase_server_key': (
+        rb'AAAA[A-Za-z0-9_\-]{7}:APA91b[A-Za-z0-9_\-]{134}',
+        'HIGH', 'Server key de Firebase Cloud Messaging',
+        (b':apa91b',)
+    ),
+    'jwt': (
+        rb'eyJ[A-Za-z0-9_\-]{8,}\.eyJ[A-Za-z0-9_\-]{8,}\.[A-Za-z0-9_\-]{16,}',
+        'HIGH', 'JSON Web Token embebido',
+        (b'eyj',)
+    ),
+    'private_key': (
+        rb'-----BEGIN (?:RSA |EC |DSA |OPENSSH |ENCRYPTED )?PRIVATE KEY-----',
+        'HIGH', 'Clave privada embebida',
+        (b'private key-----',)
+    ),
+    'hardcoded_key': (
+        tuple(keyword + rb'["\']?\s{0,4}[:=]\s{0,4}["\'][^"\'\s]{8,128}["\']' for keyword in (
+            rb'api[_\-]?key', rb'secret', rb'access[_\-]?token', rb'auth[_\-]?token', rb'passw(?:or)?d'
+        )),
+        'HIGH', 'Credencial asignada en el código',
+        (b'key', b'secret', b'token', b'passw')
+    )
+}
+
+# Reglas cuyos patrones (en minúsculas) se aplican al bloque convertido a minúsculas
+CASE_INSENSITIVE_RULES = frozenset(['hardcoded_key'])
+
+HIGH_ENTROPY_RULE = ('MEDIUM', 'String de alta entropía (posible secreto)')
+
+# Longitud mínima y máxima de un candidato genérico (base64/url-safe)
+ENTROPY_MIN_LENGTH = 20
+ENTROPY_MAX_LENGTH = 128
+
+# Fracción de la entropía máxima posible para la longitud del candidato
+ENTROPY_THRESHOLD = 0.85
+
+_KNOWN_PATTERNS = {
+    name: [re.compile(pattern) for pattern in (rule[0] if isinstance(rule[0], tuple) else (rule[0],))]
+    for name, rule in SECRET_RULES.items()
+}
+
+# Secuencias de caracteres base64/url-safe: se localizan con una máscara (translate) y
+# bytes.find, y la entropía solo se calcula sobre las que pasan los filtros baratos
+_RUN_BYTES = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=_-')
+_RUN_MASK = bytes(1 if byte in _RUN_BYTES else 0 for byte in range(256))
+_RUN_NEEDLE = b'\x01' * ENTROPY_MIN_LENGTH
+
+# Candidatos descartados que se recuerdan (en código los mismos identificadores se repiten)
+_REJECTED_CACHE_SIZE = 65536
+
+# Identificadores con prefijo de longitud (símbolos C++/Rust: _ZN4core3fmt...17h...E)
+_LENGTH_PREFIX = re.compile(rb'[0-9]{1,3}')
+
+# Entradas sin comprobación de entropía (los formatos conocidos sí se buscan): las firmas
+# contienen digests base64 y las tablas de símbolos de las librerías nativas, identificadores
+_NO_ENTROPY_FILES = re.compile(r'META-INF/[^/]+\.(?:MF|SF|RSA|DSA|EC)$|\.so$', re.I)
+
+
+def shannon_entropy(data):
+    """Entropía de Shannon en bits por símbolo"""
+    length = len(data)
+    return -sum(count / length * math.log2(count / length) for count in Counter(data).values())
+
+
+def _is_mangled(run):
+    """Símbolo mangled: prefijo _Z/_R o al menos dos identificadores cuya longitud coincide
+    con el número que los precede"""
+    if run.startswith((b'_Z', b'_R')):
+        return True
+    consistent = 0
+    for match in _LENGTH_PREFIX.finditer(run):
+        end = match.end() + int(match.group())
+        first = run[match.end():match.end() + 1]
+        if end > len(run) or not (first.isalpha() or first == b'_'):
+            continue
+        following = run[end:end + 1]
+        if not following or following.isdigit() or following == b'E':
+            consistent += 1
+            if consistent >= 2:
+                return True
+    return False
+
+
+def _looks_random(run):
+    """Filtros baratos antes de la entropía: mezcla de mayúsculas, minúsculas y dígitos"""
+    if not ENTROPY_MIN_LENGTH <= len(run) <= ENTROPY_MAX_LENGTH:
+        return False
+    if run.isdigit() or run.isalpha() or run.lower() == run or run.upper() == run:
+        return False
+    if not _LENGTH_PREFIX.search(run):
+        return False
+    limit = math.log2(min(len(run), 64)) * ENTROPY_THRESHOLD
+    return shannon_entropy(run) >= limit and not _is_mangled(run)
+
+
+def _mask(value):
+    """Muestra solo los extremos del secreto"""
+    text = value.decode('latin-1')
+    if len(text) <= 12:
+        return text[:2] + '*' * (len(text) - 2)
+    return text[:4] + '*' * (len(text) - 8) + text[-4:]
+
+
+class SecretScanner:
+    """Escáner de secretos por bloques; acumula hallazgos y estadísticas de rendimiento"""
+
+    def __init__(self, chunk_size=SECRET_CHUNK_SIZE, max_findings=SECRET_MAX_FINDINGS, entropy=True):
+        self.chunk_size = chunk_size
+        self.max_findings = max_findings
+        self.entropy = entropy
+        self.findings = []
+        self.total_findings = 0
+        self.bytes_scanned = 0
+        self.entries_scanned = 0
+        self.seconds = 0.0
+        self._rejected = set()
+
+    def _report(self, name, offset, kind, value):
+        self.total_findings += 1
+        if len(self.findings) >= self.max_findings:
+            return
+        if kind in SECRET_RULES:
+            severity, description = SECRET_RULES[kind][1:3]
+        else:
+            severity, description = HIGH_ENTROPY_RULE
+        self.findings.append({
+            'file': name,
+            'offset': offset,
+            'type': kind,
+            'severity': severity,
+            'description': description,
+            'preview': _mask(value)
+        })
+
+    def _scan_window(self, name, data, base, limit, previous_byte, entropy):
+        """Analiza los candidatos que empiezan antes de limit; el resto va al bloque siguiente"""
+        # Prefiltro: búsqueda de literales (en C) sobre el bloque en minúsculas
+        lowered = data.lower()
+        known_spans = []
+        for kind, patterns in _KNOWN_PATTERNS.items():
+            if not any(hint in lowered for hint in SECRET_RULES[kind][3]):
+                continue
+            target = lowered if kind in CASE_INSENSITIVE_RULES else data
+            for pattern in patterns:
+                for match in pattern.finditer(target):
+                    start = match.start()
+                    if start >= limit:
+                        break
+                    known_spans.append((start, match.end()))
+                    self._report(name, base + start, kind, data[start:match.end()])
+        known_spans.sort()
+
+        if not entropy:
+            return
+        mask = data.translate(_RUN_MASK)
+        span_index = 0
+        position = mask.find(_RUN_NEEDLE)
+        while position >= 0:
+            start = mask.rfind(b'\0', 0, position) + 1
+            if start >= limit:
+                break
+            end = mask.find(b'\0', position)
+            if end < 0:
+                end = len(data)
+            position = mask.find(_RUN_NEEDLE, end)
+            # Continuación de una secuencia que empezó en el bloque anterior
+            if start == 0 and previous_byte in _RUN_BYTES:
+                continue
+            while span_index < len(known_spans) and known_spans[span_index][1] <= start:
+                span_index += 1
+            if span_index < len(known_spans) and known_spans[span_index][0] < end:
+                continue
+            run = data[start:end].rstrip(b'=')
+            if run in self._rejected:
+                continue
+            if _looks_random(run):
+                self._report(name, base + start, 'high_entropy_string', run)
+            else:
+                if len(self._rejected) >= _REJECTED_CACHE_SIZE:
+                    self._rejected.clear()
+                self._rejected.add(run)
+
+    def scan_stream(self, stream, name):
+        """Escanea un stream binario completo leyendo bloques de chunk_size"""
+        started = time.perf_counter()
+        entropy = self.entropy and not _NO_ENTROPY_FILES.search(name)
+        carry = b''
+        base = 0
+        previous_byte = None
+        while True:
+            chunk = stream.read(self.chunk_size)
+            self.bytes_scanned += len(chunk)
+            data = carry + chunk if carry else chunk
+            if not data:
+                break
+            final = not chunk
+            limit = len(data) if final else max(0, len(data) - SECRET_OVERLAP)
+            self._scan_window(name, data, base, limit, previous_byte, entropy)
+            if final:
+                break
+            previous_byte = data[limit - 1] if limit else previous_byte
+            carry = data[limit:]
+            base += limit
+        self.entries_scanned += 1
+        self.seconds += time.perf_counter() - started
+
+    def stats(self):
+        """Bytes, entradas y rendimiento del escaneo"""
+        megabytes = self.bytes_scanned / 1024 / 1024
+        return {
+            'entries_scanned': self.entries_scanned,
+            'bytes_scanned': self.bytes_scanned,
+            'seconds': round(self.seconds, 3),
+            'mb_per_second': round(megabytes / self.seconds, 1) if self.seconds else None,
+            'total_findings': self.total_findings,
+            'truncated': self.total_findings > len(self.findings)
+        }
@@ -0,0 +1,445 @@
+"""
+Índice de símbolos de proyectos SMALI (salida de apktool)
+Extrae las declaraciones .class, .super, .implements, .field y .method de cada archivo en paralelo,
+las guarda en una tabla compacta y la refresca incrementalmente según mtime y tamaño
+
+Uso:
+    python android_smali.py app_apktool/ --index app.smali.idx --find-class com.app.Main
+    python android_smali.py app_apktool/ --index app.smali.idx --find-method onCreate
+"""
+
+import argparse
+import base64
+import bisect
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from android_arrays import U32, array_from, array_to_le_bytes
+
+
+SMALI_EXTENSION = '.smali'
+
+# Archivos por tarea enviada a un proceso del pool
+SMALI_BATCH_SIZE = 256
+
+# Por debajo de este número de archivos no compensa arrancar procesos
+SMALI_PARALLEL_MIN_FILES = 512
+
+# Solo interesan las líneas de declaración; el resto del archivo (instrucciones) se salta en C.
+# Sin ancla '^' el motor busca el '.' literal (varias veces más rápido) y el inicio de línea
+# se comprueba después
+_DECLARATION = re.compile(rb'\.(class|super|implements|source|field|method)[ \t]+([^\r\n]*)')
+
+# Posiciones de cada campo en la declaración de un archivo
+CLASS, SUPER, SOURCE, ACCESS, INTERFACES, FIELDS, METHODS = range(7)
+
+
+def _split_declaration(text):
+    """Modificadores de acceso y último token (descriptor, nombre:tipo o nombre(proto)ret)"""
+    parts = text.split()
+    return ' '.join(parts[:-1]), parts[-1] if parts else ''
+
+
+def parse_smali_declarations(data):
+    """Declaraciones de un archivo SMALI: [clase, super, source, acceso, interfaces, campos, métodos]
+
+    Los campos son [nombre, tipo, acceso, línea] y los métodos [nombre, proto, acceso, línea]"""
+    declaration = [None, None, None, '', [], [], []]
+    line = 1
+    position = 0
+    for match in _DECLARATION.finditer(data):
+        start = match.start()
+        line_start = data.rfind(b'\n', 0, start) + 1
+        if data[line_start:start].strip(b' \t'):
+            continue
+        line += data.count(b'\n', position, start)
+        position = start
+        keyword = match.group(1)
+        text = match.group(2).decode('utf-8', errors='replace')
+
+        if keyword == b'method':
+            access, spec = _split_declaration(text)
+            name, paren, proto = spec.partition('(')
+            declaration[METHODS].append([name, paren + proto, access, line])
+        elif keyword == b'field':
+            # El valor inicial (= ...) puede contener espacios y ':'
+            access, spec = _split_declaration(text.split(' = ', 1)[0])
+            name, _, field_type = spec.partition(':')
+            declaration[FIELDS].append([name, field_type, access, line])
+        elif keyword == b'implements':
+            declaration[INTERFACES].append(text.strip())
+        elif keyword == b'class':
+            declaration[ACCESS], declaration[CLASS] = _split_declaration(text)
+        elif keyword == b'super':
+            declaration[SUPER] = text.strip()
+        else:
+            declaration[SOURCE] = text.strip().strip('"')
+    return declaration
+
+
+def _parse_smali_batch(paths):
+    """Declaraciones de varios archivos; se ejecuta dentro de un proceso del pool"""
+    declarations = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                declarations.append(parse_smali_declarations(f.read()))
+        except OSError:
+            declarations.append(None)
+    return declarations
+
+
+def _iter_smali_files(root):
+    """(ruta relativa, mtime_ns, tamaño) de los .smali bajo root"""
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.endswith(SMALI_EXTENSION):
+                    stat = entry.stat()
+                    yield os.path.relpath(entry.path, root), stat.st_mtime_ns, stat.st_size
+
+
+def to_descriptor(name):
+    """Acepta com.app.Main, com/app/Main o Lcom/app/Main; y devuelve el descriptor"""
+    name = name.strip()
+    if name.startswith('L') and name.endswith(';'):
+        return name
+    return 'L' + name.replace('.', '/') + ';'
+
+
+class SmaliIndex:
+    """Tabla de símbolos de un árbol SMALI: clases por descriptor (exacto/prefijo por bisect),
+    métodos y campos por nombre, subclases e implementaciones
+
+    Los strings se guardan una sola vez en un pool y cada archivo guarda ids: sus campos y
+    métodos son arrays planos de 4 enteros (nombre, tipo/proto, acceso, línea)"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, root=None, strings=None, files=None):
+        self.root = root
+        self.strings = strings if strings is not None else [None]
+        self._string_ids = {value: i for i, value in enumerate(self.strings)}
+        # ruta relativa -> [mtime_ns, tamaño, declaraciones con ids]
+        self.files = files if files is not None else {}
+        self.last_refresh = None
+        self._tables = None
+
+    def __len__(self):
+        return len(self.files)
+
+    def _intern(self, value):
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def _encode(self, declaration):
+        """Declaraciones de parse_smali_declarations con los strings sustituidos por ids"""
+        intern = self._intern
+        encoded = [intern(declaration[CLASS]), intern(declaration[SUPER]), intern(declaration[SOURCE]),
+                   intern(declaration[ACCESS]), [intern(name) for name in declaration[INTERFACES]]]
+        for column in (FIELDS, METHODS):
+            members = array(U32)
+            for name, signature, access, line in declaration[column]:
+                members.extend((intern(name), intern(signature), intern(access), line))
+            encoded.append(members)
+        return encoded
+
+    def refresh(self, workers=None):
+        """Vuelve a parsear solo los archivos nuevos o cuyo mtime/tamaño ha cambiado"""
+        started = time.perf_counter()
+        current = {path: (mtime, size) for path, mtime, size in _iter_smali_files(self.root)}
+
+        removed = [path for path in self.files if path not in current]
+        for path in removed:
+            del self.files[path]
+
+        pending = [path for path, (mtime, size) in current.items()
+                   if path not in self.files or tuple(self.files[path][:2]) != (mtime, size)]
+        added = sum(1 for path in pending if path not in self.files)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if len(pending) < SMALI_PARALLEL_MIN_FILES:
+            workers = 1
+        workers = max(1, min(workers, len(pending) // SMALI_BATCH_SIZE + 1))
+
+        absolute = [os.path.join(self.root, path) for path in pending]
+        batches = [absolute[i:i + SMALI_BATCH_SIZE] for i in range(0, len(absolute), SMALI_BATCH_SIZE)]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(_parse_smali_batch, batches)
+                declarations = [d for batch in results for d in batch]
+        else:
+            declarations = [d for batch in batches for d in _parse_smali_batch(batch)]
+
+        errors = 0
+        for path, declaration in zip(pending, declarations):
+            if declaration is None:
+                errors += 1
+                self.files.pop(path, None)
+                continue
+            mtime, size = current[path]
+            self.files[path] = [mtime, size, self._encode(declaration)]
+
+        if pending or removed:
+            self._tables = None
+        self.last_refresh = {
+            'files': len(self.files),
+            'parsed': len(pending),
+            'added': added,
+            'updated': len(pending) - added,
+            'removed': len(removed),
+            'errors': errors,
+            'workers': workers,
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        return self.last_refresh
+
+    def add_source(self, name, data):
+        """Indexa un archivo recibido en memoria (sin mtime), p. ej. subido desde la interfaz"""
+        self.files[name] = [0, len(data), self._encode(parse_smali_declarations(data))]
+        self._tables = None
+
+    def _build(self):
+        """Tablas de consulta; se reconstruyen tras un refresco con cambios"""
+        if self._tables is not None:
+            return self._tables
+        strings = self.strings
+        classes = {}
+        members = {METHODS: {}, FIELDS: {}}
+        subclasses = {}
+        implementations = {}
+        for path, (_, _, declaration) in self.files.items():
+            descriptor = strings[declaration[CLASS]]
+            if descriptor is None:
+                continue
+            classes[descriptor] = path
+            for column, table in members.items():
+                # Un método sobrecargado aparece varias veces en el mismo archivo
+                for name_id in set(declaration[column][0::4]):
+                    table.setdefault(name_id, []).append(path)
+            if declaration[SUPER]:
+                subclasses.setdefault(strings[declaration[SUPER]], []).append(descriptor)
+            for interface in declaration[INTERFACES]:
+                implementations.setdefault(strings[interface], []).append(descriptor)
+
+        self._tables = {
+            'classes': classes,
+            'class_names': sorted(classes),
+            'members': members,
+            'subclasses': subclasses,
+            'implementations': implementations
+        }
+        return self._tables
+
+    def _class_result(self, descriptor):
+        path = self._build()['classes'][descriptor]
+        declaration = self.files[path][2]
+        strings = self.strings
+        return {
+            'class': descriptor,
+            'super': strings[declaration[SUPER]],
+            'interfaces': [strings[i] for i in declaration[INTERFACES]],
+            'access': strings[declaration[ACCESS]],
+            'source': strings[declaration[SOURCE]],
+            'file': path,
+            'method_count': len(declaration[METHODS]) // 4,
+            'field_count': len(declaration[FIELDS]) // 4
+        }
+
+    def find_class(self, name, limit=100):
+        """Clase exacta o, si no existe, clases cuyo descriptor empieza por el nombre dado"""
+        tables = self._build()
+        descriptor = to_descriptor(name)
+        if descriptor in tables['classes']:
+            return [self._class_result(descriptor)]
+
+        prefix = descriptor[:-1]
+        names = tables['class_names']
+        results = []
+        for i in range(bisect.bisect_left(names, prefix), len(names)):
+            if not names[i].startswith(prefix) or len(results) >= limit:
+                break
+            results.append(self._class_result(names[i]))
+        return results
+
+    def _members(self, column, name, limit):
+        """Métodos o campos con ese nombre; admite Lcom/app/Main;->nombre para una sola clase"""
+        tables = self._build()
+        paths = None
+        if '->' in name:
+            owner, name = name.split('->', 1)
+            path = tables['classes'].get(to_descriptor(owner))
+            paths = [path] if path is not None else []
+
+        name_id = self._string_ids.get(name)
+        if name_id is None:
+            return []
+        if paths is None:
+            paths = tables['members'][column].get(name_id, ())
+
+        strings = self.strings
+        results = []
+        for path in paths:
+            declaration = self.files[path][2]
+            values = declaration[column]
+            for i in range(0, len(values), 4):
+                if values[i] == name_id:
+                    results.append({
+                        'class': strings[declaration[CLASS]],
+                        'name': name,
+                        'signature': strings[values[i + 1]],
+                        'access': strings[values[i + 2]],
+                        'file': path,
+                        'line': values[i + 3]
+                    })
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def find_method(self, name, limit=100):
+        """Definiciones de un método por nombre (p. ej. onCreate o Lcom/app/Main;->onCreate)"""
+        return self._members(METHODS, name, limit)
+
+    def find_field(self, name, limit=100):
+        """Definiciones de un campo por nombre"""
+        return self._members(FIELDS, name, limit)
+
+    def subclasses(self, name):
+        """Subclases directas"""
+        return sorted(self._build()['subclasses'].get(to_descriptor(name), []))
+
+    def implementations(self, name):
+        """Clases que implementan directamente la interfaz"""
+        return sorted(self._build()['implementations'].get(to_descriptor(name), []))
+
+    def stats(self):
+        tables = self._build()
+        declarations = [entry[2] for entry in self.files.values()]
+        return {
+            'files': len(self.files),
+            'classes': len(tables['classes']),
+            'methods': sum(len(d[METHODS]) for d in declarations) // 4,
+            'fields': sum(len(d[FIELDS]) for d in declarations) // 4,
+            'unique_method_names': len(tables['members'][METHODS]),
+            'strings': len(self.strings)
+        }
+
+    def to_bytes(self):
+        """Serializa el índice: pool de strings y cabeceras en JSON, campos y métodos como
+        arrays little-endian en base64 (las tablas de consulta se reconstruyen al cargar)"""
+        rows = []
+        columns = {FIELDS: array(U32), METHODS: array(U32)}
+        for path, (mtime, size, declaration) in self.files.items():
+            rows.append([path, mtime, size] + declaration[:INTERFACES + 1] +
+                        [len(declaration[FIELDS]), len(declaration[METHODS])])
+            for column, values in columns.items():
+                values.extend(declaration[column])
+        payload = {
+            'version': self.FORMAT_VERSION,
+            'root': self.root,
+            'strings': self.strings,
+            'files': rows,
+            'fields': base64.b64encode(array_to_le_bytes(columns[FIELDS])).decode('ascii'),
+            'methods': base64.b64encode(array_to_le_bytes(columns[METHODS])).decode('ascii')
+        }
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Carga un índice serializado; refresh() solo reparsea lo que haya cambiado desde entonces"""
+        payload = json.loads(zlib.decompress(data).decode('utf-8'))
+        if payload.get('version') != cls.FORMAT_VERSION:
+            raise ValueError('Versión de índice SMALI no soportada')
+
+        columns = []
+        for key in ('fields', 'methods'):
+            raw = base64.b64decode(payload[key])
+            columns.append(array_from(raw, 0, len(raw) // 4, U32))
+        fields, methods = columns
+
+        files = {}
+        field_offset = method_offset = 0
+        for path, mtime, size, *header, field_count, method_count in payload['files']:
+            files[path] = [mtime, size, header + [
+                fields[field_offset:field_offset + field_count],
+                methods[method_offset:method_offset + method_count]
+            ]]
+            field_offset += field_count
+            method_offset += method_count
+        return cls(payload['root'], payload['strings'], files)
+
+
+def index_smali_tree(root, index_file=None, workers=None):
+    """Índice de un árbol SMALI; si index_file existe se reutiliza y solo se reparsean los
+    archivos cambiados, y al terminar se guarda"""
+    root = os.path.abspath(root)
+    index = None
+    if index_file and os.path.exists(index_file):
+        try:
+            with open(index_file, 'rb') as f:
+                index = SmaliIndex.from_bytes(f.read())
+        except (OSError, ValueError, zlib.error):
+            index = None
+        if index is not None and index.root != root:
+            index = None
+    if index is None:
+        index = SmaliIndex(root)
+
+    stats = index.refresh(workers)
+    if index_file and (stats['parsed'] or stats['removed'] or not os.path.exists(index_file)):
+        # Escritura atómica: un índice a medio escribir se descartaría entero en la siguiente carga
+        temp_file = index_file + '.tmp'
+        with open(temp_file, 'wb') as f:
+            f.write(index.to_bytes())
+        os.replace(temp_file, index_file)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Índice de símbolos de un árbol SMALI (apktool)')
+    parser.add_argument('root', help='Directorio con los .smali (p. ej. salida de apktool d)')
+    parser.add_argument('-i', '--index', help='Archivo del índice (se reutiliza y actualiza)')
+    parser.add_argument('-w', '--workers', type=int, default=0,
+                        help='Procesos en paralelo (0 = todos los núcleos)')
+    parser.add_argument('--find-class', action='append', default=[], help='Clase o prefijo de paquete')
+    parser.add_argument('--find-method', action='append', default=[], help='Nombre o Clase;->nombre')
+    parser.add_argument('--find-field', action='append', default=[], help='Nombre o Clase;->nombre')
+    parser.add_argument('--subclasses', action='append', default=[], help='Subclases directas de una clase')
+    parser.add_argument('--limit', type=int, default=100, help='Máximo de resultados por consulta')
+    args = parser.parse_args(argv)
+
+    index = index_smali_tree(args.root, args.index, args.workers or None)
+    refresh = index.last_refresh
+    print(f"{refresh['files']} archivos ({refresh['parsed']} parseados, {refresh['removed']} eliminados) "
+          f"en {refresh['seconds']:.2f} s con {refresh['workers']} proceso(s)", file=sys.stderr)
+
+    queries = (
+        [('class', q, index.find_class) for q in args.find_class] +
+        [('method', q, index.find_method) for q in args.find_method] +
+        [('field', q, index.find_field) for q in args.find_field]
+    )
+    for kind, query, find in queries:
+        for result in find(query, limit=args.limit):
+            print(json.dumps(dict(result, query=query, kind=kind), ensure_ascii=False))
+    for query in args.subclasses:
+        for descriptor in index.subclasses(query):
+            print(json.dumps({'query': query, 'kind': 'subclass', 'class': descriptor}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
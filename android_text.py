@@ -0,0 +1,116 @@
+"""
+Lectura de texto con detección de codificación
+Decodifica por bloques con un decodificador incremental leyendo los bytes una sola vez
+"""
+
+import codecs
+
+
+# Tamaño de bloque al leer y decodificar streams
+TEXT_CHUNK_SIZE = 1024 * 1024
+
+# Codificación de respaldo cuando el contenido no es UTF-8 válido (nunca falla)
+FALLBACK_ENCODING = 'latin-1'
+
+# Marcas de orden de bytes; las de UTF-32 van antes porque empiezan como las de UTF-16
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be')
+)
+
+# Bytes necesarios para decidir la codificación
+_SNIFF_BYTES = 4
+
+
+def detect_encoding(head):
+    """Codificación y longitud del BOM a partir de los primeros bytes"""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom)
+
+    # UTF-16 sin BOM: texto ASCII con un byte nulo en cada par
+    sample = head[:_SNIFF_BYTES] if len(head) >= _SNIFF_BYTES else b''
+    if sample[1::2] == b'\0\0' and b'\0' not in sample[0::2]:
+        return 'utf-16-le', 0
+    if sample[0::2] == b'\0\0' and b'\0' not in sample[1::2]:
+        return 'utf-16-be', 0
+
+    return 'utf-8', 0
+
+
+class TextDecoder:
+    """Decodificador incremental que detecta la codificación en el primer bloque; si un
+    contenido sin BOM deja de ser UTF-8 válido, el resto se decodifica con FALLBACK_ENCODING"""
+
+    def __init__(self, fallback=FALLBACK_ENCODING):
+        self.fallback = fallback
+        self.encoding = None
+        self._decoder = None
+        self._head = b''
+
+    def _start(self, head):
+        self.encoding, bom_length = detect_encoding(head)
+        # UTF-8 estricto para poder detectar el cambio a la codificación de respaldo
+        errors = 'strict' if self.encoding == 'utf-8' else 'replace'
+        self._decoder = codecs.getincrementaldecoder(self.encoding)(errors)
+        return head[bom_length:]
+
+    def decode(self, data, final=False):
+        """Decodifica un bloque; los caracteres partidos entre bloques se completan en el siguiente"""
+        data = bytes(data)
+        if self._decoder is None:
+            data = self._head + data
+            if len(data) < _SNIFF_BYTES and not final:
+                self._head = data
+                return ''
+            self._head = b''
+            data = self._start(data)
+
+        pending = self._decoder.getstate()[0]
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            if self.encoding != 'utf-8':
+                raise
+            # Lo anterior al primer byte inválido ya era UTF-8; desde ahí se usa el respaldo
+            data = pending + data
+            self.encoding = self.fallback
+            self._decoder = codecs.getincrementaldecoder(self.fallback)('replace')
+            return data[:e.start].decode('utf-8') + self._decoder.decode(data[e.start:], final)
+
+
+def iter_text(source, chunk_size=TEXT_CHUNK_SIZE):
+    """Genera el texto de un archivo (o de unos bytes) por bloques, leyendo cada byte una vez"""
+    decoder = TextDecoder()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            text = decoder.decode(view[start:start + chunk_size])
+            if text:
+                yield text
+    else:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def decode_bytes(data):
+    """Decodifica unos bytes detectando la codificación"""
+    return TextDecoder().decode(data, final=True)
+
+
+def read_text(file, chunk_size=TEXT_CHUNK_SIZE):
+    """Lee un archivo binario como texto y lo deja en su posición inicial si admite seek"""
+    position = file.tell() if hasattr(file, 'seek') else None
+    try:
+        return ''.join(iter_text(file, chunk_size))
+    finally:
+        if position is not None:
+            file.seek(position)
@@ -0,0 +1,195 @@
+"""
+Referencias cruzadas (xref) del código DEX
+Una sola pasada por los code_item registra const-string, invoke-* e iget/sget; cada string, método
+o campo apunta a la lista de ids de los métodos que lo usan (posting lists en CSR)
+"""
+
+import base64
+import bisect
+import json
+import zlib
+from array import array
+
+from android_arrays import U32, array_from, array_to_le_bytes, csr
+from android_dalvik import ReferenceResolver, code_xrefs
+
+
+XREF_STRING = 'string'
+XREF_METHOD = 'method'
+XREF_FIELD = 'field'
+
+# Orden de las listas que devuelve code_xrefs
+XREF_KINDS = (XREF_STRING, XREF_METHOD, XREF_FIELD)
+
+
+class XrefIndexBuilder:
+    """Acumula pares (referencia, método que la usa) de varios DEX; build() devuelve el XrefIndex"""
+
+    def __init__(self):
+        self._method_ids = {}
+        self._methods = []
+        self._keys = {kind: {} for kind in XREF_KINDS}
+        self._names = {kind: [] for kind in XREF_KINDS}
+        self._targets = {kind: array(U32) for kind in XREF_KINDS}
+        self._users = {kind: array(U32) for kind in XREF_KINDS}
+        self._classes = set()
+        self.dex_names = []
+
+    def _id(self, ids, names, name):
+        value = ids.get(name)
+        if value is None:
+            value = ids[name] = len(names)
+            names.append(name)
+        return value
+
+    def add_dex(self, name, dex):
+        """Referencias de todos los métodos con código de un DexFile"""
+        self.dex_names.append(name)
+        resolver = ReferenceResolver(dex)
+        resolvers = (resolver.string, resolver.method, resolver.field)
+        # Índice local del DEX -> id de la referencia (cada índice se resuelve una sola vez)
+        local = [{} for _ in XREF_KINDS]
+        for class_def in dex.class_defs:
+            descriptor = resolver.type_name(class_def.class_idx)
+            # Multidex: si una clase está repetida gana la primera, como en el runtime
+            if descriptor in self._classes:
+                continue
+            self._classes.add(descriptor)
+
+            data = dex.class_data(class_def.class_data_off)
+            if data is None:
+                continue
+            for method in data.direct_methods + data.virtual_methods:
+                code = dex.code_item(method.code_off)
+                if code is None:
+                    continue
+                references = code_xrefs(dex.code_units(code))
+                if not any(references):
+                    continue
+                user = self._id(self._method_ids, self._methods,
+                                f'{descriptor}->{resolver.method_member(method.method_idx)}')
+                for kind, indices, resolve, ids in zip(XREF_KINDS, references, resolvers, local):
+                    targets = self._targets[kind]
+                    users = self._users[kind]
+                    for idx in indices:
+                        key = ids.get(idx)
+                        if key is None:
+                            key = ids[idx] = self._id(self._keys[kind], self._names[kind], resolve(idx))
+                        targets.append(key)
+                        users.append(user)
+
+    def build(self):
+        """XrefIndex con los nombres ordenados y una posting list por referencia"""
+        order = sorted(range(len(self._methods)), key=self._methods.__getitem__)
+        method_remap = array(U32, bytes(4 * len(order)))
+        for new_id, old_id in enumerate(order):
+            method_remap[old_id] = new_id
+        methods = [self._methods[old_id] for old_id in order]
+
+        tables = {}
+        for kind in XREF_KINDS:
+            names = self._names[kind]
+            key_order = sorted(range(len(names)), key=names.__getitem__)
+            key_remap = array(U32, bytes(4 * len(key_order)))
+            for new_id, old_id in enumerate(key_order):
+                key_remap[old_id] = new_id
+            targets = array(U32, (key_remap[t] for t in self._targets[kind]))
+            users = array(U32, (method_remap[u] for u in self._users[kind]))
+            offsets, postings = csr(len(names), targets, users)
+            tables[kind] = ([names[old_id] for old_id in key_order], offsets, postings)
+        return XrefIndex(methods, tables, self.dex_names)
+
+
+class XrefIndex:
+    """Posting lists por tipo de referencia: offsets[n]..offsets[n+1] indexa en users los ids de los
+    métodos que usan la referencia n. Las consultas son búsquedas binarias, sin recorrer el código"""
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, methods, tables, dex_names):
+        self.methods = methods
+        self.tables = tables
+        self.dex_names = dex_names
+
+    def stats(self):
+        """Referencias distintas y usos por tipo"""
+        stats = {'dex_files': len(self.dex_names), 'methods': len(self.methods)}
+        for kind, (names, offsets, users) in self.tables.items():
+            stats[f'{kind}s'] = len(names)
+            stats[f'{kind}_refs'] = len(users)
+        return stats
+
+    def _matches(self, kind, query, mode):
+        names = self.tables[kind][0]
+        if mode == 'contains':
+            return (i for i, name in enumerate(names) if query in name)
+        start = bisect.bisect_left(names, query)
+        if mode == 'exact':
+            return [start] if start < len(names) and names[start] == query else []
+        end = bisect.bisect_left(names, query + '\uffff', start)
+        return range(start, end)
+
+    def lookup(self, kind, query, mode='prefix', limit=100):
+        """Referencias que coinciden (exact, prefix o contains) con los métodos que las usan.
+        Los métodos y campos se consultan como Lcom/app/Main;->nombre (prefijo de la firma)"""
+        names, offsets, users = self.tables[kind]
+        results = []
+        for key in self._matches(kind, query, mode):
+            row = users[offsets[key]:offsets[key + 1]]
+            results.append({
+                kind: names[key],
+                'count': len(row),
+                'methods': [self.methods[user] for user in row[:limit]]
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def string_users(self, value, mode='exact', limit=100):
+        """Métodos que cargan el string (const-string)"""
+        return self.lookup(XREF_STRING, value, mode, limit)
+
+    def callers(self, method, mode='prefix', limit=100):
+        """Métodos que llaman a un método (p. ej. Ljavax/crypto/Cipher;->getInstance)"""
+        return self.lookup(XREF_METHOD, method, mode, limit)
+
+    def field_readers(self, field, mode='prefix', limit=100):
+        """Métodos que leen un campo (iget/sget)"""
+        return self.lookup(XREF_FIELD, field, mode, limit)
+
+    def memory_bytes(self):
+        """Bytes ocupados por los arrays de las posting lists (sin contar los nombres)"""
+        return sum(a.itemsize * len(a) for _, offsets, users in self.tables.values() for a in (offsets, users))
+
+    def to_bytes(self):
+        """Serializa el índice: nombres en JSON y arrays little-endian en base64"""
+        payload = {
+            'version': self.FORMAT_VERSION,
+            'dex_names': self.dex_names,
+            'methods': self.methods,
+            'tables': {
+                kind: {
+                    'names': names,
+                    'offsets': base64.b64encode(array_to_le_bytes(offsets)).decode('ascii'),
+                    'users': base64.b64encode(array_to_le_bytes(users)).decode('ascii')
+                }
+                for kind, (names, offsets, users) in self.tables.items()
+            }
+        }
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+                             .encode('utf-8', 'surrogatepass'))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Carga un índice serializado sin volver a recorrer los DEX"""
+        payload = json.loads(zlib.decompress(data).decode('utf-8', 'surrogatepass'))
+        if payload.get('version') != cls.FORMAT_VERSION:
+            raise ValueError('Versión de índice de referencias no soportada')
+        tables = {}
+        for kind, table in payload['tables'].items():
+            arrays = []
+            for key in ('offsets', 'users'):
+                raw = base64.b64decode(table[key])
+                arrays.append(array_from(raw, 0, len(raw) // 4, U32))
+            tables[kind] = (table['names'], *arrays)
+        return cls(payload['methods'], tables, payload['dex_names'])
@@ -0,0 +1,105 @@
+"""
+Benchmark: decodificación de tablas de IDs del DEX
+Compara int.from_bytes por registro contra columnas con array (android_dex)
+
+Uso: python benchmarks/bench_dex_tables.py [num_metodos]
+"""
+
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from android_dex import DexFile, HEADER_SIZE, ENDIAN_CONSTANT
+
+
+def build_dex(method_count, field_count, type_count):
+    """DEX sintético con solo el header y las tablas type/field/method_ids"""
+    rng = random.Random(42)
+    type_off = HEADER_SIZE
+    field_off = type_off + type_count * 4
+    method_off = field_off + field_count * 8
+    end = method_off + method_count * 8
+    
+    data = bytearray(end)
+    data[:8] = b'dex\n035\x00'
+    struct.pack_into('<3I', data, 0x20, end, HEADER_SIZE, ENDIAN_CONSTANT)
+    struct.pack_into('<12I', data, 0x38,
+                     0, 0,
+                     type_count, type_off,
+                     0, 0,
+                     field_count, field_off,
+                     method_count, method_off,
+                     0, 0)
+    
+    for i in range(type_count):
+        struct.pack_into('<I', data, type_off + i * 4, rng.randrange(1 << 20))
+    for i in range(field_count):
+        struct.pack_into('<2HI', data, field_off + i * 8,
+                         rng.randrange(type_count), rng.randrange(type_count), rng.randrange(1 << 20))
+    for i in range(method_count):
+        struct.pack_into('<2HI', data, method_off + i * 8,
+                         rng.randrange(type_count), rng.randrange(1 << 16), rng.randrange(1 << 20))
+    return bytes(data)
+
+
+def decode_per_record(dex):
+    """Enfoque original: un int.from_bytes por campo y registro"""
+    buf = dex._buf
+    
+    def table(offset, count):
+        class_idx, middle, name_idx = [], [], []
+        for i in range(count):
+            base = offset + i * 8
+            class_idx.append(int.from_bytes(buf[base:base + 2], 'little'))
+            middle.append(int.from_bytes(buf[base + 2:base + 4], 'little'))
+            name_idx.append(int.from_bytes(buf[base + 4:base + 8], 'little'))
+        return class_idx, middle, name_idx
+    
+    types = [int.from_bytes(buf[dex.type_ids_off + i * 4:dex.type_ids_off + i * 4 + 4], 'little')
+             for i in range(dex.type_ids_size)]
+    return (table(dex.method_ids_off, dex.method_ids_size),
+            table(dex.field_ids_off, dex.field_ids_size),
+            types)
+
+
+def decode_columns(dex):
+    """Enfoque vectorizado: arrays + slicing extendido"""
+    dex._columns.clear()
+    return dex.method_columns(), dex.field_columns(), dex.type_columns()
+
+
+def best_of(func, arg, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    method_count = int(sys.argv[1]) if len(sys.argv) > 1 else 250000
+    dex = DexFile(build_dex(method_count, method_count // 2, 30000))
+    
+    slow = best_of(decode_per_record, dex, repeat=2)
+    fast = best_of(decode_columns, dex)
+    
+    methods, fields, types = decode_columns(dex)
+    reference = decode_per_record(dex)
+    assert list(methods.class_idx) == reference[0][0]
+    assert list(methods.name_idx) == reference[0][2]
+    assert list(fields.type_idx) == reference[1][1]
+    assert list(types) == reference[2]
+    
+    print(f"method_ids: {method_count:,}  field_ids: {method_count // 2:,}  type_ids: 30,000")
+    print(f"int.from_bytes por registro: {slow * 1000:9.1f} ms")
+    print(f"columnas con array:          {fast * 1000:9.1f} ms")
+    print(f"aceleración:                 {slow / fast:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Constructor mínimo de archivos DEX para las pruebas
+Las tablas se dan ya indexadas (como en el archivo) y cada método con código lleva sus unidades
+de 16 bits tal cual, para comprobar el decodificador contra instrucciones construidas a mano
+"""
+
+import struct
+from collections import namedtuple
+
+
+NO_INDEX = 0xFFFFFFFF
+
+# code_item: registros, parámetros de entrada, unidades y bloques try
+# tries: [(start_addr, insn_count, [(type_idx, addr)], catch_all_addr o None)]
+Code = namedtuple('Code', 'registers ins units tries', defaults=((),))
+
+# Clase definida: los métodos son [(method_idx, access_flags, Code o None)] y los campos
+# [(field_idx, access_flags)], con índices absolutos y en orden creciente
+ClassSpec = namedtuple(
+    'ClassSpec',
+    'class_idx access superclass_idx interfaces source_file_idx '
+    'static_fields instance_fields direct_methods virtual_methods',
+    defaults=(0x1, NO_INDEX, (), NO_INDEX, (), (), (), ())
+)
+
+
+def uleb128(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def sleb128(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if (value == 0 and not byte & 0x40) or (value == -1 and byte & 0x40):
+            out.append(byte)
+            return bytes(out)
+        out.append(byte | 0x80)
+
+
+def _encode_members(members, with_code, code_offsets):
+    out = bytearray()
+    previous = 0
+    for member in members:
+        index, access = member[0], member[1]
+        out += uleb128(index - previous) + uleb128(access)
+        if with_code:
+            out += uleb128(code_offsets.get(id(member[2]), 0) if member[2] is not None else 0)
+        previous = index
+    return out
+
+
+def build_dex(strings, types, protos=(), fields=(), methods=(), classes=()):
+    """Bytes de un DEX: strings (str ASCII), types (índices de string), protos
+    (shorty_idx, return_type_idx, [type_idx]), fields y methods (class_idx, type/proto_idx, name_idx)"""
+    offset = 0x70
+    layout = {}
+    for name, count, size in (('strings', len(strings), 4), ('types', len(types), 4),
+                              ('protos', len(protos), 12), ('fields', len(fields), 8),
+                              ('methods', len(methods), 8), ('classes', len(classes), 32)):
+        layout[name] = offset if count else 0
+        offset += count * size
+    data_start = offset
+    data = bytearray()
+
+    def position():
+        return data_start + len(data)
+
+    def align(size):
+        while position() % size:
+            data.append(0)
+
+    string_offsets = []
+    for value in strings:
+        string_offsets.append(position())
+        data.extend(uleb128(len(value)) + value.encode('ascii') + b'\x00')
+
+    def type_list(indices):
+        if not indices:
+            return 0
+        align(4)
+        start = position()
+        data.extend(struct.pack(f'<I{len(indices)}H', len(indices), *indices))
+        return start
+
+    proto_records = [(shorty, return_type, type_list(params)) for shorty, return_type, params in protos]
+    interface_offsets = [type_list(spec.interfaces) for spec in classes]
+
+    code_offsets = {}
+    for spec in classes:
+        for _, _, code in list(spec.direct_methods) + list(spec.virtual_methods):
+            if code is None:
+                continue
+            align(4)
+            code_offsets[id(code)] = position()
+            units = list(code.units)
+            data.extend(struct.pack('<4HII', code.registers, code.ins, 0, len(code.tries), 0, len(units)))
+            data.extend(struct.pack(f'<{len(units)}H', *units))
+            if code.tries:
+                if len(units) % 2:
+                    data.extend(b'\x00\x00')
+                handlers = bytearray(uleb128(len(code.tries)))
+                handler_offsets = []
+                for _, _, catches, catch_all in code.tries:
+                    handler_offsets.append(len(handlers))
+                    handlers += sleb128(len(catches) if catch_all is None else -len(catches))
+                    for type_idx, address in catches:
+                        handlers += uleb128(type_idx) + uleb128(address)
+                    if catch_all is not None:
+                        handlers += uleb128(catch_all)
+                for (start, count, _, _), handler_off in zip(code.tries, handler_offsets):
+                    data.extend(struct.pack('<I2H', start, count, handler_off))
+                data.extend(handlers)
+
+    class_data_offsets = []
+    for spec in classes:
+        class_data_offsets.append(position())
+        data.extend(uleb128(len(spec.static_fields)) + uleb128(len(spec.instance_fields))
+                    + uleb128(len(spec.direct_methods)) + uleb128(len(spec.virtual_methods)))
+        data.extend(_encode_members(spec.static_fields, False, code_offsets))
+        data.extend(_encode_members(spec.instance_fields, False, code_offsets))
+        data.extend(_encode_members(spec.direct_methods, True, code_offsets))
+        data.extend(_encode_members(spec.virtual_methods, True, code_offsets))
+
+    tables = bytearray()
+    tables += b''.join(struct.pack('<I', value) for value in string_offsets)
+    tables += b''.join(struct.pack('<I', value) for value in types)
+    tables += b''.join(struct.pack('<3I', *record) for record in proto_records)
+    tables += b''.join(struct.pack('<2HI', *record) for record in fields)
+    tables += b''.join(struct.pack('<2HI', *record) for record in methods)
+    for spec, interfaces_off, class_data_off in zip(classes, interface_offsets, class_data_offsets):
+        tables += struct.pack('<8I', spec.class_idx, spec.access, spec.superclass_idx, interfaces_off,
+                              spec.source_file_idx, 0, class_data_off, 0)
+
+    file_size = data_start + len(data)
+    header = bytearray(b'dex\n035\x00' + bytes(0x68))
+    struct.pack_into('<3I', header, 0x20, file_size, 0x70, 0x12345678)
+    struct.pack_into('<12I', header, 0x38,
+                     len(strings), layout['strings'], len(types), layout['types'],
+                     len(protos), layout['protos'], len(fields), layout['fields'],
+                     len(methods), layout['methods'], len(classes), layout['classes'])
+    return bytes(header + tables + data)
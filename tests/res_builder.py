@@ -0,0 +1,160 @@
+"""
+Constructor mínimo de XML binario (AXML) y de resources.arsc para las pruebas
+"""
+
+import struct
+from collections import namedtuple
+
+
+NO_INDEX = 0xFFFFFFFF
+ANDROID_NS = 'http://schemas.android.com/apk/res/android'
+
+# IDs de recurso de los atributos android:* usados en las pruebas
+ATTR_IDS = {
+    'name': 0x01010003, 'label': 0x01010001, 'exported': 0x01010010, 'debuggable': 0x0101000F,
+    'minSdkVersion': 0x0101020C, 'targetSdkVersion': 0x01010270,
+    'versionCode': 0x0101021B, 'versionName': 0x0101021C
+}
+
+# dataType (Res_value) de cada tipo de atributo
+_VALUE_TYPES = {
+    'string': 0x03,
+    'int': 0x10,
+    'bool': 0x12,
+    'reference': 0x01
+}
+
+
+def _chunk(chunk_type, header, body):
+    return struct.pack('<HHI', chunk_type, 8 + len(header), 8 + len(header) + len(body)) + header + body
+
+
+def _length(value, utf8):
+    if utf8:
+        return bytes([value]) if value < 0x80 else bytes([0x80 | (value >> 8), value & 0xFF])
+    return struct.pack('<H', value)
+
+
+def string_pool(strings, utf8=False):
+    """Chunk ResStringPool con los strings en UTF-8 o UTF-16"""
+    offsets = []
+    data = bytearray()
+    for value in strings:
+        offsets.append(len(data))
+        if utf8:
+            encoded = value.encode('utf-8')
+            data += _length(len(value), True) + _length(len(encoded), True) + encoded + b'\x00'
+        else:
+            encoded = value.encode('utf-16-le')
+            data += _length(len(encoded) // 2, False) + encoded + b'\x00\x00'
+    while len(data) % 4:
+        data.append(0)
+    header = struct.pack('<5I', len(strings), 0, 0x100 if utf8 else 0, 28 + 4 * len(strings), 0)
+    return _chunk(0x0001, header, struct.pack(f'<{len(offsets)}I', *offsets) + bytes(data))
+
+
+def build_axml(root, utf8=False, strip_attr_names=False):
+    """AXML de un árbol (tag, [(atributo, tipo, valor)], [hijos]); los atributos con ID de recurso
+    van en el namespace android. strip_attr_names deja sus nombres vacíos, como los ofuscadores"""
+    attr_names = []
+
+    def collect(node):
+        for name, _, _ in node[1]:
+            if name in ATTR_IDS and name not in attr_names:
+                attr_names.append(name)
+        for child in node[2]:
+            collect(child)
+
+    collect(root)
+    # Los atributos con ID ocupan los primeros índices del pool, en el orden del mapa de recursos
+    strings = list(attr_names)
+
+    def index(value):
+        if value not in strings[len(attr_names):]:
+            strings.append(value)
+        return strings.index(value, len(attr_names))
+
+    android, uri = index('android'), index(ANDROID_NS)
+    node_header = struct.pack('<2I', 1, 0xFFFFFFFF)
+    chunks = [_chunk(0x0100, node_header, struct.pack('<2I', android, uri))]
+
+    def emit(node):
+        tag, attributes, children = node
+        encoded = bytearray()
+        for name, kind, value in attributes:
+            name_idx = attr_names.index(name) if name in ATTR_IDS else index(name)
+            namespace = uri if name in ATTR_IDS else 0xFFFFFFFF
+            raw = index(value) if kind == 'string' else 0xFFFFFFFF
+            data = raw if kind == 'string' else (0xFFFFFFFF if value is True else int(value))
+            encoded += struct.pack('<3IHBBI', namespace, name_idx, raw, 8, 0, _VALUE_TYPES[kind], data)
+        element = struct.pack('<2I6H', 0xFFFFFFFF, index(tag), 20, 20, len(attributes), 0, 0, 0)
+        chunks.append(_chunk(0x0102, node_header, element + bytes(encoded)))
+        for child in children:
+            emit(child)
+        chunks.append(_chunk(0x0103, node_header, struct.pack('<2I', 0xFFFFFFFF, index(tag))))
+
+    emit(root)
+    chunks.append(_chunk(0x0101, node_header, struct.pack('<2I', android, uri)))
+    if strip_attr_names:
+        strings[:len(attr_names)] = [''] * len(attr_names)
+
+    resource_map = _chunk(0x0180, b'', b''.join(struct.pack('<I', ATTR_IDS[name]) for name in attr_names))
+    body = string_pool(strings, utf8) + resource_map + b''.join(chunks)
+    return _chunk(0x0003, b'', body)
+
+
+# Chunk ResTable_type: valores {clave: str o int} de un tipo para un locale ('es', 'es-rMX')
+# y, opcionalmente, densidad y modo noche como calificadores extra
+TypeChunk = namedtuple('TypeChunk', 'type_name locale values density night sparse',
+                       defaults=('', None, 0, False, False))
+
+
+def _config(chunk):
+    config = bytearray(64)
+    struct.pack_into('<I', config, 0, 64)
+    language, _, region = chunk.locale.partition('-r')
+    config[8:10] = language.encode('ascii').ljust(2, b'\x00')
+    config[10:12] = region.encode('ascii').ljust(2, b'\x00')
+    struct.pack_into('<H', config, 14, chunk.density)
+    config[29] = 0x20 if chunk.night else 0
+    return bytes(config)
+
+
+def build_arsc(types, keys, chunks, package_id=0x7F, package_name='com.example.app'):
+    """resources.arsc de un paquete: types y keys dan los pools de nombres (el índice de entrada
+    de un recurso es el de su clave en keys) y chunks la lista de TypeChunk"""
+    strings = []
+    type_chunks = bytearray()
+    for chunk in chunks:
+        entries = bytearray()
+        offsets = []
+        for index, key in enumerate(keys):
+            value = (chunk.values or {}).get(key)
+            if value is None:
+                continue
+            offsets.append((index, len(entries)))
+            if isinstance(value, str):
+                if value not in strings:
+                    strings.append(value)
+                data_type, data = 0x03, strings.index(value)
+            else:
+                data_type, data = 0x10, value
+            entries += struct.pack('<HHI', 8, 0, index) + struct.pack('<HBBI', 8, 0, data_type, data)
+
+        if chunk.sparse:
+            table = b''.join(struct.pack('<2H', index, offset // 4) for index, offset in offsets)
+            count = len(offsets)
+        else:
+            present = dict(offsets)
+            table = b''.join(struct.pack('<I', present.get(index, NO_INDEX)) for index in range(len(keys)))
+            count = len(keys)
+        config = _config(chunk)
+        header = struct.pack('<BBHII', types.index(chunk.type_name) + 1, 1 if chunk.sparse else 0, 0,
+                             count, 8 + 12 + len(config) + len(table)) + config
+        type_chunks += _chunk(0x0201, header, table + bytes(entries))
+
+    type_pool, key_pool = string_pool(list(types)), string_pool(list(keys))
+    name = package_name.encode('utf-16-le').ljust(256, b'\x00')
+    header = struct.pack('<I', package_id) + name + struct.pack('<5I', 288, 0, 288 + len(type_pool), 0, 0)
+    package = _chunk(0x0200, header, type_pool + key_pool + bytes(type_chunks))
+    return _chunk(0x0002, struct.pack('<I', 1), string_pool(strings, utf8=True) + package)
@@ -0,0 +1,74 @@
+import pytest
+
+from android_resources import ResourceTable
+
+from res_builder import TypeChunk, build_arsc
+
+
+TYPES = ['attr', 'string', 'integer']
+KEYS = ['app_name', 'greeting', 'farewell', 'columns']
+
+# Identificadores 0x7fTTEEEE: TT es el tipo (1-based en TYPES) y EEEE el índice en KEYS
+APP_NAME, GREETING, FAREWELL = 0x7F020000, 0x7F020001, 0x7F020002
+COLUMNS = 0x7F030003
+
+
+def _table(sparse=False):
+    return ResourceTable(build_arsc(TYPES, KEYS, [
+        TypeChunk('string', '', {'app_name': 'Ejemplo', 'greeting': 'Hello'}, sparse=sparse),
+        TypeChunk('string', 'es', {'greeting': 'Hola'}, sparse=sparse),
+        TypeChunk('string', 'es-rMX', {'greeting': 'Qué onda'}, sparse=sparse),
+        TypeChunk('string', '', {'greeting': 'Good night'}, night=True),
+        TypeChunk('string', 'fr', {'greeting': 'Bonjour hdpi'}, density=240),
+        TypeChunk('string', 'de', {'farewell': 'Tschüss'}, night=True),
+        TypeChunk('integer', '', {'columns': 2}),
+        TypeChunk('integer', '', {'columns': 4}, density=240)
+    ]))
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_values_for_each_locale(sparse):
+    table = _table(sparse)
+    assert table.values('string') == {'app_name': 'Ejemplo', 'greeting': 'Hello'}
+    assert table.values('string', 'es') == {'greeting': 'Hola'}
+    assert table.values('string', 'es-rMX') == {'greeting': 'Qué onda'}
+    assert table.values('integer') == {'columns': '2'}
+
+
+def test_qualified_configs_are_not_defaults():
+    table = _table()
+    # fr solo existe en hdpi y de solo en night: no son locales de strings por defecto
+    assert table.locales('string') == ['', 'es', 'es-rMX']
+    assert table.values('string', 'fr') == {}
+    assert table.values('string', 'de') == {}
+    assert table.type_names() == TYPES
+
+
+def test_strings_for_locale_fall_back_to_defaults():
+    table = _table()
+    assert table.strings_for_locale('es') == {'app_name': 'Ejemplo', 'greeting': 'Hola'}
+    assert table.strings_for_locale('it') == {'app_name': 'Ejemplo', 'greeting': 'Hello'}
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_resolve_prefers_locale_then_default_then_variants(sparse):
+    table = _table(sparse)
+    assert table.resolve(GREETING, 'es') == 'Hola'
+    assert table.resolve(GREETING, 'it') == 'Hello'
+    assert table.resolve(GREETING) == 'Hello'
+    assert table.resolve(APP_NAME, 'es') == 'Ejemplo'
+    assert table.resolve(COLUMNS) == '2'
+    # Recurso que solo existe en una variante calificada
+    assert table.resolve(FAREWELL, 'de') == 'Tschüss'
+
+
+def test_resolve_missing_resources():
+    table = _table()
+    assert table.resolve(0x7F020003) is None
+    assert table.resolve(0x7F090000) is None
+    assert table.resolve(0x01020000) is None
+
+
+def test_rejects_non_table_data():
+    with pytest.raises(ValueError):
+        ResourceTable(b'\x03\x00\x08\x00\x08\x00\x00\x00')
@@ -0,0 +1,70 @@
+import pytest
+
+from android_resources import is_axml, parse_axml, parse_xml_document, summarize_manifest
+
+from res_builder import build_axml
+
+
+MANIFEST = ('manifest', [('package', 'string', 'com.example.app'),
+                         ('versionCode', 'int', 42), ('versionName', 'string', '1.2.3')], [
+    ('uses-sdk', [('minSdkVersion', 'int', 21), ('targetSdkVersion', 'int', 34)], []),
+    ('uses-permission', [('name', 'string', 'android.permission.INTERNET')], []),
+    ('uses-permission', [('name', 'string', 'android.permission.CAMERA')], []),
+    ('uses-permission', [('name', 'string', 'android.permission.INTERNET')], []),
+    ('application', [('label', 'string', 'Ejemplo'), ('name', 'string', '.App'),
+                     ('debuggable', 'bool', True)], [
+        ('activity', [('name', 'string', '.MainActivity')], [
+            ('intent-filter', [], [('action', [('name', 'string', 'android.intent.action.MAIN')], [])])
+        ]),
+        ('activity', [('name', 'string', 'SettingsActivity'), ('exported', 'bool', False)], []),
+        ('service', [('name', 'string', 'com.other.SyncService'), ('exported', 'bool', True)], []),
+        ('receiver', [('name', 'string', 'BootReceiver')], []),
+        ('provider', [('name', 'string', '.data.Provider')], [])
+    ])
+])
+
+
+@pytest.mark.parametrize('utf8', [False, True])
+def test_summary_of_binary_manifest(utf8):
+    data = build_axml(MANIFEST, utf8=utf8)
+    assert is_axml(data)
+    summary = summarize_manifest(parse_xml_document(data))
+
+    assert summary['package'] == 'com.example.app'
+    assert (summary['version_code'], summary['version_name']) == ('42', '1.2.3')
+    assert (summary['min_sdk'], summary['target_sdk']) == ('21', '34')
+    assert summary['permissions'] == ['android.permission.INTERNET', 'android.permission.CAMERA']
+    assert summary['app_name'] == 'Ejemplo'
+    assert summary['application_class'] == 'com.example.app.App'
+    assert summary['debuggable'] is True
+
+
+def test_component_names_are_resolved_against_the_package():
+    summary = summarize_manifest(parse_axml(build_axml(MANIFEST)))
+    assert summary['activities'] == ['com.example.app.MainActivity', 'com.example.app.SettingsActivity']
+    assert summary['services'] == ['com.other.SyncService']
+    assert summary['receivers'] == ['com.example.app.BootReceiver']
+    assert summary['providers'] == ['com.example.app.data.Provider']
+    # exported explícito o implícito por intent-filter; exported="false" manda sobre el resto
+    assert summary['exported_components'] == ['com.example.app.MainActivity', 'com.other.SyncService']
+
+
+def test_obfuscated_attribute_names_come_from_the_resource_map():
+    root = parse_axml(build_axml(MANIFEST, strip_attr_names=True))
+    assert root.get('android:versionCode') == '42'
+    assert root.find('uses-sdk').get('android:minSdkVersion') == '21'
+    assert summarize_manifest(root) == summarize_manifest(parse_axml(build_axml(MANIFEST)))
+
+
+def test_tree_keeps_namespace_and_nesting():
+    root = parse_axml(build_axml(MANIFEST))
+    assert root.get('xmlns:android') == 'http://schemas.android.com/apk/res/android'
+    action = root.find('application/activity/intent-filter/action')
+    assert action.get('android:name') == 'android.intent.action.MAIN'
+    assert root.find('application').get('android:debuggable') == 'true'
+
+
+def test_non_axml_input_is_rejected():
+    assert not is_axml(b'<manifest/>')
+    with pytest.raises(ValueError):
+        parse_axml(b'<manifest/>')
@@ -0,0 +1,46 @@
+from android_dex import DexFile
+
+from dex_builder import ClassSpec, build_dex
+
+
+STRINGS = ['LA;', 'LB;', 'V', 'a', 'b', 'f', 'g']
+TYPES = [0, 1, 2]
+
+
+def _dex():
+    return DexFile(build_dex(
+        STRINGS, TYPES,
+        protos=[(2, 2, [])],
+        fields=[(0, 1, 5), (1, 0, 6), (0, 0, 6)],
+        methods=[(0, 0, 3), (1, 0, 4), (0, 0, 4)],
+        classes=[
+            ClassSpec(1, static_fields=[(1, 0x8)], direct_methods=[(1, 0x1, None)]),
+            ClassSpec(0, instance_fields=[(0, 0x2), (2, 0x2)],
+                      virtual_methods=[(0, 0x1, None), (2, 0x1, None)])
+        ]
+    ))
+
+
+def test_type_and_class_def_columns_match_records():
+    dex = _dex()
+    assert list(dex.type_columns()) == [dex.type_ids[i] for i in range(len(dex.type_ids))]
+    assert list(dex.class_def_types()) == [1, 0]
+    assert [dex.type_name(i) for i in dex.class_def_types()] == ['LB;', 'LA;']
+
+
+def test_method_and_field_columns_match_records():
+    dex = _dex()
+    methods = dex.method_columns()
+    assert list(zip(methods.class_idx, methods.proto_idx, methods.name_idx)) == [tuple(m) for m in dex.method_ids]
+    fields = dex.field_columns()
+    assert list(zip(fields.class_idx, fields.type_idx, fields.name_idx)) == [tuple(f) for f in dex.field_ids]
+    # Las columnas se decodifican una sola vez
+    assert dex.method_columns() is methods
+
+
+def test_class_data_and_member_counts():
+    dex = _dex()
+    assert dex.defined_member_counts() == (3, 3)
+    data = dex.class_data(dex.class_defs[1].class_data_off)
+    assert [f.field_idx for f in data.instance_fields] == [0, 2]
+    assert [m.method_idx for m in data.virtual_methods] == [0, 2]
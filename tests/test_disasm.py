@@ -0,0 +1,118 @@
+from android_dex import DexFile
+from android_disasm import DexDisassembler, quote_string
+
+from dex_builder import ClassSpec, Code, build_dex
+
+
+STRINGS = ['LTest;', 'Ljava/lang/Object;', 'V', 'I', 'VI', 'run', 'LLoginActivity;',
+           'Ljava/lang/Exception;', 'Ljava/lang/invoke/MethodHandle;', 'invoke',
+           '[Ljava/lang/Object;', 'LL', 'work', 'Test.java']
+TYPES = [0, 1, 2, 3, 7, 8, 10, 6]
+
+# work()V con registers=6 e ins=1 (v5 es p0); una instrucción o payload por línea
+UNITS = [
+    0x546e, 0x0000, 0x3210,                         # 0x00 invoke-virtual (35c, 5 registros)
+    0x0374, 0x0000, 0x0001,                         # 0x03 invoke-virtual/range (3rc)
+    0x20fa, 0x0001, 0x0010, 0x0000,                 # 0x06 invoke-polymorphic (45cc)
+    0x02fb, 0x0001, 0x0000, 0x0000,                 # 0x0a invoke-polymorphic/range (4rcc)
+    0x0015, 0x7f01,                                 # 0x0e const/high16 (21h)
+    0x0019, 0x8000,                                 # 0x10 const-wide/high16 (21h, negativo)
+    0x052b, 12, 0,                                  # 0x12 packed-switch p0
+    0x052c, 17, 0,                                  # 0x15 sparse-switch p0
+    0x0026, 24, 0,                                  # 0x18 fill-array-data v0
+    0x000e,                                         # 0x1b return-void
+    0x000d,                                         # 0x1c move-exception v0
+    0xfe28,                                         # 0x1d goto -2
+    0x0100, 2, 10, 0, 9, 0, 11, 0,                  # 0x1e packed-switch-payload
+    0x0200, 2, 0xffff, 0xffff, 100, 0, 6, 0, 7, 0,  # 0x26 sparse-switch-payload
+    0x0300, 4, 2, 0, 1, 0, 0xffff, 0xffff,          # 0x30 fill-array-data-payload
+]
+
+EXPECTED = '''.method public work()V
+    .registers 6
+
+    :try_start_0
+    invoke-virtual {v0, v1, v2, v3, v4}, LTest;->run(I)V
+    :try_end_3
+    .catch Ljava/lang/Exception; {:try_start_0 .. :try_end_3} :catch_1c
+
+    invoke-virtual/range {v1 .. v3}, LTest;->run(I)V
+
+    invoke-polymorphic {v0, v1}, Ljava/lang/invoke/MethodHandle;->invoke([Ljava/lang/Object;)Ljava/lang/Object;, (I)V
+
+    invoke-polymorphic/range {v0 .. v1}, Ljava/lang/invoke/MethodHandle;->invoke([Ljava/lang/Object;)Ljava/lang/Object;, (I)V
+
+    const/high16 v0, 0x7f010000
+
+    const-wide/high16 v0, -0x8000000000000000L
+
+    packed-switch p0, :pswitch_data_1e
+
+    sparse-switch p0, :sswitch_data_26
+
+    fill-array-data v0, :array_30
+
+    :goto_1b
+    :pswitch_1b
+    :sswitch_1b
+    return-void
+
+    :catch_1c
+    :sswitch_1c
+    move-exception v0
+
+    :pswitch_1d
+    goto :goto_1b
+
+    :pswitch_data_1e
+    .packed-switch 0xa
+        :pswitch_1b
+        :pswitch_1d
+    .end packed-switch
+
+    :sswitch_data_26
+    .sparse-switch
+        -0x1 -> :sswitch_1b
+        0x64 -> :sswitch_1c
+    .end sparse-switch
+
+    :array_30
+    .array-data 4
+        0x1
+        -0x1
+    .end array-data
+.end method
+'''
+
+
+def _disassembler():
+    return DexDisassembler(DexFile(build_dex(
+        STRINGS, TYPES,
+        protos=[(4, 2, [3]), (11, 1, [6]), (2, 2, [])],
+        methods=[(0, 0, 5), (5, 1, 9), (0, 2, 12)],
+        classes=[
+            ClassSpec(0, superclass_idx=1, source_file_idx=13,
+                      virtual_methods=[(2, 0x1, Code(6, 1, UNITS, [(0, 3, [(4, 0x1c)], None)]))]),
+            ClassSpec(7, superclass_idx=1)
+        ]
+    )))
+
+
+def test_method_matches_baksmali_output():
+    assert _disassembler().disassemble_method('LTest;', 'work') == EXPECTED
+
+
+def test_class_header():
+    smali = _disassembler().disassemble_class('Test')
+    assert smali.startswith('.class public LTest;\n.super Ljava/lang/Object;\n.source "Test.java"\n')
+    assert '\n# virtual methods\n.method public work()V\n' in smali
+
+
+def test_class_names_starting_with_l():
+    disassembler = _disassembler()
+    for name in ('LoginActivity', 'LLoginActivity;', 'LLoginActivity'):
+        assert disassembler.class_def(name).class_idx == 7
+
+
+def test_quote_string():
+    assert quote_string('a"b\\\né\U0001f600') == '"a\\"b\\\\\\n\\u00e9\\ud83d\\ude00"'